@@ -0,0 +1,166 @@
+"""
+API HTTP/JSON du chatbot (indépendante de Streamlit)
+
+Endpoints :
+- POST /chat        {"message": "..."}          -> réponse du chatbot
+- POST /chat/batch  {"messages": ["...", ...]}  -> {"results": [...]}
+- GET  /health                                  -> état du service
+- GET  /metrics                                 -> métriques Prometheus (?format=json)
+
+Lancement :
+    python api.py --port 8000 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+
+# Ajouter le répertoire du projet au path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from chatbot.chatbot_engine import ChatbotEngine
+from monitoring.metrics import metrics
+import config
+
+ENGINE_KEY = web.AppKey("engine", ChatbotEngine)
+EXECUTOR_KEY = web.AppKey("executor", ThreadPoolExecutor)
+
+def _json_response(data, status=200):
+    # default=str : ObjectId et datetime des documents produits
+    return web.json_response(data, status=status, dumps=lambda obj: json.dumps(obj, default=str))
+
+def _error(message, status=400):
+    return _json_response({"error": message}, status=status)
+
+async def _read_json(request):
+    try:
+        return await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+async def _run(request, func, *args):
+    """Exécute le traitement (CPU) dans le pool de workers"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app[EXECUTOR_KEY], func, *args)
+
+async def chat(request):
+    """POST /chat"""
+    payload = await _read_json(request)
+    if not isinstance(payload, dict) or not isinstance(payload.get("message"), str):
+        return _error("Corps attendu: {\"message\": \"...\"}")
+
+    engine = request.app[ENGINE_KEY]
+    if config.API_ASYNC_DATA_ACCESS:
+        # Accès MongoDB asynchrones dans la boucle d'événements (pas de thread par requête)
+        result = await engine.process_message_async(payload["message"])
+    else:
+        result = await _run(request, engine.process_message, payload["message"])
+    return _json_response(result)
+
+async def chat_batch(request):
+    """POST /chat/batch"""
+    payload = await _read_json(request)
+    messages = payload.get("messages") if isinstance(payload, dict) else None
+    if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+        return _error("Corps attendu: {\"messages\": [\"...\", ...]}")
+    if len(messages) > config.API_MAX_BATCH_SIZE:
+        return _error(f"Lot trop grand (maximum {config.API_MAX_BATCH_SIZE} messages)", status=413)
+
+    engine = request.app[ENGINE_KEY]
+    results = await _run(request, engine.process_messages, messages)
+    return _json_response({"results": results})
+
+async def health(request):
+    """GET /health (sans requête au backend de stockage)"""
+    engine = request.app[ENGINE_KEY]
+    storage = engine.storage
+    model_loaded = engine.intent_classifier.is_trained
+    return _json_response(
+        {
+            "status": "ok" if model_loaded else "degraded",
+            "model_loaded": model_loaded,
+            "model_version": engine.intent_classifier.model_version,
+            "storage": storage.name,
+            "storage_connected": storage.is_available(),
+            "storage_breaker": storage.breaker.state,
+            "pid": os.getpid()
+        },
+        status=200 if model_loaded else 503
+    )
+
+async def metrics_endpoint(request):
+    """GET /metrics (format texte Prometheus, ou JSON avec ?format=json)"""
+    if request.query.get("format") == "json":
+        return _json_response(metrics.snapshot())
+    return web.Response(
+        body=metrics.to_prometheus().encode("utf-8"),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    )
+
+async def _on_cleanup(app):
+    await app[ENGINE_KEY].close_async()
+    app[EXECUTOR_KEY].shutdown(wait=True)
+
+def create_app(engine=None, threads=None):
+    """Construit l'application (un moteur partagé par processus)"""
+    app = web.Application(client_max_size=config.API_MAX_BODY_BYTES)
+    app[ENGINE_KEY] = engine or ChatbotEngine()
+    app[EXECUTOR_KEY] = ThreadPoolExecutor(
+        max_workers=threads or config.API_THREADS,
+        thread_name_prefix="chatbot-worker"
+    )
+    app.router.add_post("/chat", chat)
+    app.router.add_post("/chat/batch", chat_batch)
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics_endpoint)
+    app.on_cleanup.append(_on_cleanup)
+    return app
+
+def serve(host, port, threads, reuse_port=False):
+    """Lance un processus serveur"""
+    web.run_app(
+        create_app(threads=threads),
+        host=host,
+        port=port,
+        reuse_port=reuse_port,
+        print=lambda message: print(f"🚀 [{os.getpid()}] {message}")
+    )
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="API HTTP du chatbot")
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    parser.add_argument("--workers", type=int, default=config.API_WORKERS,
+                        help="Nombre de processus serveurs (SO_REUSEPORT)")
+    parser.add_argument("--threads", type=int, default=config.API_THREADS,
+                        help="Taille du pool de classification par processus")
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        serve(args.host, args.port, args.threads)
+        return
+
+    # Plusieurs processus à l'écoute du même port : le noyau répartit les connexions
+    processes = [
+        multiprocessing.Process(
+            target=serve, args=(args.host, args.port, args.threads, True), daemon=False
+        )
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+if __name__ == "__main__":
+    main()
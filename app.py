@@ -19,7 +19,7 @@ except Exception:
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from chatbot.chatbot_engine import ChatbotEngine
-from database.models import ConversationModel, ProductModel
+from database.storage import get_storage
 import plotly.express as px
 import pandas as pd
 from datetime import datetime, timedelta
@@ -132,31 +132,35 @@ elif page == "📊 Dashboard":
     st.title("📊 Dashboard Analytics")
     
     try:
-        conversation_model = ConversationModel()
-        stats = conversation_model.get_conversation_stats()
+        stats = get_storage().get_conversation_stats()
         
-        col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3, col4, col5 = st.columns(5)
         
         with col1:
             st.metric("Total Conversations", stats["total_conversations"])
         
         with col2:
-            avg_confidence = sum(c.get("confidence", 0) for c in stats["recent_conversations"]) / len(stats["recent_conversations"]) if stats["recent_conversations"] else 0
-            st.metric("Confiance Moyenne", f"{avg_confidence:.1%}")
+            st.metric("Confiance Moyenne", f"{stats['average_confidence']:.1%}")
         
         with col3:
             unique_intents = len(set(s["_id"] for s in stats["intent_distribution"]))
             st.metric("Intentions Uniques", unique_intents)
         
         with col4:
-            today_count = sum(1 for c in stats["recent_conversations"] 
-                            if c.get("timestamp") and 
-                            isinstance(c["timestamp"], datetime) and
-                            c["timestamp"].date() == datetime.now().date())
-            st.metric("Aujourd'hui", today_count)
+            st.metric("Aujourd'hui", stats["today_conversations"])
+        
+        with col5:
+            st.metric("Faible Confiance", stats["low_confidence_conversations"])
         
         st.markdown("---")
         
+        # Évolution journalière (agrégats)
+        if stats["daily"]:
+            st.subheader("📅 Conversations par Jour")
+            df_daily = pd.DataFrame(stats["daily"])
+            df_daily.columns = ["Date", "Nombre"]
+            st.bar_chart(df_daily, x="Date", y="Nombre")
+        
         # Graphique de distribution des intentions
         if stats["intent_distribution"]:
             st.subheader("📈 Distribution des Intentions")
@@ -194,7 +198,7 @@ elif page == "📊 Dashboard":
 elif page == "📦 Produits":
     st.title("📦 Gestion des Produits")
     
-    product_model = ProductModel()
+    storage = get_storage()
     
     # Recherche de produits
     st.subheader("🔍 Recherche de Produits")
@@ -212,7 +216,7 @@ elif page == "📦 Produits":
         gender = None if gender_filter == "Tous" else gender_filter
         query = search_query if search_query else None
         
-        products = product_model.search_products(query, category, gender)
+        products = storage.search_products(query, category, gender)
         
         if products:
             st.success(f"✅ {len(products)} produit(s) trouvé(s)")
@@ -236,7 +240,7 @@ elif page == "📦 Produits":
     st.markdown("---")
     st.subheader("📋 Tous les Produits")
     
-    all_products = product_model.get_all_products()
+    all_products = storage.get_all_products()
     if all_products:
         st.info(f"Total: {len(all_products)} produits")
         
@@ -291,7 +295,9 @@ elif page == "⚙️ Configuration":
     
     try:
         cb = get_chatbot()
-        if cb and hasattr(cb.intent_classifier, 'vectorizer') and cb.intent_classifier.is_trained:
+        if cb and hasattr(cb.intent_classifier, 'n_features'):
+            features_count = cb.intent_classifier.n_features
+        elif cb and hasattr(cb.intent_classifier, 'vectorizer') and cb.intent_classifier.is_trained:
             features_count = len(cb.intent_classifier.vectorizer.get_feature_names_out())
         else:
             features_count = 0
@@ -319,7 +325,9 @@ elif page == "⚙️ Configuration":
     with col2:
         try:
             from database.mongodb_connection import mongodb
-            if mongodb.is_connected():
+            if config.STORAGE_BACKEND == "sqlite":
+                st.success(f"✅ SQLite ({config.SQLITE_PATH})")
+            elif mongodb.is_connected():
                 st.success(f"✅ MongoDB connecté ({config.DATABASE_NAME})")
             else:
                 st.error("❌ MongoDB non connecté")
@@ -328,11 +336,56 @@ elif page == "⚙️ Configuration":
     
     with col3:
         try:
-            product_model = ProductModel()
-            count = product_model.get_collection().count_documents({})
+            count = get_storage().count_products()
             st.success(f"✅ {count} produits")
         except:
             st.error("❌ Produits non disponibles")
+    
+    # Métriques de performance (processus Streamlit courant)
+    st.markdown("### ⏱️ Métriques de Performance")
+    
+    from monitoring.metrics import metrics
+    if not metrics.enabled:
+        st.info("Instrumentation désactivée (METRICS_ENABLED=false)")
+    else:
+        st.button("🔄 Actualiser")
+        snapshot = metrics.snapshot()
+        
+        if snapshot["counters"]:
+            counter_cols = st.columns(len(snapshot["counters"]))
+            for col, (name, value) in zip(counter_cols, snapshot["counters"].items()):
+                col.metric(name.replace("chatbot_", ""), value)
+        
+        timings = [
+            {
+                "Étape": name.replace("chatbot_", "").replace("_seconds", ""),
+                "Appels": stats["count"],
+                "Moyenne (ms)": round(stats["mean"] * 1000, 3),
+                "p50 (ms)": round(stats["p50"] * 1000, 3),
+                "p95 (ms)": round(stats["p95"] * 1000, 3),
+                "p99 (ms)": round(stats["p99"] * 1000, 3),
+                "Max (ms)": round(stats["max"] * 1000, 3)
+            }
+            for name, stats in snapshot["histograms"].items()
+            if stats["count"]
+        ]
+        if timings:
+            st.dataframe(pd.DataFrame(timings), use_container_width=True, hide_index=True)
+        else:
+            st.info("Aucune mesure pour le moment")
+        
+        if snapshot["gauges"]:
+            st.dataframe(
+                pd.DataFrame(
+                    [{"Jauge": name.replace("chatbot_", ""), "Valeur": value}
+                     for name, value in snapshot["gauges"].items()]
+                ),
+                use_container_width=True,
+                hide_index=True
+            )
+        
+        with st.expander("Export Prometheus"):
+            st.code(metrics.to_prometheus(), language="text")
 
 # Footer
 st.sidebar.markdown("---")
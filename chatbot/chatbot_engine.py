@@ -1,18 +1,29 @@
 """
 Moteur principal du chatbot
 """
-from nlp.intent_classifier import IntentClassifier
+import asyncio
 from chatbot.response_generator import ResponseGenerator
-from database.models import ConversationModel
+from chatbot.response_cache import ResponseCache
+from nlp.preprocessing import preprocessor
+from database.storage import get_storage
+from database.conversation_logger import async_conversation_logger, conversation_logger
+from monitoring.metrics import metrics
 import config
 
 class ChatbotEngine:
     """Moteur principal du chatbot"""
     
     def __init__(self):
-        self.intent_classifier = IntentClassifier()
+        self.intent_classifier = self._create_classifier()
         self.response_generator = ResponseGenerator()
-        self.conversation_model = ConversationModel()
+        self.storage = get_storage()
+        self.conversation_logger = conversation_logger if config.CONVERSATION_LOG_ASYNC else None
+        self.async_conversation_logger = (
+            async_conversation_logger if config.CONVERSATION_LOG_ASYNC else None
+        )
+        self.response_cache = ResponseCache() if config.RESPONSE_CACHE_ENABLED else None
+        if self.response_cache is not None:
+            metrics.register_collector("response_cache", self.response_cache.stats)
         
         # Charger le modèle si disponible
         try:
@@ -20,46 +31,227 @@ class ChatbotEngine:
         except FileNotFoundError:
             print("⚠️ Modèle non trouvé. Veuillez d'abord entraîner le modèle.")
     
+    @staticmethod
+    def _create_classifier():
+        """Classificateur selon le moteur d'inférence configuré"""
+        if config.INFERENCE_BACKEND == "sklearn":
+            from nlp.intent_classifier import IntentClassifier
+            return IntentClassifier()
+        from nlp.fast_inference import FastIntentClassifier
+        return FastIntentClassifier()
+    
+    def save_conversation(self, user_message, bot_response, intent, confidence):
+        """Enregistre une conversation (en arrière-plan si la journalisation asynchrone est active)"""
+        if self.conversation_logger is not None:
+            return self.conversation_logger.log(user_message, bot_response, intent, confidence)
+        return self.storage.save_conversation(
+            user_message=user_message,
+            bot_response=bot_response,
+            intent=intent,
+            confidence=confidence
+        )
+    
+    def close(self):
+        """Écrit les conversations en attente"""
+        if self.conversation_logger is not None:
+            self.conversation_logger.flush()
+    
+    async def close_async(self):
+        """Écrit les conversations en attente du chemin asynchrone"""
+        if self.async_conversation_logger is not None:
+            await self.async_conversation_logger.close()
+        self.close()
+    
+    def _empty_message_response(self):
+        return {
+            "response": "Je n'ai pas compris votre message. Pouvez-vous reformuler ?",
+            "intent": "unknown",
+            "confidence": 0.0
+        }
+    
+    def _error_response(self):
+        return {
+            "response": "Désolé, une erreur s'est produite. Pouvez-vous réessayer ?",
+            "intent": "error",
+            "confidence": 0.0
+        }
+    
+    def _cache_lookup(self, user_message, catalog_version):
+        """Retourne (clé de cache, réponse en cache ou None)"""
+        if self.response_cache is None:
+            return None, None
+        cache_key = preprocessor.clean_text(user_message)
+        if not cache_key:
+            return None, None
+        return cache_key, self.response_cache.get(cache_key, catalog_version)
+    
+    def _build_response(self, user_message, intent, confidence, cache_key, catalog_version):
+        """Génère la réponse d'un message classé et la met en cache"""
+        response_data = self.response_generator.generate_response(
+            intent, user_message, confidence
+        )
+        return self._finish_response(intent, confidence, response_data, cache_key, catalog_version)
+    
+    def _finish_response(self, intent, confidence, response_data, cache_key, catalog_version):
+        """Résultat renvoyé au client, mis en cache"""
+        result = {
+            "response": response_data.get("response", ""),
+            "intent": intent,
+            "confidence": float(confidence),
+            "type": response_data.get("type", "text"),
+            "products": response_data.get("products", [])
+        }
+        if cache_key:
+            self.response_cache.put(cache_key, result, catalog_version)
+        return result
+    
+    def _log_response(self, user_message, result):
+        self.save_conversation(
+            user_message=user_message,
+            bot_response=result["response"],
+            intent=result["intent"],
+            confidence=result["confidence"]
+        )
+    
+    @metrics.timed("process_message_seconds", "Durée de traitement complète d'un message")
     def process_message(self, user_message):
         """Traite un message utilisateur et retourne une réponse"""
+        metrics.inc("messages_total", help_text="Messages reçus")
         if not user_message or not user_message.strip():
-            return {
-                "response": "Je n'ai pas compris votre message. Pouvez-vous reformuler ?",
-                "intent": "unknown",
-                "confidence": 0.0
-            }
+            return self._empty_message_response()
         
         try:
-            # Classification de l'intention
-            intent, confidence = self.intent_classifier.predict(user_message)
-            
-            # Génération de la réponse
-            response_data = self.response_generator.generate_response(
-                intent, user_message, confidence
+            # Cache des réponses, indexé par le message normalisé
+            catalog_version = (
+                self.response_generator.catalog_version() if self.response_cache is not None else None
             )
+            cache_key, result = self._cache_lookup(user_message, catalog_version)
+            
+            if result is None:
+                # Classification de l'intention
+                intent, confidence = self.intent_classifier.predict(user_message)
+                
+                # Génération de la réponse
+                result = self._build_response(
+                    user_message, intent, confidence, cache_key, catalog_version
+                )
             
             # Sauvegarde de la conversation
-            self.conversation_model.save_conversation(
-                user_message=user_message,
-                bot_response=response_data.get("response", ""),
-                intent=intent,
-                confidence=float(confidence)
+            self._log_response(user_message, result)
+            
+            return dict(result)
+        
+        except Exception as e:
+            print(f"❌ Erreur lors du traitement: {e}")
+            metrics.inc("errors_total", help_text="Messages en erreur")
+            return self._error_response()
+    
+    async def _log_response_async(self, user_message, result):
+        """Met la conversation en file d'écriture (lots écrits en tâche de fond)"""
+        if self.storage.name != "mongodb":
+            # Base embarquée : mise en file non bloquante, sinon écriture
+            # (ou attente de place dans la file) dans le pool de threads
+            logger = self.conversation_logger
+            if logger is not None and logger.overflow_policy != "block":
+                self._log_response(user_message, result)
+                return
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._log_response, user_message, result)
+            return
+        if self.async_conversation_logger is not None:
+            await self.async_conversation_logger.log(
+                user_message, result["response"], result["intent"], result["confidence"]
+            )
+            return
+        from database.async_models import AsyncConversationModel
+        await AsyncConversationModel.save_conversation(
+            user_message=user_message,
+            bot_response=result["response"],
+            intent=result["intent"],
+            confidence=result["confidence"]
+        )
+    
+    @metrics.timed("process_message_async_seconds", "Durée de traitement complète d'un message (async)")
+    async def process_message_async(self, user_message):
+        """Variante asynchrone de `process_message`
+        
+        La FAQ et les produits sont lus avec le client MongoDB asynchrone et
+        la conversation passe par une file bornée écrite par lots en tâche de
+        fond : la réponse n'attend pas l'écriture (sauf file pleine avec la
+        politique "block"). La classification (quelques dizaines de µs) reste dans la
+        boucle d'événements.
+        """
+        metrics.inc("messages_total", help_text="Messages reçus")
+        if not user_message or not user_message.strip():
+            return self._empty_message_response()
+        
+        try:
+            catalog_version = (
+                self.response_generator.catalog_version_async() if self.response_cache is not None else None
             )
+            cache_key, result = self._cache_lookup(user_message, catalog_version)
             
-            return {
-                "response": response_data.get("response", ""),
-                "intent": intent,
-                "confidence": float(confidence),
-                "type": response_data.get("type", "text"),
-                "products": response_data.get("products", [])
-            }
+            if result is None:
+                intent, confidence = self.intent_classifier.predict(user_message)
+                response_data = await self.response_generator.generate_response_async(
+                    intent, user_message, confidence
+                )
+                result = self._finish_response(
+                    intent, confidence, response_data, cache_key, catalog_version
+                )
+            
+            await self._log_response_async(user_message, result)
+            return dict(result)
         
         except Exception as e:
             print(f"❌ Erreur lors du traitement: {e}")
-            return {
-                "response": "Désolé, une erreur s'est produite. Pouvez-vous réessayer ?",
-                "intent": "error",
-                "confidence": 0.0
-            }
-
-
+            metrics.inc("errors_total", help_text="Messages en erreur")
+            return self._error_response()
+    
+    def process_messages(self, user_messages):
+        """Traite un lot de messages ; l'ordre des réponses est conservé
+        
+        Les messages absents du cache sont classés en une seule passe
+        (`IntentClassifier.predict_batch`).
+        """
+        results = [None] * len(user_messages)
+        
+        try:
+            catalog_version = (
+                self.response_generator.catalog_version() if self.response_cache is not None else None
+            )
+            pending = []
+            for index, user_message in enumerate(user_messages):
+                if not user_message or not user_message.strip():
+                    results[index] = self._empty_message_response()
+                    continue
+                cache_key, result = self._cache_lookup(user_message, catalog_version)
+                if result is None:
+                    pending.append((index, user_message, cache_key))
+                else:
+                    results[index] = dict(result)
+            
+            predictions = self.intent_classifier.predict_batch(
+                [user_message for _, user_message, _ in pending]
+            ) if pending else []
+        except Exception as e:
+            print(f"❌ Erreur lors du traitement du lot: {e}")
+            return [
+                result if result is not None else self._error_response()
+                for result in results
+            ]
+        
+        for (index, user_message, cache_key), (intent, confidence) in zip(pending, predictions):
+            try:
+                results[index] = dict(self._build_response(
+                    user_message, intent, confidence, cache_key, catalog_version
+                ))
+            except Exception as e:
+                print(f"❌ Erreur lors du traitement: {e}")
+                results[index] = self._error_response()
+        
+        for user_message, result in zip(user_messages, results):
+            if result["intent"] not in ("unknown", "error"):
+                self._log_response(user_message, result)
+        
+        return results
@@ -0,0 +1,308 @@
+"""
+Moteur de recherche de produits en mémoire (index inversé + BM25)
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import defaultdict
+import config
+from database.storage import get_storage
+from monitoring.metrics import metrics
+from nlp.preprocessing import preprocessor
+
+class Bitmap:
+    """Ensemble d'identifiants de documents stocké sous forme de bits"""
+
+    def __init__(self, size=0):
+        self.bits = bytearray((size + 7) // 8)
+
+    def _grow(self, doc_id):
+        needed = doc_id // 8 + 1
+        if needed > len(self.bits):
+            self.bits.extend(bytes(max(needed - len(self.bits), len(self.bits))))
+
+    def add(self, doc_id):
+        self._grow(doc_id)
+        self.bits[doc_id >> 3] |= 1 << (doc_id & 7)
+
+    def discard(self, doc_id):
+        if doc_id >> 3 < len(self.bits):
+            self.bits[doc_id >> 3] &= ~(1 << (doc_id & 7)) & 0xFF
+
+    def __contains__(self, doc_id):
+        index = doc_id >> 3
+        return index < len(self.bits) and bool(self.bits[index] & (1 << (doc_id & 7)))
+
+    def to_int(self):
+        return int.from_bytes(self.bits, "little")
+
+    @staticmethod
+    def from_int(value):
+        bitmap = Bitmap()
+        bitmap.bits = bytearray(value.to_bytes((value.bit_length() + 7) // 8, "little"))
+        return bitmap
+
+class ProductSearchEngine:
+    """Index inversé des produits avec classement BM25 et facettes
+
+    Les textes (nom, catégorie, description) sont tokenisés et racinisés par
+    le `TextPreprocessor`, puis indexés dans des listes de postings en mémoire.
+    Les filtres catégorie / genre sont résolus par intersection de bitmaps.
+    """
+
+    FACETS = ("category", "gender")
+
+    def __init__(self, k1=1.5, b=0.75, refresh_interval=None):
+        self.k1 = k1
+        self.b = b
+        self.refresh_interval = (
+            config.PRODUCT_INDEX_REFRESH_SECONDS if refresh_interval is None else refresh_interval
+        )
+        self.version = 0
+        self.last_refresh = None
+        self._lock = threading.RLock()
+        # Un seul rafraîchissement à la fois (les autres appelants servent l'index courant)
+        self._refresh_lock = threading.Lock()
+        self._background_refresh = None
+        self._reset()
+
+    def _reset(self):
+        self._docs = []                       # doc_id -> produit (None si supprimé)
+        self._lengths = []                    # doc_id -> nombre de tokens
+        self._fingerprints = {}               # clé produit -> empreinte du contenu
+        self._doc_ids = {}                    # clé produit -> doc_id
+        self._postings = defaultdict(dict)    # terme -> {doc_id: fréquence}
+        self._facets = {facet: defaultdict(Bitmap) for facet in self.FACETS}
+        self._total_length = 0
+        self._size = 0
+
+    @staticmethod
+    def product_key(product):
+        """Identifiant stable d'un produit"""
+        if product.get("product_id"):
+            return str(product["product_id"])
+        if product.get("_id") is not None:
+            return str(product["_id"])
+        return product.get("name", "")
+
+    @staticmethod
+    def _fingerprint(product):
+        return tuple(
+            (key, repr(value)) for key, value in sorted(product.items())
+            if key not in ("_id", "created_at")
+        )
+
+    @staticmethod
+    def _normalize_facet(value):
+        return str(value).strip().lower() if value else ""
+
+    def _tokenize(self, text):
+        return preprocessor.preprocess(text).split() if text else []
+
+    def __len__(self):
+        return self._size
+
+    def _add(self, key, product):
+        doc_id = len(self._docs)
+        tokens = self._tokenize(
+            " ".join(str(product.get(field) or "") for field in ("name", "category", "description"))
+        )
+
+        frequencies = defaultdict(int)
+        for token in tokens:
+            frequencies[token] += 1
+        for token, frequency in frequencies.items():
+            self._postings[token][doc_id] = frequency
+
+        for facet in self.FACETS:
+            self._facets[facet][self._normalize_facet(product.get(facet))].add(doc_id)
+
+        self._docs.append(product)
+        self._lengths.append(len(tokens))
+        self._doc_ids[key] = doc_id
+        self._fingerprints[key] = self._fingerprint(product)
+        self._total_length += len(tokens)
+        self._size += 1
+
+    def _remove(self, key):
+        doc_id = self._doc_ids.pop(key)
+        self._fingerprints.pop(key, None)
+        product = self._docs[doc_id]
+
+        for token in set(self._tokenize(
+            " ".join(str(product.get(field) or "") for field in ("name", "category", "description"))
+        )):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[token]
+
+        for facet in self.FACETS:
+            self._facets[facet][self._normalize_facet(product.get(facet))].discard(doc_id)
+
+        self._total_length -= self._lengths[doc_id]
+        self._docs[doc_id] = None
+        self._lengths[doc_id] = 0
+        self._size -= 1
+
+    def upsert_product(self, product):
+        """Ajoute ou met à jour un produit dans l'index"""
+        key = self.product_key(product)
+        with self._lock:
+            if key in self._doc_ids:
+                if self._fingerprints.get(key) == self._fingerprint(product):
+                    return False
+                self._remove(key)
+            self._add(key, product)
+            self.version += 1
+            return True
+
+    def remove_product(self, product_or_key):
+        """Retire un produit de l'index"""
+        key = product_or_key if isinstance(product_or_key, str) else self.product_key(product_or_key)
+        with self._lock:
+            if key not in self._doc_ids:
+                return False
+            self._remove(key)
+            self.version += 1
+            return True
+
+    def refresh(self, products=None):
+        """Synchronise l'index avec le catalogue (incrémental)
+
+        Seuls les produits ajoutés, modifiés ou supprimés depuis le dernier
+        rafraîchissement sont réindexés. Retourne le nombre de changements.
+        Une erreur de lecture du catalogue est propagée et l'index est
+        conservé tel quel.
+        """
+        if products is None:
+            products = get_storage().find_all_products()
+
+        with self._lock:
+            seen = set()
+            changes = 0
+            for product in products:
+                key = self.product_key(product)
+                seen.add(key)
+                if key in self._doc_ids and self._fingerprints.get(key) == self._fingerprint(product):
+                    continue
+                if key in self._doc_ids:
+                    self._remove(key)
+                self._add(key, product)
+                changes += 1
+
+            for key in [key for key in self._doc_ids if key not in seen]:
+                self._remove(key)
+                changes += 1
+
+            # Compactage lorsque les trous laissés par les suppressions dominent
+            if len(self._docs) > 2 * max(self._size, 1):
+                live = [product for product in self._docs if product is not None]
+                self._reset()
+                for product in live:
+                    self._add(self.product_key(product), product)
+
+            if changes:
+                self.version += 1
+            self.last_refresh = time.monotonic()
+            return changes
+
+    def ensure_fresh(self):
+        """Rafraîchit l'index s'il est vide ou plus vieux que l'intervalle configuré"""
+        if not self.is_stale():
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            # Rafraîchissement déjà en cours dans un autre thread
+            return
+        try:
+            if self.is_stale():
+                self.refresh()
+        except Exception as e:
+            print(f"⚠️ Impossible de rafraîchir l'index produits: {e}")
+            # Index conservé ; nouvel essai à l'intervalle suivant
+            self.last_refresh = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def ensure_fresh_in_background(self):
+        """Variante de `ensure_fresh` pour la boucle d'événements
+
+        Le rafraîchissement (lecture du catalogue et réindexation) est
+        exécuté dans le pool de threads de la boucle, sans l'attendre :
+        l'index courant reste servi pendant ce temps. Un seul
+        rafraîchissement est planifié à la fois.
+        """
+        if not self.is_stale():
+            return
+        if self._background_refresh is not None and not self._background_refresh.done():
+            return
+        loop = asyncio.get_running_loop()
+        self._background_refresh = loop.run_in_executor(None, self.ensure_fresh)
+
+    def is_stale(self):
+        """Vrai si l'index n'a jamais été chargé ou dépasse l'intervalle de rafraîchissement"""
+        return (
+            self.last_refresh is None
+            or (self.refresh_interval and time.monotonic() - self.last_refresh > self.refresh_interval)
+        )
+
+    def _facet_mask(self, facet, value):
+        """Bitmap (entier) des documents dont la facette contient `value`"""
+        value = self._normalize_facet(value)
+        mask = 0
+        for facet_value, bitmap in self._facets[facet].items():
+            if value in facet_value:
+                mask |= bitmap.to_int()
+        return mask
+
+    @metrics.timed("index_search_products_seconds", "Durée d'une recherche dans l'index produits")
+    def search(self, query, category=None, gender=None, limit=10):
+        """Recherche des produits, classés par score BM25"""
+        with self._lock:
+            candidates = None
+            if category or gender:
+                mask = -1
+                if category:
+                    mask &= self._facet_mask("category", category)
+                if gender:
+                    mask &= self._facet_mask("gender", gender)
+                if not mask:
+                    return []
+                candidates = Bitmap.from_int(mask)
+
+            terms = set(self._tokenize(query))
+            if not terms:
+                results = []
+                for doc_id, product in enumerate(self._docs):
+                    if product is not None and (candidates is None or doc_id in candidates):
+                        results.append(product)
+                        if len(results) >= limit:
+                            break
+                return results
+
+            n_docs = max(self._size, 1)
+            avg_length = self._total_length / n_docs or 1.0
+            scores = defaultdict(float)
+
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    if candidates is not None and doc_id not in candidates:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            return [self._docs[doc_id] for doc_id, _ in ranked]
+
+# Instance globale (l'index est construit au premier appel à ensure_fresh())
+product_search_engine = ProductSearchEngine()
+metrics.register_collector(
+    "product_index",
+    lambda: {"documents": len(product_search_engine), "version": product_search_engine.version}
+)
@@ -0,0 +1,112 @@
+"""
+Cache des réponses du chatbot pour les messages répétés
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+import config
+
+class ResponseCache:
+    """Cache LRU + TTL des réponses, indexé par le message normalisé
+
+    Les réponses de recherche de produits ont un TTL plus court et sont
+    invalidées dès que la version du catalogue change.
+    """
+
+    def __init__(self, max_entries=None, ttl=None, product_ttl=None, max_bytes=None):
+        self.max_entries = max_entries or config.RESPONSE_CACHE_MAX_ENTRIES
+        self.ttl = config.RESPONSE_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.product_ttl = (
+            config.RESPONSE_CACHE_PRODUCT_TTL_SECONDS if product_ttl is None else product_ttl
+        )
+        self.max_bytes = config.RESPONSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._entries = OrderedDict()   # clé -> (résultat, expiration, taille, version catalogue)
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.product_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _estimate_size(result):
+        return len(json.dumps(result, default=str, ensure_ascii=False).encode('utf-8'))
+
+    def _delete(self, key):
+        _, _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def get(self, key, catalog_version=None):
+        """Retourne la réponse en cache, ou None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            result, expires_at, _, entry_catalog_version = entry
+            if time.monotonic() >= expires_at or (
+                entry_catalog_version is not None and entry_catalog_version != catalog_version
+            ):
+                self._delete(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if entry_catalog_version is not None:
+                self.product_hits += 1
+            return result
+
+    def put(self, key, result, catalog_version=None):
+        """Met une réponse en cache"""
+        is_product = result.get("type") == "products"
+        ttl = self.product_ttl if is_product else self.ttl
+        if not ttl:
+            return
+
+        size = self._estimate_size(result)
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._delete(key)
+            self._entries[key] = (
+                result,
+                time.monotonic() + ttl,
+                size,
+                catalog_version if is_product else None
+            )
+            self.size_bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes and self.size_bytes > self.max_bytes)
+            ):
+                self._delete(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self):
+        """Statistiques du cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "product_hits": self.product_hits,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
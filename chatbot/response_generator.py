@@ -2,15 +2,36 @@
 Générateur de réponses du chatbot
 """
 import re
-from database.models import ProductModel, FAQModel
+from database.models import ProductModel, FAQModel, faq_cache
+from database.storage import get_storage
 from nlp.preprocessing import preprocessor
+from chatbot.product_search import product_search_engine
+from monitoring.metrics import metrics
+import config
 
 class ResponseGenerator:
     """Générateur de réponses contextuelles"""
     
+    # Intentions répondues par la FAQ (méthode de la réponse par défaut)
+    FAQ_DEFAULT_RESPONSES = {
+        "livraison": "_default_delivery_response",
+        "paiement": "_default_payment_response",
+        "retour": "_default_return_response",
+        "promotion": "_default_promotion_response",
+        "contact": "_default_contact_response"
+    }
+    
     def __init__(self):
         self.product_model = ProductModel()
         self.faq_model = FAQModel()
+        self.faq_cache = faq_cache
+        if not self.faq_cache.preloaded:
+            self.faq_cache.preload()
+            if config.FAQ_CACHE_WATCH_CHANGES:
+                self.faq_cache.watch_changes()
+        self.product_search = (
+            product_search_engine if config.PRODUCT_SEARCH_BACKEND == "index" else None
+        )
     
     def extract_product_keywords(self, text):
         """Extrait les mots-clés de recherche de produits"""
@@ -66,6 +87,76 @@ class ResponseGenerator:
         
         return keywords
     
+    def catalog_version(self):
+        """Version du catalogue utilisé pour la recherche de produits"""
+        if self.product_search is not None:
+            self.product_search.ensure_fresh()
+            return (ProductModel.version, self.product_search.version)
+        return (ProductModel.version, None)
+    
+    def catalog_version_async(self):
+        """Variante de `catalog_version` pour la boucle d'événements (rafraîchissement en arrière-plan)"""
+        if self.product_search is not None:
+            self.product_search.ensure_fresh_in_background()
+            return (ProductModel.version, self.product_search.version)
+        return (ProductModel.version, None)
+    
+    def search_products(self, query, category=None, gender=None, limit=10):
+        """Recherche des produits via l'index en mémoire, ou le backend de stockage à défaut"""
+        if self.product_search is not None:
+            self.product_search.ensure_fresh()
+            if len(self.product_search):
+                return self.product_search.search(query, category=category, gender=gender, limit=limit)
+        
+        return get_storage().search_products(
+            query=query,
+            category=category,
+            gender=gender,
+            limit=limit
+        )
+    
+    async def search_products_async(self, query, category=None, gender=None, limit=10):
+        """Variante asynchrone de `search_products` (index en mémoire, ou MongoDB asynchrone)"""
+        if self.product_search is not None:
+            self.product_search.ensure_fresh_in_background()
+            if len(self.product_search):
+                return self.product_search.search(query, category=category, gender=gender, limit=limit)
+        
+        if get_storage().name != "mongodb":
+            return self.search_products(query, category=category, gender=gender, limit=limit)
+        from database.async_models import AsyncProductModel
+        return await AsyncProductModel.search_products(
+            query=query,
+            category=category,
+            gender=gender,
+            limit=limit
+        )
+    
+    @metrics.timed("generate_response_async_seconds", "Durée de génération d'une réponse (async)")
+    async def generate_response_async(self, intent, user_message, confidence):
+        """Variante asynchrone de `generate_response` : FAQ et produits lus sans bloquer"""
+        if intent in self.FAQ_DEFAULT_RESPONSES:
+            faq = await self.faq_cache.get_async(intent)
+            default = getattr(self, self.FAQ_DEFAULT_RESPONSES[intent])()
+            return {
+                "response": faq.get('answer', default) if faq else default,
+                "type": "text"
+            }
+        
+        if intent == "recherche_produit":
+            keywords = self.extract_product_keywords(user_message)
+            products = await self.search_products_async(
+                query=keywords['query'],
+                category=keywords['category'],
+                gender=keywords['gender'],
+                limit=5
+            )
+            return self._product_search_response(products)
+        
+        # Réponses statiques (aucun accès aux données)
+        return self.generate_response(intent, user_message, confidence)
+    
+    @metrics.timed("generate_response_seconds", "Durée de génération d'une réponse")
     def generate_response(self, intent, user_message, confidence):
         """Génère une réponse selon l'intention"""
         
@@ -111,14 +202,16 @@ class ResponseGenerator:
     def _handle_product_search(self, user_message):
         """Gère la recherche de produits"""
         keywords = self.extract_product_keywords(user_message)
-        
-        products = self.product_model.search_products(
+        products = self.search_products(
             query=keywords['query'],
             category=keywords['category'],
             gender=keywords['gender'],
             limit=5
         )
-        
+        return self._product_search_response(products)
+    
+    def _product_search_response(self, products):
+        """Réponse listant les produits trouvés"""
         if products:
             response_text = "Voici quelques produits qui pourraient vous intéresser :\n\n"
             for i, product in enumerate(products, 1):
@@ -144,7 +237,7 @@ class ResponseGenerator:
             }
     
     def _handle_delivery(self):
-        faq = self.faq_model.get_faq_by_intent("livraison")
+        faq = self.faq_cache.get("livraison")
         if faq:
             return {
                 "response": faq.get('answer', self._default_delivery_response()),
@@ -166,7 +259,7 @@ class ResponseGenerator:
 Pour suivre votre commande, utilisez le numéro de suivi reçu par email ou connectez-vous à votre compte."""
     
     def _handle_payment(self):
-        faq = self.faq_model.get_faq_by_intent("paiement")
+        faq = self.faq_cache.get("paiement")
         if faq:
             return {
                 "response": faq.get('answer', self._default_payment_response()),
@@ -188,7 +281,7 @@ Pour suivre votre commande, utilisez le numéro de suivi reçu par email ou conn
 Tous les paiements sont sécurisés via notre système de cryptage SSL."""
     
     def _handle_return(self):
-        faq = self.faq_model.get_faq_by_intent("retour")
+        faq = self.faq_cache.get("retour")
         if faq:
             return {
                 "response": faq.get('answer', self._default_return_response()),
@@ -214,7 +307,7 @@ Tous les paiements sont sécurisés via notre système de cryptage SSL."""
 Le remboursement sera effectué sous 5-7 jours ouvrés après réception."""
     
     def _handle_promotion(self):
-        faq = self.faq_model.get_faq_by_intent("promotion")
+        faq = self.faq_cache.get("promotion")
         if faq:
             return {
                 "response": faq.get('answer', self._default_promotion_response()),
@@ -235,7 +328,7 @@ Le remboursement sera effectué sous 5-7 jours ouvrés après réception."""
 Consultez notre page "Promotions" pour voir tous les articles en solde !"""
     
     def _handle_contact(self):
-        faq = self.faq_model.get_faq_by_intent("contact")
+        faq = self.faq_cache.get("contact")
         if faq:
             return {
                 "response": faq.get('answer', self._default_contact_response()),
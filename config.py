@@ -11,15 +11,118 @@ MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "chatbot_commerce")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "chatbot_commerce")
 
+# Pool de connexions MongoDB
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000"))
+# Attente maximale d'une connexion libre du pool
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+# Santé : ping en arrière-plan toutes les N secondes (0 : désactivé), résultat réutilisé N secondes
+MONGODB_HEALTH_PROBE_SECONDS = float(os.getenv("MONGODB_HEALTH_PROBE_SECONDS", "10"))
+MONGODB_HEALTH_CACHE_SECONDS = float(os.getenv("MONGODB_HEALTH_CACHE_SECONDS", "5"))
+# Disjoncteur : ouvert après N échecs consécutifs, nouvel essai après N secondes
+MONGODB_BREAKER_FAILURE_THRESHOLD = int(os.getenv("MONGODB_BREAKER_FAILURE_THRESHOLD", "3"))
+MONGODB_BREAKER_RESET_SECONDS = float(os.getenv("MONGODB_BREAKER_RESET_SECONDS", "30"))
+
+# Backend de stockage : "mongodb" ou "sqlite" (base embarquée, sans serveur)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongodb")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/chatbot.sqlite3")
+# Attente maximale du verrou d'écriture SQLite
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Taille des lots d'insertion des produits
+SQLITE_BATCH_SIZE = int(os.getenv("SQLITE_BATCH_SIZE", "500"))
+
+# Journalisation asynchrone des conversations (write-behind)
+CONVERSATION_LOG_ASYNC = os.getenv("CONVERSATION_LOG_ASYNC", "true").lower() == "true"
+CONVERSATION_LOG_QUEUE_SIZE = int(os.getenv("CONVERSATION_LOG_QUEUE_SIZE", "10000"))
+CONVERSATION_LOG_BATCH_SIZE = int(os.getenv("CONVERSATION_LOG_BATCH_SIZE", "100"))
+CONVERSATION_LOG_FLUSH_SECONDS = float(os.getenv("CONVERSATION_LOG_FLUSH_SECONDS", "1.0"))
+# Politique en cas de file pleine : "drop" (abandon) ou "block" (attente bornée)
+CONVERSATION_LOG_OVERFLOW = os.getenv("CONVERSATION_LOG_OVERFLOW", "drop")
+CONVERSATION_LOG_BLOCK_TIMEOUT = float(os.getenv("CONVERSATION_LOG_BLOCK_TIMEOUT", "1.0"))
+# Lot en échec : N nouvelles tentatives, délai doublé à chaque fois (1+2+4+8+16 s
+# couvrent la réouverture du disjoncteur), puis abandon
+CONVERSATION_LOG_RETRIES = int(os.getenv("CONVERSATION_LOG_RETRIES", "5"))
+CONVERSATION_LOG_RETRY_SECONDS = float(os.getenv("CONVERSATION_LOG_RETRY_SECONDS", "1.0"))
+
+# Stockage et rétention des conversations (voir database/schema.py)
+# Collection time-series (MongoDB 5.0+), appliqué à la création de la collection
+CONVERSATION_TIME_SERIES = os.getenv("CONVERSATION_TIME_SERIES", "false").lower() == "true"
+# Suppression automatique (TTL) après N jours ; 0 : conservation illimitée
+CONVERSATION_RETENTION_DAYS = float(os.getenv("CONVERSATION_RETENTION_DAYS", "0"))
+# Archivage en JSON Lines gzip des jours plus anciens que N jours
+CONVERSATION_ARCHIVE_DIR = os.getenv("CONVERSATION_ARCHIVE_DIR", "archives/conversations")
+CONVERSATION_ARCHIVE_AFTER_DAYS = int(os.getenv("CONVERSATION_ARCHIVE_AFTER_DAYS", "30"))
+
+# Agrégats des conversations (dashboard) : par heure et par jour, par intention
+ROLLUPS_ON_WRITE = os.getenv("ROLLUPS_ON_WRITE", "true").lower() == "true"
+ROLLUP_HOURLY_COLLECTION = os.getenv("ROLLUP_HOURLY_COLLECTION", "conversation_rollups_hourly")
+ROLLUP_DAILY_COLLECTION = os.getenv("ROLLUP_DAILY_COLLECTION", "conversation_rollups_daily")
+# Le recalcul ne touche que les heures closes depuis N secondes (écritures différées comprises)
+ROLLUP_REFRESH_DELAY_SECONDS = int(os.getenv("ROLLUP_REFRESH_DELAY_SECONDS", "300"))
+# Seuil en dessous duquel une prédiction est comptée comme peu confiante
+LOW_CONFIDENCE_THRESHOLD = float(os.getenv("LOW_CONFIDENCE_THRESHOLD", "0.5"))
+
+# Cache des réponses FAQ
+FAQ_CACHE_TTL_SECONDS = int(os.getenv("FAQ_CACHE_TTL_SECONDS", "3600"))
+FAQ_CACHE_MAX_ENTRIES = int(os.getenv("FAQ_CACHE_MAX_ENTRIES", "256"))
+FAQ_CACHE_WATCH_CHANGES = os.getenv("FAQ_CACHE_WATCH_CHANGES", "false").lower() == "true"
+
+# Cache des réponses (messages répétés)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_PRODUCT_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_PRODUCT_TTL_SECONDS", "60"))
+# Taille maximale du cache en octets (0 = illimitée)
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", "0"))
+
+# API HTTP (api.py)
+API_HOST = os.getenv("API_HOST", "0.0.0.0")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+API_THREADS = int(os.getenv("API_THREADS", "4"))
+API_MAX_BATCH_SIZE = int(os.getenv("API_MAX_BATCH_SIZE", "1000"))
+API_MAX_BODY_BYTES = int(os.getenv("API_MAX_BODY_BYTES", str(4 * 1024 * 1024)))
+# POST /chat : accès MongoDB asynchrones (AsyncMongoClient) au lieu du pool de threads
+API_ASYNC_DATA_ACCESS = os.getenv("API_ASYNC_DATA_ACCESS", "false").lower() == "true"
+
+# Instrumentation (métriques Prometheus / JSON)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
 # Configuration NLP
+MODEL_BUNDLE_PATH = os.getenv("MODEL_BUNDLE_PATH", "models/intent_classifier")
+# Ancien format (deux pickles), encore lu si aucun bundle n'existe
 MODEL_PATH = "models/intent_classifier.pkl"
 VECTORIZER_PATH = "models/tfidf_vectorizer.pkl"
 SPACY_MODEL = "fr_core_news_sm"
+# Pipeline de prétraitement optimisé (sortie identique au pipeline NLTK)
+PREPROCESSING_FAST_PATH = os.getenv("PREPROCESSING_FAST_PATH", "true").lower() == "true"
+STEM_CACHE_SIZE = int(os.getenv("STEM_CACHE_SIZE", "50000"))
+# En dessous, preprocess_many reste dans le processus courant
+PREPROCESSING_PARALLEL_MIN_TEXTS = int(os.getenv("PREPROCESSING_PARALLEL_MIN_TEXTS", "2000"))
+# Cache persistant des exemples d'entraînement prétraités
+PREPROCESSING_CACHE_ENABLED = os.getenv("PREPROCESSING_CACHE_ENABLED", "true").lower() == "true"
+PREPROCESSING_CACHE_PATH = os.getenv("PREPROCESSING_CACHE_PATH", "models/preprocessing_cache.jsonl.gz")
+# Moteur d'inférence : "numpy" (sans scikit-learn au service) ou "sklearn"
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "numpy")
+# Vectorisation à l'entraînement : "tfidf" (vocabulaire) ou "hashing"
+# (hachage de features + SGD, entraînement en flux et incrémental)
+INTENT_VECTORIZER = os.getenv("INTENT_VECTORIZER", "tfidf")
+HASHING_N_FEATURES = int(os.getenv("HASHING_N_FEATURES", str(2 ** 18)))
+FEATURE_HASH_CACHE_SIZE = int(os.getenv("FEATURE_HASH_CACHE_SIZE", "100000"))
+
+# Configuration de la recherche de produits
+# "index" : index inversé en mémoire (BM25), "mongodb" : requêtes au backend de stockage
+# ($regex MongoDB, ou FTS5 avec STORAGE_BACKEND=sqlite)
+PRODUCT_SEARCH_BACKEND = os.getenv("PRODUCT_SEARCH_BACKEND", "index")
+PRODUCT_INDEX_REFRESH_SECONDS = int(os.getenv("PRODUCT_INDEX_REFRESH_SECONDS", "300"))
 
 # Configuration des données
 DATA_DIR = "data"
 TRAINING_DATA_PATH = os.path.join(DATA_DIR, "training_data.json")
-PRODUCTS_DATA_PATH = os.path.join(DATA_DIR, "products.json")
+PRODUCTS_DATA_PATH = os.getenv("PRODUCTS_DATA_PATH", os.path.join(DATA_DIR, "products.json"))
 FAQ_DATA_PATH = os.path.join(DATA_DIR, "faq.json")
 
 # Intentions supportées
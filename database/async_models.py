@@ -0,0 +1,307 @@
+"""
+Accès asynchrone aux données MongoDB (pymongo AsyncMongoClient)
+
+Équivalents asynchrones de `ProductModel`, `FAQModel` et `ConversationModel`
+pour un serveur asyncio : les requêtes ne bloquent pas la boucle
+d'événements, et un seul processus sert de nombreuses conversations
+simultanées sans thread par requête. Les modèles partagent un client unique
+(`async_mongodb`), créé au premier usage dans la boucle courante, avec les
+réglages de pool et le disjoncteur de la connexion synchrone. Identifiants,
+versions de catalogue et agrégats restent ceux des modèles synchrones.
+"""
+import asyncio
+from datetime import datetime
+from pymongo import AsyncMongoClient
+from database.models import (
+    ConversationModel, ConversationRollupModel, FAQModel, ProductModel, is_duplicate_only
+)
+from database.mongodb_connection import CircuitBreaker, PoolMetricsListener, is_connection_error
+from monitoring.metrics import metrics
+import config
+
+class AsyncMongoDBConnection:
+    """Client MongoDB asynchrone partagé (connexion au premier usage)"""
+
+    def __init__(self):
+        self.client = None
+        self.db = None
+        self._connected = False
+        self.breaker = CircuitBreaker()
+        self.pool_listener = PoolMetricsListener()
+        self._lock = None
+
+    def _create_client(self):
+        return AsyncMongoClient(
+            config.MONGODB_URI,
+            maxPoolSize=config.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=config.MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=config.MONGODB_MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=config.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            serverSelectionTimeoutMS=config.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=config.MONGODB_CONNECT_TIMEOUT_MS,
+            event_listeners=[self.pool_listener]
+        )
+
+    async def connect(self):
+        """Établit la connexion (échoue immédiatement si le disjoncteur est ouvert)"""
+        if self._connected and self.client:
+            return True
+        if not self.breaker.allow_request():
+            return False
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self._lock.locked():
+            # Tentative en cours dans une autre tâche : on partage son résultat
+            async with self._lock:
+                return self._connected and self.client is not None
+
+        async with self._lock:
+            if self._connected and self.client:
+                return True
+            if self.breaker.is_open:
+                return False
+            try:
+                if self.client is None:
+                    self.client = self._create_client()
+                    self.db = self.client[config.DATABASE_NAME]
+                await self.client.admin.command('ping')
+            except Exception as e:
+                self._connected = False
+                self.breaker.record_failure()
+                print(f"⚠️ Erreur de connexion MongoDB (async): {e}")
+                return False
+            self._connected = True
+            self.breaker.record_success()
+            print(f"✅ Connexion MongoDB asynchrone réussie: {config.DATABASE_NAME}")
+            return True
+
+    def use_client(self, client):
+        """Utilise un client asynchrone déjà construit"""
+        self.client = client
+        self.db = client[config.DATABASE_NAME]
+        self._connected = True
+        self.breaker.record_success()
+
+    async def get_collection(self, collection_name):
+        """Récupère une collection"""
+        if not self._connected and not await self.connect():
+            if self.breaker.is_open:
+                raise ConnectionError("MongoDB indisponible (disjoncteur ouvert)")
+            raise ConnectionError(
+                f"MongoDB n'est pas connecté. "
+                f"URI: {config.MONGODB_URI}, "
+                f"Database: {config.DATABASE_NAME}"
+            )
+        return self.db[collection_name]
+
+    def is_available(self):
+        """État de santé en cache (aucune requête réseau)"""
+        return self._connected and not self.breaker.is_open
+
+    def record_error(self, error):
+        """Signale l'échec d'une requête ; les erreurs réseau comptent pour le disjoncteur
+        (le prochain appel vérifie la connexion)"""
+        if is_connection_error(error):
+            self._connected = False
+            self.breaker.record_failure()
+
+    def stats(self):
+        """Métriques de la connexion asynchrone : disjoncteur et pool"""
+        breaker = self.breaker.stats()
+        return {
+            "connected": int(self._connected),
+            "breaker_state": breaker["state_code"],
+            "breaker_trips": breaker["trips"],
+            "breaker_rejected": breaker["rejected"],
+            **self.pool_listener.stats()
+        }
+
+    async def close(self):
+        """Ferme la connexion"""
+        if self.client:
+            await self.client.close()
+            self._connected = False
+
+class AsyncProductModel:
+    """Modèle asynchrone pour les produits"""
+
+    @staticmethod
+    async def get_collection():
+        return await async_mongodb.get_collection(ProductModel.COLLECTION_NAME)
+
+    @staticmethod
+    async def insert_product(product_data):
+        """Insère un produit"""
+        try:
+            collection = await AsyncProductModel.get_collection()
+            product_data["created_at"] = datetime.now()
+            product_data["product_id"] = ProductModel.product_id(product_data)
+            result = await collection.insert_one(product_data)
+            ProductModel.bump_version()
+            return result
+        except Exception as e:
+            async_mongodb.record_error(e)
+            print(f"⚠️ Impossible d'insérer le produit: {e}")
+            return None
+
+    @staticmethod
+    @metrics.timed("db_search_products_async_seconds", "Durée d'une recherche de produits MongoDB (async)")
+    async def search_products(query, category=None, gender=None, limit=10):
+        """Recherche de produits"""
+        try:
+            collection = await AsyncProductModel.get_collection()
+            search_filter = {}
+
+            if category:
+                search_filter["category"] = {"$regex": category, "$options": "i"}
+            if gender:
+                search_filter["gender"] = {"$regex": gender, "$options": "i"}
+            if query:
+                search_filter["$or"] = [
+                    {"name": {"$regex": query, "$options": "i"}},
+                    {"description": {"$regex": query, "$options": "i"}}
+                ]
+
+            return await collection.find(search_filter).limit(limit).to_list()
+        except Exception as e:
+            async_mongodb.record_error(e)
+            print(f"⚠️ Impossible de rechercher les produits: {e}")
+            return []
+
+    @staticmethod
+    async def get_all_products():
+        """Récupère tous les produits"""
+        try:
+            collection = await AsyncProductModel.get_collection()
+            return await collection.find({}).to_list()
+        except Exception as e:
+            async_mongodb.record_error(e)
+            print(f"⚠️ Impossible de récupérer les produits: {e}")
+            return []
+
+class AsyncFAQModel:
+    """Modèle asynchrone pour la FAQ"""
+
+    @staticmethod
+    async def get_collection():
+        return await async_mongodb.get_collection(FAQModel.COLLECTION_NAME)
+
+    @staticmethod
+    async def insert_faq(faq_data):
+        """Insère une FAQ"""
+        try:
+            collection = await AsyncFAQModel.get_collection()
+            faq_data["created_at"] = datetime.now()
+            faq_data["faq_id"] = FAQModel.faq_id(faq_data)
+            result = await collection.insert_one(faq_data)
+            FAQModel.bump_version()
+            return result
+        except Exception as e:
+            async_mongodb.record_error(e)
+            print(f"⚠️ Impossible d'insérer la FAQ: {e}")
+            return None
+
+    @staticmethod
+    async def find_faq_by_intent(intent):
+        """Récupère la FAQ par intention (None : aucune FAQ ; lève une exception en cas d'échec)"""
+        try:
+            collection = await AsyncFAQModel.get_collection()
+            return await collection.find_one({"intent": intent})
+        except Exception as e:
+            async_mongodb.record_error(e)
+            raise
+
+    @staticmethod
+    async def get_faq_by_intent(intent):
+        """Récupère la FAQ par intention"""
+        try:
+            return await AsyncFAQModel.find_faq_by_intent(intent)
+        except Exception as e:
+            print(f"⚠️ Impossible de récupérer la FAQ: {e}")
+            return None
+
+    @staticmethod
+    async def get_all_faq():
+        """Récupère toutes les FAQ"""
+        try:
+            collection = await AsyncFAQModel.get_collection()
+            return await collection.find({}).to_list()
+        except Exception as e:
+            async_mongodb.record_error(e)
+            print(f"⚠️ Impossible de récupérer les FAQ: {e}")
+            return []
+
+class AsyncConversationModel:
+    """Modèle asynchrone pour les conversations"""
+
+    @staticmethod
+    async def get_collection():
+        return await async_mongodb.get_collection(config.COLLECTION_NAME)
+
+    @staticmethod
+    @metrics.timed("save_conversation_async_seconds", "Durée d'écriture d'une conversation (async)")
+    async def save_conversation(user_message, bot_response, intent, confidence):
+        """Sauvegarde une conversation"""
+        conversation = ConversationModel.build_conversation(
+            user_message, bot_response, intent, confidence
+        )
+        return await AsyncConversationModel.save_conversations([conversation])
+
+    @staticmethod
+    async def save_conversations(conversations):
+        """Sauvegarde un lot de conversations en une seule requête (agrégats compris)"""
+        if not conversations:
+            return None
+        try:
+            collection = await AsyncConversationModel.get_collection()
+            result = await collection.insert_many(conversations, ordered=False)
+        except Exception as e:
+            if is_duplicate_only(e):
+                # Lot déjà écrit lors d'un essai précédent
+                await AsyncConversationModel._record_rollups(conversations)
+                return e.details
+            async_mongodb.record_error(e)
+            print(f"⚠️ Impossible de sauvegarder {len(conversations)} conversations: {e}")
+            return None
+        await AsyncConversationModel._record_rollups(conversations)
+        return result
+
+    @staticmethod
+    async def _record_rollups(conversations):
+        if not config.ROLLUPS_ON_WRITE:
+            return
+        try:
+            for granularity, operations in ConversationRollupModel.rollup_operations(conversations).items():
+                collection_name = (
+                    config.ROLLUP_HOURLY_COLLECTION if granularity == "hour"
+                    else config.ROLLUP_DAILY_COLLECTION
+                )
+                collection = await async_mongodb.get_collection(collection_name)
+                await collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            async_mongodb.record_error(e)
+            print(f"⚠️ Impossible de mettre à jour les agrégats: {e}")
+
+    @staticmethod
+    async def get_recent_conversations(limit=10):
+        """Dernières conversations (index sur timestamp)"""
+        collection = await AsyncConversationModel.get_collection()
+        return await collection.find().sort("timestamp", -1).limit(limit).to_list()
+
+    @staticmethod
+    async def get_conversation_stats(days=None, recent_limit=10):
+        """Statistiques des conversations, lues dans les agrégats journaliers"""
+        since = ConversationRollupModel.summary_since(days)
+        bucket_filter = {"bucket": {"$gte": since}} if since is not None else {}
+        rollups = await async_mongodb.get_collection(config.ROLLUP_DAILY_COLLECTION)
+        daily, recent = await asyncio.gather(
+            rollups.find(bucket_filter).sort("bucket", 1).to_list(),
+            AsyncConversationModel.get_recent_conversations(recent_limit)
+        )
+        stats = ConversationRollupModel.summarize(daily)
+        stats["recent_conversations"] = recent
+        return stats
+
+# Instance globale (le client est créé au premier usage, dans la boucle d'événements courante)
+async_mongodb = AsyncMongoDBConnection()
+metrics.register_collector("mongodb_async", async_mongodb.stats)
@@ -0,0 +1,114 @@
+"""
+Synchronisation incrémentale (delta) d'une collection avec un fichier source
+"""
+import hashlib
+import json
+from datetime import datetime
+from itertools import islice
+from pymongo import DeleteMany, InsertOne, ReplaceOne
+
+# Champs techniques exclus de l'empreinte du contenu
+METADATA_FIELDS = ("_id", "created_at", "updated_at", "content_hash")
+
+def content_hash(record, key_field=None):
+    """Empreinte stable du contenu d'un enregistrement"""
+    content = {
+        field: value for field, value in record.items()
+        if field not in METADATA_FIELDS and field != key_field
+    }
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def sync_collection(collection, records, key_field, key_fn, chunk_size=1000, dry_run=False):
+    """Applique uniquement les insertions, modifications et suppressions nécessaires
+
+    Les empreintes stockées (`content_hash`) sont comparées à celles des
+    enregistrements source (pour un document stocké sans empreinte, elle est
+    calculée depuis ses champs) ; les différences sont écrites par
+    `bulk_write` non ordonné. Les documents sans clé (doublons de données antérieures,
+    voir `backfill_keys`) sont supprimés. Retourne le résumé du diff.
+    """
+    summary = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "duplicates": 0}
+
+    # État stocké : clé -> (empreinte, date de création)
+    stored = {
+        document[key_field]: (document["content_hash"], document.get("created_at"))
+        for document in collection.find(
+            {key_field: {"$exists": True}, "content_hash": {"$exists": True}},
+            {key_field: 1, "content_hash": 1, "created_at": 1, "_id": 0}
+        )
+    }
+    # Documents sans empreinte (écrits hors synchronisation) : calculée depuis leurs champs
+    for document in collection.find({key_field: {"$exists": True}, "content_hash": {"$exists": False}}):
+        stored[document[key_field]] = (content_hash(document, key_field), document.get("created_at"))
+
+    seen = set()
+    now = datetime.now()
+
+    def flush(operations):
+        if operations and not dry_run:
+            collection.bulk_write(operations, ordered=False)
+
+    for chunk in _chunks(records, chunk_size):
+        operations = []
+        for record in chunk:
+            key = key_fn(record)
+            if key in seen:
+                summary["duplicates"] += 1
+                continue
+            seen.add(key)
+
+            digest = content_hash(record, key_field)
+            stored_hash, created_at = stored.get(key, (None, None))
+            if stored_hash == digest:
+                summary["unchanged"] += 1
+                continue
+
+            document = {
+                field: value for field, value in record.items()
+                if field not in METADATA_FIELDS
+            }
+            document[key_field] = key
+            document["content_hash"] = digest
+
+            if key in stored:
+                document["created_at"] = created_at or now
+                document["updated_at"] = now
+                operations.append(ReplaceOne({key_field: key}, document))
+                summary["updated"] += 1
+            else:
+                document["created_at"] = now
+                operations.append(InsertOne(document))
+                summary["inserted"] += 1
+        flush(operations)
+
+    removed = [key for key in stored if key not in seen]
+    for chunk in _chunks(removed, chunk_size):
+        flush([DeleteMany({key_field: {"$in": chunk}})])
+        summary["deleted"] += len(chunk)
+
+    unkeyed = {key_field: {"$exists": False}}
+    unkeyed_count = collection.count_documents(unkeyed)
+    if unkeyed_count:
+        flush([DeleteMany(unkeyed)])
+        summary["deleted"] += unkeyed_count
+
+    return summary
+
+def format_summary(summary):
+    """Résumé lisible d'un diff"""
+    text = (
+        f"+{summary['inserted']} insérés, ~{summary['updated']} modifiés, "
+        f"-{summary['deleted']} supprimés, {summary['unchanged']} inchangés"
+    )
+    if summary.get("duplicates"):
+        text += f" ({summary['duplicates']} doublons ignorés)"
+    return text
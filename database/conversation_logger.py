@@ -0,0 +1,360 @@
+"""
+Journalisation asynchrone (write-behind) des conversations
+"""
+import asyncio
+import atexit
+import queue
+import threading
+import time
+import config
+from database.models import ConversationModel
+from database.storage import get_storage
+from monitoring.metrics import metrics
+
+def _save_conversations(conversations):
+    """Écrivain par défaut : backend de stockage configuré"""
+    return get_storage().save_conversations(conversations)
+
+class ConversationLogger:
+    """File bornée de conversations écrites par lots en arrière-plan
+
+    `log()` ne fait qu'empiler le document : un thread dédié le regroupe avec
+    les suivants et les écrit via `insert_many` dès que le lot atteint
+    `batch_size` ou que `flush_interval` secondes se sont écoulées. La latence
+    du chat ne dépend donc plus de la disponibilité de MongoDB. Un lot en
+    échec est réessayé `max_retries` fois, avec un délai doublé à chaque
+    essai, avant d'être abandonné (sauf pendant `close()`).
+    """
+
+    OVERFLOW_POLICIES = ("drop", "block")
+
+    def __init__(self, max_queue_size=None, batch_size=None, flush_interval=None,
+                 overflow_policy=None, block_timeout=None, writer=None,
+                 max_retries=None, retry_delay=None):
+        self.max_queue_size = max_queue_size or config.CONVERSATION_LOG_QUEUE_SIZE
+        self.batch_size = batch_size or config.CONVERSATION_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or config.CONVERSATION_LOG_FLUSH_SECONDS
+        self.overflow_policy = overflow_policy or config.CONVERSATION_LOG_OVERFLOW
+        self.block_timeout = (
+            config.CONVERSATION_LOG_BLOCK_TIMEOUT if block_timeout is None else block_timeout
+        )
+        self.max_retries = config.CONVERSATION_LOG_RETRIES if max_retries is None else max_retries
+        self.retry_delay = config.CONVERSATION_LOG_RETRY_SECONDS if retry_delay is None else retry_delay
+        if self.overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Politique de débordement inconnue: {self.overflow_policy} "
+                f"(attendu: {', '.join(self.OVERFLOW_POLICIES)})"
+            )
+        self.writer = writer or _save_conversations
+
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._flush_requested = threading.Event()
+        self._stop_requested = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.last_flush_duration = 0.0
+
+    def start(self):
+        """Démarre le thread d'écriture (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_requested.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="conversation-logger", daemon=True
+            )
+            self._thread.start()
+
+    def log(self, user_message, bot_response, intent, confidence):
+        """Met une conversation en file d'écriture
+
+        Retourne False si la conversation a été abandonnée (file pleine).
+        """
+        self.start()
+        conversation = ConversationModel.build_conversation(
+            user_message, bot_response, intent, confidence
+        )
+        try:
+            if self.overflow_policy == "block":
+                self._queue.put(conversation, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(conversation)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            timeout = max(deadline - time.monotonic(), 0)
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            stopping = self._stop_requested.is_set()
+            if (
+                len(batch) >= self.batch_size
+                or time.monotonic() >= deadline
+                or self._flush_requested.is_set()
+                or stopping
+            ):
+                # Vider ce qui est déjà en file avant d'écrire
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    self._write(batch)
+                    batch = []
+
+                if self._queue.empty():
+                    self._flush_requested.clear()
+                    if stopping:
+                        return
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = self.writer(batch)
+            except Exception as e:
+                print(f"⚠️ Écriture des conversations impossible: {e}")
+                result = None
+            if result is not None or attempt == self.max_retries or self._stop_requested.is_set():
+                break
+            with self._lock:
+                self.retries += 1
+            # Attente interrompue par close() : un dernier essai, puis abandon
+            self._stop_requested.wait(delay)
+            delay *= 2
+
+        with self._lock:
+            self.batches += 1
+            if result is None:
+                self.failed += len(batch)
+            else:
+                self.written += len(batch)
+            self.last_flush_duration = time.perf_counter() - start
+
+        for _ in batch:
+            self._queue.task_done()
+
+    def flush(self):
+        """Force l'écriture immédiate des conversations en attente et attend sa fin"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._flush_requested.set()
+        self._queue.join()
+
+    def close(self):
+        """Écrit les conversations restantes et arrête le thread"""
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+        self._stop_requested.set()
+        thread.join()
+        with self._lock:
+            self._thread = None
+
+    def metrics(self):
+        """Métriques de la file d'écriture"""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self.max_queue_size,
+                "overflow_policy": self.overflow_policy,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "retries": self.retries,
+                "batches": self.batches,
+                "last_flush_duration": self.last_flush_duration
+            }
+
+async def _save_conversations_async(conversations):
+    """Écrivain asynchrone par défaut : client MongoDB asynchrone"""
+    from database.async_models import AsyncConversationModel
+    return await AsyncConversationModel.save_conversations(conversations)
+
+class AsyncConversationLogger:
+    """Équivalent de `ConversationLogger` pour la boucle d'événements
+
+    Les conversations passent par une `asyncio.Queue` bornée, vidée par une
+    tâche unique qui les écrit par lots (`batch_size` atteint ou toutes les
+    `flush_interval` secondes) ; une seule écriture est en cours à la fois.
+    La politique de débordement est celle de la file synchrone : "drop"
+    abandonne la conversation, "block" fait attendre l'appelant au plus
+    `block_timeout` secondes. Les lots en échec sont réessayés de la même
+    façon.
+    """
+
+    def __init__(self, max_queue_size=None, batch_size=None, flush_interval=None,
+                 overflow_policy=None, block_timeout=None, writer=None,
+                 max_retries=None, retry_delay=None):
+        self.max_queue_size = max_queue_size or config.CONVERSATION_LOG_QUEUE_SIZE
+        self.batch_size = batch_size or config.CONVERSATION_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or config.CONVERSATION_LOG_FLUSH_SECONDS
+        self.overflow_policy = overflow_policy or config.CONVERSATION_LOG_OVERFLOW
+        self.block_timeout = (
+            config.CONVERSATION_LOG_BLOCK_TIMEOUT if block_timeout is None else block_timeout
+        )
+        self.max_retries = config.CONVERSATION_LOG_RETRIES if max_retries is None else max_retries
+        self.retry_delay = config.CONVERSATION_LOG_RETRY_SECONDS if retry_delay is None else retry_delay
+        if self.overflow_policy not in ConversationLogger.OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Politique de débordement inconnue: {self.overflow_policy} "
+                f"(attendu: {', '.join(ConversationLogger.OVERFLOW_POLICIES)})"
+            )
+        self.writer = writer or _save_conversations_async
+
+        # File, signal et tâche liés à la boucle d'événements courante
+        self._loop = None
+        self._queue = None
+        self._ready = None
+        self._task = None
+        self._stopping = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.last_flush_duration = 0.0
+
+    def start(self):
+        """Démarre la tâche d'écriture dans la boucle courante (idempotent)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._ready = asyncio.Event()
+            self._task = None
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = loop.create_task(self._run())
+
+    async def log(self, user_message, bot_response, intent, confidence):
+        """Met une conversation en file d'écriture
+
+        Retourne False si la conversation a été abandonnée (file pleine).
+        """
+        self.start()
+        conversation = ConversationModel.build_conversation(
+            user_message, bot_response, intent, confidence
+        )
+        try:
+            if self.overflow_policy == "block":
+                await asyncio.wait_for(self._queue.put(conversation), self.block_timeout)
+            else:
+                self._queue.put_nowait(conversation)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            self.dropped += 1
+            return False
+
+        self.enqueued += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._ready.set()
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._ready.clear()
+            while not self._queue.empty():
+                batch = [
+                    self._queue.get_nowait()
+                    for _ in range(min(self.batch_size, self._queue.qsize()))
+                ]
+                await self._write(batch)
+            if self._stopping:
+                return
+
+    async def _write(self, batch):
+        start = time.perf_counter()
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = await self.writer(batch)
+            except Exception as e:
+                print(f"⚠️ Écriture des conversations impossible: {e}")
+                result = None
+            if result is not None or attempt == self.max_retries or self._stopping:
+                break
+            self.retries += 1
+            await asyncio.sleep(delay)
+            delay *= 2
+
+        self.batches += 1
+        if result is None:
+            self.failed += len(batch)
+        else:
+            self.written += len(batch)
+        self.last_flush_duration = time.perf_counter() - start
+
+        for _ in batch:
+            self._queue.task_done()
+
+    async def flush(self):
+        """Force l'écriture immédiate des conversations en attente et attend sa fin"""
+        if self._task is None or self._task.done() or self._loop is not asyncio.get_running_loop():
+            return
+        self._ready.set()
+        await self._queue.join()
+
+    async def close(self):
+        """Écrit les conversations restantes et arrête la tâche"""
+        if self._task is None or self._task.done() or self._loop is not asyncio.get_running_loop():
+            return
+        self._stopping = True
+        self._ready.set()
+        await self._task
+        self._task = None
+
+    def metrics(self):
+        """Métriques de la file d'écriture"""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_capacity": self.max_queue_size,
+            "overflow_policy": self.overflow_policy,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retries": self.retries,
+            "batches": self.batches,
+            "last_flush_duration": self.last_flush_duration
+        }
+
+# Instance globale (le thread démarre au premier appel à log())
+conversation_logger = ConversationLogger()
+atexit.register(conversation_logger.close)
+metrics.register_collector("conversation_logger", conversation_logger.metrics)
+
+# Instance globale du chemin asynchrone (la tâche démarre au premier appel à log())
+async_conversation_logger = AsyncConversationLogger()
+metrics.register_collector("conversation_logger_async", async_conversation_logger.metrics)
@@ -1,15 +1,144 @@
 """
 Modèles de données MongoDB
 """
-from datetime import datetime
-from database.mongodb_connection import mongodb
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, TEXT, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+from database.catalog_sync import content_hash
+from database.mongodb_connection import is_connection_error, mongodb
+from monitoring.metrics import metrics
+import config
+
+# Index existant avec d'autres options (IndexOptionsConflict, IndexKeySpecsConflict)
+INDEX_CONFLICT_CODES = (85, 86)
+
+DUPLICATE_KEY_ERROR = 11000
+
+def is_duplicate_only(error):
+    """Vrai pour une écriture par lots dont toutes les erreurs sont des doublons de clé
+    (nouvel essai d'un lot déjà partiellement écrit : les `_id` sont conservés)"""
+    if not isinstance(error, BulkWriteError) or error.details.get("writeConcernErrors"):
+        return False
+    errors = error.details.get("writeErrors", [])
+    return bool(errors) and all(item.get("code") == DUPLICATE_KEY_ERROR for item in errors)
+
+def backfill_keys(collection, key_field, key_fn, batch_size=1000):
+    """Attribue la clé `key_field` aux documents qui n'en ont pas (données antérieures)
+    
+    Un document dont la clé dérivée est déjà prise reste sans clé (doublon).
+    Retourne (documents complétés, doublons).
+    """
+    if collection.find_one({key_field: {"$exists": False}}, {"_id": 1}) is None:
+        return 0, 0
+    taken = {
+        document[key_field]
+        for document in collection.find({key_field: {"$exists": True}}, {key_field: 1, "_id": 0})
+    }
+    backfilled = duplicates = 0
+    operations = []
+    for document in collection.find({key_field: {"$exists": False}}):
+        key = key_fn(document)
+        if key in taken:
+            duplicates += 1
+            continue
+        taken.add(key)
+        operations.append(UpdateOne({"_id": document["_id"]}, {"$set": {key_field: key}}))
+        if len(operations) >= batch_size:
+            collection.bulk_write(operations, ordered=False)
+            backfilled += len(operations)
+            operations = []
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+        backfilled += len(operations)
+    if backfilled:
+        print(f"🔑 {collection.name} : {backfilled} documents complétés ({key_field})"
+              + (f", {duplicates} doublons laissés sans clé" if duplicates else ""))
+    return backfilled, duplicates
+
+def create_key_index(collection, key_field):
+    """Index unique sur la clé, limité aux documents qui la possèdent
+    
+    Un index déjà créé avec d'autres options est conservé.
+    """
+    try:
+        collection.create_index(
+            [(key_field, ASCENDING)], unique=True, name=key_field,
+            partialFilterExpression={key_field: {"$exists": True}}
+        )
+    except OperationFailure as e:
+        if e.code not in INDEX_CONFLICT_CODES:
+            raise
 
 class ProductModel:
     """Modèle pour les produits"""
     
+    COLLECTION_NAME = "products"
+    
+    # Version du catalogue, incrémentée à chaque écriture (invalidation des caches)
+    version = 0
+    
     @staticmethod
     def get_collection():
-        return mongodb.get_collection("products")
+        return mongodb.get_collection(ProductModel.COLLECTION_NAME)
+    
+    @staticmethod
+    def product_id(product_data):
+        """Identifiant stable d'un produit (fourni, ou dérivé du nom, de la catégorie et du genre)"""
+        if product_data.get("product_id"):
+            return str(product_data["product_id"])
+        key = "|".join(
+            str(product_data.get(field, "")).strip().lower()
+            for field in ("name", "category", "gender")
+        )
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    
+    @staticmethod
+    def ensure_indexes(collection=None):
+        """Crée les index utilisés par la recherche de produits"""
+        collection = collection if collection is not None else ProductModel.get_collection()
+        # Documents chargés sans product_id : clé calculée avant l'index unique
+        backfill_keys(collection, "product_id", ProductModel.product_id)
+        create_key_index(collection, "product_id")
+        collection.create_index([("category", ASCENDING)], name="category")
+        collection.create_index([("gender", ASCENDING)], name="gender")
+        collection.create_index([("price", ASCENDING)], name="price")
+        collection.create_index(
+            [("name", TEXT), ("description", TEXT)],
+            name="text_search",
+            default_language="french"
+        )
+    
+    @staticmethod
+    def bulk_upsert(products, collection=None):
+        """Insère ou met à jour un lot de produits (clé : product_id) en une requête"""
+        if not products:
+            return None
+        collection = collection if collection is not None else ProductModel.get_collection()
+        now = datetime.now()
+        operations = []
+        for product in products:
+            document = dict(product)
+            document.pop("_id", None)
+            document.pop("created_at", None)
+            document["product_id"] = ProductModel.product_id(product)
+            document["content_hash"] = content_hash(document, "product_id")
+            operations.append(UpdateOne(
+                {"product_id": document["product_id"]},
+                {"$set": document, "$setOnInsert": {"created_at": now}},
+                upsert=True
+            ))
+        result = collection.bulk_write(operations, ordered=False)
+        ProductModel.bump_version()
+        return result
+    
+    @staticmethod
+    def bump_version():
+        """Signale une modification du catalogue"""
+        ProductModel.version += 1
     
     @staticmethod
     def insert_product(product_data):
@@ -17,12 +146,17 @@ class ProductModel:
         try:
             collection = ProductModel.get_collection()
             product_data["created_at"] = datetime.now()
-            return collection.insert_one(product_data)
+            product_data["product_id"] = ProductModel.product_id(product_data)
+            result = collection.insert_one(product_data)
+            ProductModel.bump_version()
+            return result
         except Exception as e:
+            mongodb.record_error(e)
             print(f"⚠️ Impossible d'insérer le produit: {e}")
             return None
     
     @staticmethod
+    @metrics.timed("db_search_products_seconds", "Durée d'une recherche de produits MongoDB")
     def search_products(query, category=None, gender=None, limit=10):
         """Recherche de produits"""
         try:
@@ -41,15 +175,24 @@ class ProductModel:
             
             return list(collection.find(search_filter).limit(limit))
         except Exception as e:
+            mongodb.record_error(e)
             print(f"⚠️ Impossible de rechercher les produits: {e}")
             return []
     
+    @staticmethod
+    def find_all_products():
+        """Récupère tous les produits (lève une exception en cas d'échec)"""
+        try:
+            return list(ProductModel.get_collection().find({}))
+        except Exception as e:
+            mongodb.record_error(e)
+            raise
+    
     @staticmethod
     def get_all_products():
         """Récupère tous les produits"""
         try:
-            collection = ProductModel.get_collection()
-            return list(collection.find({}))
+            return ProductModel.find_all_products()
         except Exception as e:
             print(f"⚠️ Impossible de récupérer les produits: {e}")
             return []
@@ -63,58 +206,354 @@ class ConversationModel:
         return mongodb.get_collection(config.COLLECTION_NAME)
     
     @staticmethod
+    def build_conversation(user_message, bot_response, intent, confidence, timestamp=None):
+        """Construit le document d'une conversation"""
+        return {
+            "user_message": user_message,
+            "bot_response": bot_response,
+            "intent": intent,
+            "confidence": confidence,
+            "timestamp": timestamp or datetime.now()
+        }
+    
+    @staticmethod
+    @metrics.timed("save_conversation_seconds", "Durée d'écriture d'une conversation")
     def save_conversation(user_message, bot_response, intent, confidence):
         """Sauvegarde une conversation"""
         try:
             collection = ConversationModel.get_collection()
-            conversation = {
-                "user_message": user_message,
-                "bot_response": bot_response,
-                "intent": intent,
-                "confidence": confidence,
-                "timestamp": datetime.now()
-            }
-            return collection.insert_one(conversation)
+            conversation = ConversationModel.build_conversation(
+                user_message, bot_response, intent, confidence
+            )
+            result = collection.insert_one(conversation)
         except Exception as e:
+            mongodb.record_error(e)
             print(f"⚠️ Impossible de sauvegarder la conversation: {e}")
             return None
+        ConversationRollupModel.record_safely([conversation])
+        return result
     
     @staticmethod
-    def get_conversation_stats():
-        """Récupère les statistiques des conversations"""
+    @metrics.timed("save_conversations_seconds", "Durée d'écriture d'un lot de conversations")
+    def save_conversations(conversations):
+        """Sauvegarde un lot de conversations en une seule requête"""
+        if not conversations:
+            return None
         try:
             collection = ConversationModel.get_collection()
-            total = collection.count_documents({})
-            
-            # Statistiques par intention
-            pipeline = [
-                {"$group": {"_id": "$intent", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}}
-            ]
-            intent_stats = list(collection.aggregate(pipeline))
-            
-            # Conversations récentes
-            recent = list(collection.find().sort("timestamp", -1).limit(10))
-            
-            return {
-                "total_conversations": total,
-                "intent_distribution": intent_stats,
-                "recent_conversations": recent
-            }
+            result = collection.insert_many(conversations, ordered=False)
         except Exception as e:
+            if is_duplicate_only(e):
+                # Lot déjà écrit lors d'un essai précédent
+                ConversationRollupModel.record_safely(conversations)
+                return e.details
+            mongodb.record_error(e)
+            print(f"⚠️ Impossible de sauvegarder {len(conversations)} conversations: {e}")
+            return None
+        ConversationRollupModel.record_safely(conversations)
+        return result
+    
+    @staticmethod
+    def iter_labeled_messages(min_confidence=0.0, batch_size=1000):
+        """Parcourt les messages journalisés avec leur intention prédite (curseur, en flux)
+        
+        Les réponses de repli ("unknown", "error") sont exclues.
+        """
+        collection = ConversationModel.get_collection()
+        cursor = collection.find(
+            {
+                "confidence": {"$gte": min_confidence},
+                "intent": {"$nin": ["unknown", "error"]}
+            },
+            {"user_message": 1, "intent": 1, "_id": 0}
+        ).batch_size(batch_size)
+        for conversation in cursor:
+            if conversation.get("user_message") and conversation.get("intent"):
+                yield conversation["user_message"], conversation["intent"]
+    
+    @staticmethod
+    def get_recent_conversations(limit=10):
+        """Dernières conversations (index sur timestamp)"""
+        collection = ConversationModel.get_collection()
+        return list(collection.find().sort("timestamp", -1).limit(limit))
+    
+    @staticmethod
+    def get_conversation_stats(days=None, recent_limit=10):
+        """Récupère les statistiques des conversations
+        
+        Les totaux viennent des agrégats journaliers (`ConversationRollupModel`) :
+        le coût dépend du nombre de jours et d'intentions, pas de l'historique.
+        """
+        try:
+            stats = ConversationRollupModel.get_summary(days=days)
+            stats["recent_conversations"] = ConversationModel.get_recent_conversations(recent_limit)
+            return stats
+        except Exception as e:
+            mongodb.record_error(e)
             print(f"⚠️ Impossible de récupérer les statistiques: {e}")
             return {
                 "total_conversations": 0,
+                "average_confidence": 0.0,
+                "low_confidence_conversations": 0,
+                "today_conversations": 0,
                 "intent_distribution": [],
+                "daily": [],
                 "recent_conversations": []
             }
 
+class ConversationRollupModel:
+    """Agrégats des conversations par heure et par jour, pour chaque intention
+    
+    Chaque document (`_id` : {bucket, intent}) contient le nombre de
+    conversations, la somme des confiances et le nombre de prédictions peu
+    confiantes (< `config.LOW_CONFIDENCE_THRESHOLD`). Les agrégats sont
+    incrémentés à chaque écriture de conversations (un `bulk_write` par lot)
+    et peuvent être recalculés depuis l'historique par `refresh()`
+    (agrégation + `$merge`), qui corrige aussi les écritures manquées.
+    """
+    
+    GRANULARITIES = ("hour", "day")
+    
+    @staticmethod
+    def get_collection(granularity):
+        if granularity == "hour":
+            return mongodb.get_collection(config.ROLLUP_HOURLY_COLLECTION)
+        if granularity == "day":
+            return mongodb.get_collection(config.ROLLUP_DAILY_COLLECTION)
+        raise ValueError(f"Granularité inconnue: {granularity}")
+    
+    @staticmethod
+    def ensure_indexes():
+        """Index de lecture par période"""
+        for granularity in ConversationRollupModel.GRANULARITIES:
+            ConversationRollupModel.get_collection(granularity).create_index(
+                [("bucket", ASCENDING)], name="bucket"
+            )
+    
+    @staticmethod
+    def bucket_start(timestamp, granularity):
+        """Début de la période (heure ou jour) contenant `timestamp`"""
+        if granularity == "hour":
+            return timestamp.replace(minute=0, second=0, microsecond=0)
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    @staticmethod
+    def record(conversations):
+        """Incrémente les agrégats d'un lot de conversations (une requête par granularité)"""
+        for granularity, operations in ConversationRollupModel.rollup_operations(conversations).items():
+            ConversationRollupModel.get_collection(granularity).bulk_write(operations, ordered=False)
+    
+    @staticmethod
+    def rollup_operations(conversations):
+        """Mises à jour des agrégats pour un lot de conversations : {granularité: [UpdateOne]}"""
+        threshold = config.LOW_CONFIDENCE_THRESHOLD
+        operations_by_granularity = {}
+        for granularity in ConversationRollupModel.GRANULARITIES:
+            increments = {}
+            for conversation in conversations:
+                timestamp = conversation.get("timestamp")
+                if not isinstance(timestamp, datetime):
+                    continue
+                key = (ConversationRollupModel.bucket_start(timestamp, granularity),
+                       conversation.get("intent"))
+                confidence = float(conversation.get("confidence") or 0.0)
+                totals = increments.setdefault(key, [0, 0.0, 0])
+                totals[0] += 1
+                totals[1] += confidence
+                totals[2] += confidence < threshold
+            if not increments:
+                continue
+            operations_by_granularity[granularity] = [
+                UpdateOne(
+                    {"_id": {"bucket": bucket, "intent": intent}},
+                    {
+                        "$inc": {"count": count, "confidence_sum": confidence_sum,
+                                 "low_confidence": low_confidence},
+                        "$setOnInsert": {"bucket": bucket, "intent": intent}
+                    },
+                    upsert=True
+                )
+                for (bucket, intent), (count, confidence_sum, low_confidence) in increments.items()
+            ]
+        return operations_by_granularity
+    
+    @staticmethod
+    def record_safely(conversations):
+        """`record` sans propager les erreurs (rattrapées par `refresh`)"""
+        if not config.ROLLUPS_ON_WRITE:
+            return
+        try:
+            ConversationRollupModel.record(conversations)
+        except Exception as e:
+            mongodb.record_error(e)
+            print(f"⚠️ Impossible de mettre à jour les agrégats: {e}")
+    
+    @staticmethod
+    def refresh_watermark(now=None):
+        """Fin de la période recalculable : début de l'heure contenant
+        `now - ROLLUP_REFRESH_DELAY_SECONDS` (les heures suivantes reçoivent
+        encore des écritures)"""
+        now = now or datetime.now()
+        return ConversationRollupModel.bucket_start(
+            now - timedelta(seconds=config.ROLLUP_REFRESH_DELAY_SECONDS), "hour"
+        )
+    
+    @staticmethod
+    def refresh(since=None, until=None):
+        """Recalcule les agrégats des périodes closes depuis `since` (tout l'historique si None)
+        
+        Les conversations sont regroupées par heure et par intention côté
+        serveur puis fusionnées (`$merge`, remplacement des périodes
+        recalculées) ; les agrégats journaliers sont déduits des horaires.
+        `since` est ramené au début de son jour pour ne jamais recalculer un
+        jour partiellement.
+        
+        Seules les périodes antérieures à `until` (par défaut
+        `refresh_watermark()`) sont recalculées : heures avant `until`, jours
+        avant le jour de `until`. Les périodes encore ouvertes restent tenues
+        par les incréments des écritures ; les remplacer pendant qu'elles
+        reçoivent des conversations compterait deux fois (ou perdrait) les
+        écritures concurrentes.
+        """
+        until = ConversationRollupModel.bucket_start(
+            until or ConversationRollupModel.refresh_watermark(), "hour"
+        )
+        daily_until = ConversationRollupModel.bucket_start(until, "day")
+        timestamp_filter = {"$type": "date", "$lt": until}
+        hourly_filter = {"bucket": {"$lt": daily_until}}
+        if since is not None:
+            since = ConversationRollupModel.bucket_start(since, "day")
+            timestamp_filter["$gte"] = since
+            hourly_filter["bucket"]["$gte"] = since
+        
+        hourly_pipeline = [
+            {"$match": {"timestamp": timestamp_filter}},
+            {"$group": {
+                "_id": {
+                    "bucket": {"$dateFromParts": {
+                        "year": {"$year": "$timestamp"},
+                        "month": {"$month": "$timestamp"},
+                        "day": {"$dayOfMonth": "$timestamp"},
+                        "hour": {"$hour": "$timestamp"}
+                    }},
+                    "intent": "$intent"
+                },
+                "count": {"$sum": 1},
+                "confidence_sum": {"$sum": {"$ifNull": ["$confidence", 0]}},
+                "low_confidence": {"$sum": {"$cond": [
+                    {"$lt": [{"$ifNull": ["$confidence", 0]}, config.LOW_CONFIDENCE_THRESHOLD]}, 1, 0
+                ]}}
+            }},
+            {"$addFields": {"bucket": "$_id.bucket", "intent": "$_id.intent"}},
+            {"$merge": {"into": config.ROLLUP_HOURLY_COLLECTION, "on": "_id",
+                        "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]
+        ConversationModel.get_collection().aggregate(hourly_pipeline)
+        
+        daily_pipeline = [
+            {"$match": hourly_filter},
+            {"$group": {
+                "_id": {
+                    "bucket": {"$dateFromParts": {
+                        "year": {"$year": "$bucket"},
+                        "month": {"$month": "$bucket"},
+                        "day": {"$dayOfMonth": "$bucket"}
+                    }},
+                    "intent": "$intent"
+                },
+                "count": {"$sum": "$count"},
+                "confidence_sum": {"$sum": "$confidence_sum"},
+                "low_confidence": {"$sum": "$low_confidence"}
+            }},
+            {"$addFields": {"bucket": "$_id.bucket", "intent": "$_id.intent"}},
+            {"$merge": {"into": config.ROLLUP_DAILY_COLLECTION, "on": "_id",
+                        "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]
+        ConversationRollupModel.get_collection("hour").aggregate(daily_pipeline)
+    
+    @staticmethod
+    def get_buckets(granularity="day", since=None):
+        """Agrégats d'une granularité, par période croissante"""
+        bucket_filter = {"bucket": {"$gte": since}} if since is not None else {}
+        cursor = ConversationRollupModel.get_collection(granularity).find(bucket_filter)
+        return list(cursor.sort("bucket", ASCENDING))
+    
+    @staticmethod
+    def summary_since(days=None):
+        """Début de la période couverte par les statistiques (None : tout l'historique)"""
+        today = ConversationRollupModel.bucket_start(datetime.now(), "day")
+        return today - timedelta(days=days - 1) if days else None
+    
+    @staticmethod
+    def get_summary(days=None):
+        """Statistiques du dashboard calculées à partir des agrégats journaliers"""
+        since = ConversationRollupModel.summary_since(days)
+        return ConversationRollupModel.summarize(ConversationRollupModel.get_buckets("day", since))
+    
+    @staticmethod
+    def summarize(daily_rollups):
+        """Totaux, confiance moyenne, jour courant et répartition par intention"""
+        today = ConversationRollupModel.bucket_start(datetime.now(), "day")
+        total = 0
+        confidence_sum = 0.0
+        low_confidence = 0
+        today_count = 0
+        by_intent = {}
+        by_day = {}
+        for rollup in daily_rollups:
+            count = rollup.get("count", 0)
+            total += count
+            confidence_sum += rollup.get("confidence_sum", 0.0)
+            low_confidence += rollup.get("low_confidence", 0)
+            if rollup["bucket"] == today:
+                today_count += count
+            by_intent[rollup.get("intent")] = by_intent.get(rollup.get("intent"), 0) + count
+            by_day[rollup["bucket"]] = by_day.get(rollup["bucket"], 0) + count
+        
+        return {
+            "total_conversations": total,
+            "average_confidence": confidence_sum / total if total else 0.0,
+            "low_confidence_conversations": low_confidence,
+            "today_conversations": today_count,
+            "intent_distribution": [
+                {"_id": intent, "count": count}
+                for intent, count in sorted(by_intent.items(), key=lambda item: -item[1])
+            ],
+            "daily": [{"date": day, "count": count} for day, count in by_day.items()]
+        }
+
 class FAQModel:
     """Modèle pour la FAQ"""
     
+    # Compteur de versions, incrémenté à chaque écriture (invalidation du cache)
+    version = 0
+    
+    COLLECTION_NAME = "faq"
+    
     @staticmethod
     def get_collection():
-        return mongodb.get_collection("faq")
+        return mongodb.get_collection(FAQModel.COLLECTION_NAME)
+    
+    @staticmethod
+    def faq_id(faq_data):
+        """Identifiant stable d'une entrée FAQ (intention + question)"""
+        if faq_data.get("faq_id"):
+            return str(faq_data["faq_id"])
+        key = f"{faq_data.get('intent', '')}|{str(faq_data.get('question', '')).strip().lower()}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    
+    @staticmethod
+    def ensure_indexes(collection=None):
+        """Crée les index de la FAQ"""
+        collection = collection if collection is not None else FAQModel.get_collection()
+        backfill_keys(collection, "faq_id", FAQModel.faq_id)
+        create_key_index(collection, "faq_id")
+        collection.create_index([("intent", ASCENDING)], name="intent")
+    
+    @staticmethod
+    def bump_version():
+        """Signale une modification de la FAQ"""
+        FAQModel.version += 1
     
     @staticmethod
     def insert_faq(faq_data):
@@ -122,17 +561,29 @@ class FAQModel:
         try:
             collection = FAQModel.get_collection()
             faq_data["created_at"] = datetime.now()
-            return collection.insert_one(faq_data)
+            faq_data["faq_id"] = FAQModel.faq_id(faq_data)
+            result = collection.insert_one(faq_data)
+            FAQModel.bump_version()
+            return result
         except Exception as e:
+            mongodb.record_error(e)
             print(f"⚠️ Impossible d'insérer la FAQ: {e}")
             return None
     
+    @staticmethod
+    def find_faq_by_intent(intent):
+        """Récupère la FAQ par intention (None : aucune FAQ ; lève une exception en cas d'échec)"""
+        try:
+            return FAQModel.get_collection().find_one({"intent": intent})
+        except Exception as e:
+            mongodb.record_error(e)
+            raise
+    
     @staticmethod
     def get_faq_by_intent(intent):
         """Récupère la FAQ par intention"""
         try:
-            collection = FAQModel.get_collection()
-            return collection.find_one({"intent": intent})
+            return FAQModel.find_faq_by_intent(intent)
         except Exception as e:
             print(f"⚠️ Impossible de récupérer la FAQ: {e}")
             return None
@@ -144,6 +595,199 @@ class FAQModel:
             collection = FAQModel.get_collection()
             return list(collection.find({}))
         except Exception as e:
+            mongodb.record_error(e)
             print(f"⚠️ Impossible de récupérer les FAQ: {e}")
             return []
 
+
+class FAQCache:
+    """Cache en mémoire des entrées FAQ (TTL + éviction LRU)
+
+    Les entrées sont préchargées en une seule requête ; les intentions sans
+    FAQ sont aussi mémorisées pour ne pas réinterroger MongoDB. Le cache est
+    vidé lorsque `FAQModel.version` change (écritures du processus courant),
+    ou sur notification d'un change stream si `watch_changes()` est actif
+    (écritures de tout processus).
+    """
+    
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or config.FAQ_CACHE_MAX_ENTRIES
+        self.ttl = config.FAQ_CACHE_TTL_SECONDS if ttl is None else ttl
+        self._entries = OrderedDict()   # intention -> (faq, expiration)
+        self._lock = threading.Lock()
+        self._version = FAQModel.version
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self.preloaded = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_hits = 0
+    
+    def _store(self, intent, faq):
+        self._entries[intent] = (faq, time.monotonic() + self.ttl if self.ttl else None)
+        self._entries.move_to_end(intent)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def _check_version(self):
+        if self._version != FAQModel.version:
+            self._entries.clear()
+            self._version = FAQModel.version
+            self.invalidations += 1
+    
+    def preload(self):
+        """Charge toutes les entrées FAQ en une seule requête"""
+        from database.storage import get_storage
+        faq_items = get_storage().get_all_faq()
+        with self._lock:
+            self._check_version()
+            for faq in faq_items:
+                if faq.get("intent") and faq["intent"] not in self._entries:
+                    self._store(faq["intent"], faq)
+            self.preloaded = True
+        return len(faq_items)
+    
+    def get(self, intent):
+        """Récupère la FAQ d'une intention (MongoDB uniquement en cas d'absence)
+        
+        Si MongoDB est indisponible (disjoncteur ouvert) ou si la requête
+        échoue, une entrée expirée est servie telle quelle et rien n'est
+        mémorisé : seule une absence confirmée est mise en cache.
+        """
+        from database.storage import get_storage
+        storage = get_storage()
+        found, faq, entry = self._lookup(intent, storage)
+        if found:
+            return faq
+        try:
+            faq = storage.find_faq_by_intent(intent)
+        except Exception as e:
+            print(f"⚠️ Impossible de récupérer la FAQ: {e}")
+            return self._stale(entry)
+        return self._remember(intent, faq)
+    
+    async def get_async(self, intent):
+        """Variante asynchrone de `get` (requête via `AsyncFAQModel` en cas d'absence)"""
+        from database.storage import get_storage
+        if get_storage().name != "mongodb":
+            # Base embarquée : lecture locale, sans client asynchrone
+            return self.get(intent)
+        from database.async_models import AsyncFAQModel, async_mongodb
+        found, faq, entry = self._lookup(intent, async_mongodb)
+        if found:
+            return faq
+        try:
+            faq = await AsyncFAQModel.find_faq_by_intent(intent)
+        except Exception as e:
+            print(f"⚠️ Impossible de récupérer la FAQ: {e}")
+            return self._stale(entry)
+        return self._remember(intent, faq)
+    
+    def _lookup(self, intent, connection):
+        """(trouvée, FAQ, entrée expirée éventuelle)"""
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(intent)
+            if entry is not None:
+                faq, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(intent)
+                    self.hits += 1
+                    return True, faq, None
+                if connection.breaker.is_open:
+                    self.stale_hits += 1
+                    return True, faq, None
+            self.misses += 1
+            return False, None, entry
+    
+    def _remember(self, intent, faq):
+        with self._lock:
+            self._store(intent, faq)
+        return faq
+    
+    def _stale(self, entry):
+        """Échec de la requête : l'éventuelle entrée expirée, sans rien mémoriser"""
+        with self._lock:
+            self.stale_hits += entry is not None
+        return entry[0] if entry is not None else None
+    
+    def invalidate(self, intent=None):
+        """Invalide une intention, ou tout le cache"""
+        with self._lock:
+            if intent is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(intent, None)
+            self.invalidations += 1
+    
+    def watch_changes(self):
+        """Invalide le cache sur les changements de la collection (change stream)
+        
+        Seul moyen de voir les écritures d'un autre processus (scripts
+        d'initialisation, autre worker) avant l'expiration du TTL : le
+        compteur `FAQModel.version` est propre au processus. Après une
+        erreur de connexion, le flux est rouvert avec un délai croissant
+        (plafonné à `MONGODB_BREAKER_RESET_SECONDS`) et tout le cache est
+        invalidé, les changements intervenus entre-temps étant perdus.
+        Nécessite un replica set MongoDB ; sans lui, seule l'invalidation par
+        version et le TTL s'appliquent.
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+        
+        def _watch():
+            delay = 1.0
+            interrupted = False
+            while not self._stop_watching.is_set():
+                try:
+                    with FAQModel.get_collection().watch(max_await_time_ms=1000) as stream:
+                        if interrupted:
+                            self.invalidate()
+                            interrupted, delay = False, 1.0
+                        while not self._stop_watching.is_set() and stream.alive:
+                            change = stream.try_next()
+                            if change is None:
+                                continue
+                            intent = (change.get("fullDocument") or {}).get("intent")
+                            self.invalidate(intent if change.get("operationType") == "insert" else None)
+                except Exception as e:
+                    if not is_connection_error(e):
+                        print(f"⚠️ Change stream FAQ indisponible: {e}")
+                        return
+                    delay = min(delay, config.MONGODB_BREAKER_RESET_SECONDS)
+                    print(f"⚠️ Change stream FAQ interrompu, reprise dans {delay:g} s: {e}")
+                    interrupted = True
+                    self._stop_watching.wait(delay)
+                    delay *= 2
+        
+        self._watcher = threading.Thread(target=_watch, name="faq-cache-watcher", daemon=True)
+        self._watcher.start()
+    
+    def stop_watching(self):
+        """Arrête le change stream"""
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+    
+    def stats(self):
+        """Statistiques du cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_hits": self.stale_hits
+            }
+
+# Instance globale
+faq_cache = FAQCache()
+metrics.register_collector("faq_cache", faq_cache.stats)
@@ -1,48 +1,264 @@
 """
 Module de connexion MongoDB
+
+Le client est partagé (pool de connexions paramétrable). L'état de santé est
+mis en cache et rafraîchi par un thread de sonde en arrière-plan ; un
+disjoncteur (circuit breaker) coupe les tentatives de connexion après
+plusieurs échecs : tant qu'il est ouvert, `get_collection` échoue
+immédiatement au lieu de bloquer jusqu'au délai de sélection du serveur,
+et le chatbot se replie sur ses caches et ses réponses par défaut.
 """
-from pymongo import MongoClient
+import threading
+import time
+from pymongo import MongoClient, monitoring
 from pymongo.errors import ConnectionFailure
+from monitoring.metrics import metrics
 import config
 
+def is_connection_error(error):
+    """Vrai pour une erreur de connexion au serveur (sélection, réseau, délai),
+    et non une erreur propre à la requête"""
+    return isinstance(error, ConnectionFailure)
+
+class CircuitBreaker:
+    """Disjoncteur : fermé -> ouvert après `failure_threshold` échecs consécutifs
+
+    Une fois ouvert, les appels sont refusés pendant `reset_timeout`
+    secondes, puis un seul essai est autorisé (semi-ouvert) : un succès
+    referme le circuit, un échec le rouvre.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # Valeur numérique exportée dans les métriques
+    STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or config.MONGODB_BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = (
+            config.MONGODB_BREAKER_RESET_SECONDS if reset_timeout is None else reset_timeout
+        )
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Vrai si un appel peut être tenté"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self.state == self.OPEN
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "state_code": self.STATE_CODES[self.state],
+                "consecutive_failures": self.failures,
+                "trips": self.trips,
+                "rejected": self.rejected
+            }
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Compteurs du pool de connexions (événements CMAP de pymongo)"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checked_out = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.pool_clears = 0
+        self._lock = threading.Lock()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pool_checkouts": self.checkouts,
+                "pool_checkout_failures": self.checkout_failures,
+                "pool_checked_out": self.checked_out,
+                "pool_connections_open": self.connections_created - self.connections_closed,
+                "pool_clears": self.pool_clears
+            }
+
 class MongoDBConnection:
     """Gestionnaire de connexion MongoDB"""
-    
+
     def __init__(self):
         self.client = None
         self.db = None
         self._connected = False
-    
+        self.breaker = CircuitBreaker()
+        self.pool_listener = PoolMetricsListener()
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._probe_thread = None
+        self._probe_stop = threading.Event()
+
+    def _create_client(self):
+        return MongoClient(
+            config.MONGODB_URI,
+            maxPoolSize=config.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=config.MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=config.MONGODB_MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=config.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            serverSelectionTimeoutMS=config.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=config.MONGODB_CONNECT_TIMEOUT_MS,
+            event_listeners=[self.pool_listener]
+        )
+
+    def _ping(self):
+        """Ping du serveur ; met à jour l'état de santé et le disjoncteur"""
+        try:
+            self.client.admin.command('ping')
+        except Exception:
+            self._connected = False
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._last_check = time.monotonic()
+        self._connected = True
+        self.breaker.record_success()
+
     def connect(self):
-        """Établit la connexion à MongoDB"""
+        """Établit la connexion à MongoDB (échoue immédiatement si le disjoncteur est ouvert)
+
+        Une seule tentative (ping bloquant) à la fois : les appels concurrents
+        attendent son résultat au lieu de lancer leur propre ping.
+        """
         if self._connected and self.client:
             return True
-        
+        if not self.breaker.allow_request():
+            return False
+
+        if not self._lock.acquire(blocking=False):
+            # Tentative en cours dans un autre thread : on partage son résultat
+            with self._lock:
+                return self._connected and self.client is not None
+        try:
+            if self._connected and self.client:
+                return True
+            if self.breaker.is_open:
+                return False
+            return self._attempt_connection()
+        finally:
+            self._lock.release()
+
+    def _attempt_connection(self):
         try:
-            self.client = MongoClient(config.MONGODB_URI, serverSelectionTimeoutMS=5000)
-            self.db = self.client[config.DATABASE_NAME]
+            # Le client (et son pool) est conservé entre les tentatives
+            if self.client is None:
+                self.client = self._create_client()
+                self.db = self.client[config.DATABASE_NAME]
             # Test de connexion
-            self.client.admin.command('ping')
-            self._connected = True
+            self._ping()
             print(f"✅ Connexion MongoDB réussie: {config.DATABASE_NAME}")
+            self.start_health_probe()
             return True
         except ConnectionFailure as e:
-            self._connected = False
             print(f"⚠️ Erreur de connexion MongoDB: {e}")
             print(f"💡 Vérifiez que MongoDB est en cours d'exécution sur {config.MONGODB_URI}")
             print(f"💡 Vérifiez que la base de données '{config.DATABASE_NAME}' est accessible")
-            return False
         except Exception as e:
-            self._connected = False
             print(f"⚠️ Erreur de connexion MongoDB: {e}")
             print(f"💡 URI MongoDB: {config.MONGODB_URI}")
             print(f"💡 Base de données: {config.DATABASE_NAME}")
-            return False
-    
+        if self.breaker.is_open:
+            print(f"🔌 Disjoncteur MongoDB ouvert : nouvel essai dans {self.breaker.reset_timeout:g}s")
+        self.start_health_probe()
+        return False
+
+    def use_client(self, client):
+        """Utilise un client déjà construit (ex. mongomock pour les benchmarks hors ligne)"""
+        self.client = client
+        self.db = client[config.DATABASE_NAME]
+        self._connected = True
+        self._last_check = time.monotonic()
+        self.breaker.record_success()
+
+    def record_error(self, error):
+        """Signale l'échec d'une requête ; les erreurs réseau comptent pour le disjoncteur"""
+        if is_connection_error(error):
+            self._connected = False
+            self.breaker.record_failure()
+
     def get_collection(self, collection_name):
         """Récupère une collection"""
         if not self._connected:
             if not self.connect():
+                if self.breaker.is_open:
+                    raise ConnectionError(
+                        "MongoDB indisponible (disjoncteur ouvert), "
+                        f"nouvel essai dans {self.breaker.reset_timeout:g}s au plus"
+                    )
                 raise ConnectionError(
                     f"MongoDB n'est pas connecté. "
                     f"URI: {config.MONGODB_URI}, "
@@ -51,20 +267,67 @@ class MongoDBConnection:
         if not self._connected:
             raise ConnectionError("MongoDB n'est pas connecté")
         return self.db[collection_name]
-    
+
+    def is_available(self):
+        """État de santé en cache (aucune requête réseau)"""
+        return self._connected and not self.breaker.is_open
+
     def is_connected(self):
-        """Vérifie si la connexion est active"""
+        """Vérifie si la connexion est active (ping au plus toutes les MONGODB_HEALTH_CACHE_SECONDS)"""
         if not self._connected:
             return self.connect()
+        if time.monotonic() - self._last_check < config.MONGODB_HEALTH_CACHE_SECONDS:
+            return True
         try:
-            self.client.admin.command('ping')
+            self._ping()
             return True
-        except:
-            self._connected = False
+        except Exception:
             return False
-    
+
+    def start_health_probe(self):
+        """Démarre la sonde de santé en arrière-plan (idempotent)"""
+        if not config.MONGODB_HEALTH_PROBE_SECONDS:
+            return
+        if self._probe_thread is not None and self._probe_thread.is_alive():
+            return
+        self._probe_stop.clear()
+        self._probe_thread = threading.Thread(
+            target=self._probe_loop, name="mongodb-health-probe", daemon=True
+        )
+        self._probe_thread.start()
+
+    def _probe_loop(self):
+        while not self._probe_stop.wait(config.MONGODB_HEALTH_PROBE_SECONDS):
+            if self.client is None:
+                continue
+            was_connected = self._connected
+            try:
+                self._ping()
+            except Exception:
+                if was_connected:
+                    print("⚠️ MongoDB ne répond plus")
+                continue
+            if not was_connected:
+                print("✅ Connexion MongoDB rétablie")
+
+    def stats(self):
+        """Métriques de la connexion : santé, disjoncteur et pool"""
+        breaker = self.breaker.stats()
+        return {
+            "connected": int(self._connected),
+            "breaker_state": breaker["state_code"],
+            "breaker_consecutive_failures": breaker["consecutive_failures"],
+            "breaker_trips": breaker["trips"],
+            "breaker_rejected": breaker["rejected"],
+            "seconds_since_health_check": (
+                time.monotonic() - self._last_check if self._last_check else -1
+            ),
+            **self.pool_listener.stats()
+        }
+
     def close(self):
         """Ferme la connexion"""
+        self._probe_stop.set()
         if self.client:
             self.client.close()
             self._connected = False
@@ -72,3 +335,4 @@ class MongoDBConnection:
 # Instance globale (connexion lazy - ne se connecte pas automatiquement)
 # La connexion se fera uniquement lors du premier appel à get_collection() ou connect()
 mongodb = MongoDBConnection()
+metrics.register_collector("mongodb", mongodb.stats)
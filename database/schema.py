@@ -0,0 +1,204 @@
+"""
+Schéma, index et rétention de la collection des conversations
+
+- Index composés couvrant les lectures du journal : tri par date,
+  filtre par intention + date, sélection des exemples d'entraînement
+  (intention + confiance).
+- Collection time-series MongoDB optionnelle (`CONVERSATION_TIME_SERIES`,
+  MongoDB 5.0+), créée à l'initialisation si la collection n'existe pas :
+  les documents sont regroupés et compressés par période et par intention.
+- Rétention : les conversations plus anciennes que
+  `CONVERSATION_RETENTION_DAYS` sont supprimées par MongoDB (index TTL sur
+  `timestamp`, ou `expireAfterSeconds` pour une collection time-series).
+- Archivage : `archive_conversations` exporte les jours révolus dans des
+  fichiers JSON Lines gzip locaux (un fichier par jour, format Extended
+  JSON), avant que la rétention ne les supprime.
+"""
+import gzip
+import os
+from datetime import datetime, timedelta
+from bson import json_util
+from pymongo import ASCENDING, DESCENDING
+from database.models import ConversationModel, ConversationRollupModel, FAQModel, ProductModel
+import config
+
+TIMESTAMP_INDEX = "timestamp"
+
+# Index secondaires (nom -> clés) ; l'index sur timestamp porte la rétention
+CONVERSATION_INDEXES = {
+    "intent_timestamp": [("intent", ASCENDING), ("timestamp", DESCENDING)],
+    "intent_confidence": [("intent", ASCENDING), ("confidence", DESCENDING)]
+}
+
+def retention_seconds(days=None):
+    """Durée de rétention en secondes (None : conservation illimitée)"""
+    days = config.CONVERSATION_RETENTION_DAYS if days is None else days
+    return int(days * 86400) if days and days > 0 else None
+
+def is_time_series(collection):
+    """Vrai si la collection est une collection time-series"""
+    for info in collection.database.list_collections(filter={"name": collection.name}):
+        return info.get("type") == "timeseries"
+    return False
+
+def create_conversation_collection(time_series=None, retention_days=None):
+    """Crée la collection des conversations si elle n'existe pas
+
+    En mode time-series, `timestamp` est le champ temporel et `intent` la
+    métadonnée ; la rétention est une option de la collection. Une
+    collection existante n'est jamais convertie (migration manuelle).
+    """
+    time_series = config.CONVERSATION_TIME_SERIES if time_series is None else time_series
+    collection = ConversationModel.get_collection()
+    if collection.name in collection.database.list_collection_names():
+        if time_series and not is_time_series(collection):
+            print(f"⚠️ La collection {collection.name} existe déjà et n'est pas time-series ; "
+                  "elle est conservée telle quelle")
+        return collection
+
+    if not time_series:
+        collection.database.create_collection(collection.name)
+        return collection
+
+    options = {
+        "timeseries": {"timeField": "timestamp", "metaField": "intent", "granularity": "minutes"}
+    }
+    expire_after = retention_seconds(retention_days)
+    if expire_after:
+        options["expireAfterSeconds"] = expire_after
+    collection.database.create_collection(collection.name, **options)
+    print(f"✅ Collection time-series {collection.name} créée")
+    return collection
+
+def _ensure_retention_index(collection, expire_after):
+    """Index sur timestamp, avec TTL si une rétention est configurée"""
+    existing = collection.index_information().get(TIMESTAMP_INDEX)
+    if existing is not None:
+        current = existing.get("expireAfterSeconds")
+        if current == expire_after:
+            return
+        if current is not None and expire_after is not None:
+            collection.database.command(
+                "collMod", collection.name,
+                index={"name": TIMESTAMP_INDEX, "expireAfterSeconds": expire_after}
+            )
+            return
+        collection.drop_index(TIMESTAMP_INDEX)
+
+    options = {"expireAfterSeconds": expire_after} if expire_after else {}
+    collection.create_index([("timestamp", DESCENDING)], name=TIMESTAMP_INDEX, **options)
+
+def _ensure_time_series_retention(collection, expire_after):
+    """Rétention d'une collection time-series (option de collection)"""
+    collection.database.command(
+        "collMod", collection.name, expireAfterSeconds=expire_after if expire_after else "off"
+    )
+
+def check_archive_retention(retention_days=None, archive_after_days=None):
+    """Avertit si la rétention supprime les conversations avant leur archivage"""
+    retention_days = config.CONVERSATION_RETENTION_DAYS if retention_days is None else retention_days
+    if archive_after_days is None:
+        archive_after_days = config.CONVERSATION_ARCHIVE_AFTER_DAYS
+    if retention_days and 0 < retention_days <= archive_after_days:
+        print(f"⚠️ Rétention de {retention_days:g} jours inférieure ou égale au délai d'archivage "
+              f"({archive_after_days} jours) : les conversations seront supprimées sans être archivées")
+        return False
+    return True
+
+def ensure_conversation_indexes(retention_days=None, archive_after_days=None):
+    """Crée les index des conversations et applique la rétention configurée"""
+    check_archive_retention(retention_days, archive_after_days)
+    collection = ConversationModel.get_collection()
+    expire_after = retention_seconds(retention_days)
+    if is_time_series(collection):
+        # L'index (intent, timestamp) est créé par MongoDB pour les time-series
+        _ensure_time_series_retention(collection, expire_after)
+    else:
+        _ensure_retention_index(collection, expire_after)
+    for name, keys in CONVERSATION_INDEXES.items():
+        collection.create_index(keys, name=name)
+    return collection
+
+def ensure_schema(time_series=None, retention_days=None):
+    """Crée collections et index de toute la base (idempotent)"""
+    create_conversation_collection(time_series=time_series, retention_days=retention_days)
+    ensure_conversation_indexes(retention_days=retention_days)
+    ConversationRollupModel.ensure_indexes()
+    ProductModel.ensure_indexes()
+    FAQModel.ensure_indexes()
+
+def _archive_path(directory, day):
+    return os.path.join(directory, f"conversations-{day:%Y-%m-%d}.jsonl.gz")
+
+def _delete_archived(collection, path, batch_size):
+    """Supprime de MongoDB les conversations présentes dans un fichier d'archive"""
+    deleted = 0
+    ids = []
+    for conversation in iter_archived_conversations(path):
+        ids.append(conversation["_id"])
+        if len(ids) >= batch_size:
+            deleted += collection.delete_many({"_id": {"$in": ids}}).deleted_count
+            ids = []
+    if ids:
+        deleted += collection.delete_many({"_id": {"$in": ids}}).deleted_count
+    return deleted
+
+def archive_conversations(before=None, directory=None, delete=False, batch_size=1000):
+    """Exporte les conversations des jours antérieurs à `before` (un fichier gzip par jour)
+
+    Par défaut, `before` est le début du jour situé
+    `CONVERSATION_ARCHIVE_AFTER_DAYS` jours en arrière. Les jours déjà
+    archivés sont ignorés : le job peut être relancé sans risque. Avec
+    `delete`, seules les conversations présentes dans l'archive (par `_id`)
+    sont supprimées de MongoDB : celles arrivées après l'export d'un jour
+    sont conservées et signalées (inutile si la rétention TTL est active ;
+    sur une collection time-series, nécessite MongoDB 7.0+). Retourne
+    {jour: nombre}.
+    """
+    directory = directory or config.CONVERSATION_ARCHIVE_DIR
+    if before is None:
+        before = datetime.now() - timedelta(days=config.CONVERSATION_ARCHIVE_AFTER_DAYS)
+    before = before.replace(hour=0, minute=0, second=0, microsecond=0)
+    collection = ConversationModel.get_collection()
+
+    oldest = collection.find_one(
+        {"timestamp": {"$type": "date", "$lt": before}}, {"timestamp": 1}, sort=[("timestamp", ASCENDING)]
+    )
+    if oldest is None:
+        return {}
+
+    os.makedirs(directory, exist_ok=True)
+    archived = {}
+    day = oldest["timestamp"].replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < before:
+        next_day = day + timedelta(days=1)
+        path = _archive_path(directory, day)
+        day_filter = {"timestamp": {"$gte": day, "$lt": next_day}}
+        if not os.path.exists(path):
+            temp_path = os.path.join(directory, f".tmp-{os.path.basename(path)}")
+            count = 0
+            with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+                cursor = collection.find(day_filter).sort("timestamp", ASCENDING).batch_size(batch_size)
+                for conversation in cursor:
+                    f.write(json_util.dumps(conversation, ensure_ascii=False) + "\n")
+                    count += 1
+            if count:
+                os.replace(temp_path, path)
+                archived[day] = count
+            else:
+                os.remove(temp_path)
+        if delete and os.path.exists(path):
+            _delete_archived(collection, path, batch_size)
+            remaining = collection.count_documents(day_filter)
+            if remaining:
+                print(f"⚠️ {day:%Y-%m-%d} : {remaining} conversations absentes de l'archive "
+                      "(arrivées après l'export) sont conservées")
+        day = next_day
+    return archived
+
+def iter_archived_conversations(path):
+    """Relit un fichier d'archive (documents BSON d'origine)"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json_util.loads(line)
@@ -0,0 +1,378 @@
+"""
+Backend de stockage SQLite (base embarquée, sans serveur)
+
+- Produits : table `products` (document JSON + colonnes filtrées) et index
+  plein texte FTS5 `products_fts` (nom, catégorie, description ; accents
+  ignorés), tenu à jour par des triggers ; les résultats sont classés par
+  BM25.
+- FAQ : table `faq`, indexée par intention.
+- Conversations : table `conversations` en journal WAL (lectures non
+  bloquées par les écritures), écrites par lots dans une seule transaction
+  avec la mise à jour des agrégats journaliers `conversation_rollups_daily`
+  utilisés par le dashboard.
+
+Chaque thread utilise sa propre connexion ; les écritures concurrentes
+attendent le verrou de la base (`SQLITE_BUSY_TIMEOUT_MS`).
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+import config
+from database.models import ConversationRollupModel, FAQModel, ProductModel
+from database.mongodb_connection import CircuitBreaker
+from database.storage import StorageBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    product_id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    category TEXT,
+    gender TEXT,
+    price REAL,
+    description TEXT,
+    document TEXT NOT NULL,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS products_category ON products(category);
+CREATE INDEX IF NOT EXISTS products_gender ON products(gender);
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name, category, description,
+    content='products', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts(rowid, name, category, description)
+    VALUES (new.id, new.name, new.category, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, category, description)
+    VALUES ('delete', old.id, old.name, old.category, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, category, description)
+    VALUES ('delete', old.id, old.name, old.category, old.description);
+    INSERT INTO products_fts(rowid, name, category, description)
+    VALUES (new.id, new.name, new.category, new.description);
+END;
+
+CREATE TABLE IF NOT EXISTS faq (
+    faq_id TEXT PRIMARY KEY,
+    intent TEXT,
+    document TEXT NOT NULL,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS faq_intent ON faq(intent);
+
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY,
+    user_message TEXT,
+    bot_response TEXT,
+    intent TEXT,
+    confidence REAL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_timestamp ON conversations(timestamp);
+CREATE INDEX IF NOT EXISTS conversations_intent_confidence ON conversations(intent, confidence);
+
+CREATE TABLE IF NOT EXISTS conversation_rollups_daily (
+    bucket TEXT NOT NULL,
+    intent TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL,
+    low_confidence INTEGER NOT NULL,
+    PRIMARY KEY (bucket, intent)
+) WITHOUT ROWID;
+"""
+
+_WORD_RE = re.compile(r"\w+")
+
+# Champs techniques exclus du document JSON stocké
+_METADATA_FIELDS = ("_id", "created_at")
+
+def _document_json(record):
+    return json.dumps(
+        {key: value for key, value in record.items() if key not in _METADATA_FIELDS},
+        ensure_ascii=False, default=str
+    )
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+def match_expression(query):
+    """Requête FTS5 : un terme entre guillemets par mot, reliés par OR (classement BM25)"""
+    return " OR ".join(f'"{word}"' for word in _WORD_RE.findall(query.lower()))
+
+class SQLiteStorage(StorageBackend):
+    """Backend SQLite (fichier local, FTS5, WAL)"""
+
+    name = "sqlite"
+
+    def __init__(self, path=None, batch_size=None):
+        self.path = path or config.SQLITE_PATH
+        self.batch_size = batch_size or config.SQLITE_BATCH_SIZE
+        # Jamais déclenché : le disjoncteur ne sert qu'à l'interface commune
+        self._breaker = CircuitBreaker()
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    @property
+    def breaker(self):
+        return self._breaker
+
+    def is_available(self):
+        return True
+
+    def connection(self):
+        """Connexion du thread courant (créée au premier usage)"""
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT_MS)}")
+            self._local.connection = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    # Produits
+    def _product_document(self, row):
+        product = json.loads(row["document"])
+        product["product_id"] = row["product_id"]
+        product["created_at"] = _parse_datetime(row["created_at"])
+        return product
+
+    def upsert_products(self, products):
+        """Insère ou met à jour des produits par lots (clé : product_id)"""
+        now = datetime.now().isoformat()
+        conn = self.connection()
+        written = 0
+        batch = []
+
+        def flush():
+            with conn:
+                conn.executemany(
+                    """
+                    INSERT INTO products (product_id, name, category, gender, price, description, document, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(product_id) DO UPDATE SET
+                        name = excluded.name, category = excluded.category, gender = excluded.gender,
+                        price = excluded.price, description = excluded.description,
+                        document = excluded.document
+                    """,
+                    batch
+                )
+
+        for product in products:
+            product_id = ProductModel.product_id(product)
+            batch.append((
+                product_id, product.get("name"), product.get("category"), product.get("gender"),
+                product.get("price"), product.get("description"),
+                _document_json(dict(product, product_id=product_id)), now
+            ))
+            if len(batch) >= self.batch_size:
+                flush()
+                written += len(batch)
+                batch = []
+        if batch:
+            flush()
+            written += len(batch)
+        ProductModel.bump_version()
+        return written
+
+    def search_products(self, query, category=None, gender=None, limit=10):
+        """Recherche plein texte (FTS5, BM25) filtrée par catégorie et genre"""
+        try:
+            conditions = []
+            params = []
+            if category:
+                conditions.append("instr(lower(p.category), lower(?)) > 0")
+                params.append(category)
+            if gender:
+                conditions.append("instr(lower(p.gender), lower(?)) > 0")
+                params.append(gender)
+
+            expression = match_expression(query) if query else ""
+            if query and not expression:
+                # Aucun mot recherchable (ponctuation seule)
+                return []
+            if expression:
+                sql = (
+                    "SELECT p.* FROM products_fts JOIN products p ON p.id = products_fts.rowid "
+                    "WHERE products_fts MATCH ?"
+                    + "".join(f" AND {condition}" for condition in conditions)
+                    + " ORDER BY bm25(products_fts) LIMIT ?"
+                )
+                params = [expression] + params
+            else:
+                where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+                sql = f"SELECT p.* FROM products p{where} ORDER BY p.id LIMIT ?"
+            rows = self.connection().execute(sql, params + [limit]).fetchall()
+            return [self._product_document(row) for row in rows]
+        except sqlite3.Error as e:
+            print(f"⚠️ Impossible de rechercher les produits: {e}")
+            return []
+
+    def find_all_products(self):
+        rows = self.connection().execute("SELECT * FROM products ORDER BY id").fetchall()
+        return [self._product_document(row) for row in rows]
+
+    def get_all_products(self):
+        try:
+            return self.find_all_products()
+        except sqlite3.Error as e:
+            print(f"⚠️ Impossible de récupérer les produits: {e}")
+            return []
+
+    def count_products(self):
+        return self.connection().execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    # FAQ
+    def replace_faq(self, faq_items):
+        now = datetime.now().isoformat()
+        conn = self.connection()
+        with conn:
+            conn.execute("DELETE FROM faq")
+            conn.executemany(
+                "INSERT OR REPLACE INTO faq (faq_id, intent, document, created_at) VALUES (?, ?, ?, ?)",
+                [
+                    (FAQModel.faq_id(faq), faq.get("intent"), _document_json(faq), now)
+                    for faq in faq_items
+                ]
+            )
+        FAQModel.bump_version()
+
+    def _faq_document(self, row):
+        faq = json.loads(row["document"])
+        faq["faq_id"] = row["faq_id"]
+        faq["created_at"] = _parse_datetime(row["created_at"])
+        return faq
+
+    def find_faq_by_intent(self, intent):
+        row = self.connection().execute(
+            "SELECT * FROM faq WHERE intent = ? ORDER BY created_at LIMIT 1", (intent,)
+        ).fetchone()
+        return self._faq_document(row) if row is not None else None
+
+    def get_faq_by_intent(self, intent):
+        try:
+            return self.find_faq_by_intent(intent)
+        except sqlite3.Error as e:
+            print(f"⚠️ Impossible de récupérer la FAQ: {e}")
+            return None
+
+    def get_all_faq(self):
+        rows = self.connection().execute("SELECT * FROM faq").fetchall()
+        return [self._faq_document(row) for row in rows]
+
+    # Conversations
+    def save_conversations(self, conversations):
+        """Insère un lot de conversations et met à jour les agrégats (une transaction)"""
+        if not conversations:
+            return None
+        threshold = config.LOW_CONFIDENCE_THRESHOLD
+        rows = []
+        increments = {}
+        for conversation in conversations:
+            timestamp = conversation.get("timestamp") or datetime.now()
+            confidence = float(conversation.get("confidence") or 0.0)
+            intent = conversation.get("intent")
+            rows.append((
+                conversation.get("user_message"), conversation.get("bot_response"),
+                intent, confidence, timestamp.isoformat()
+            ))
+            key = (ConversationRollupModel.bucket_start(timestamp, "day").isoformat(), intent or "")
+            totals = increments.setdefault(key, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += confidence
+            totals[2] += confidence < threshold
+
+        try:
+            conn = self.connection()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO conversations (user_message, bot_response, intent, confidence, timestamp) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.executemany(
+                    """
+                    INSERT INTO conversation_rollups_daily (bucket, intent, count, confidence_sum, low_confidence)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(bucket, intent) DO UPDATE SET
+                        count = count + excluded.count,
+                        confidence_sum = confidence_sum + excluded.confidence_sum,
+                        low_confidence = low_confidence + excluded.low_confidence
+                    """,
+                    [(bucket, intent, *totals) for (bucket, intent), totals in increments.items()]
+                )
+            return len(rows)
+        except sqlite3.Error as e:
+            print(f"⚠️ Impossible de sauvegarder {len(conversations)} conversations: {e}")
+            return None
+
+    @staticmethod
+    def _conversation_document(row):
+        return {
+            "_id": row["id"],
+            "user_message": row["user_message"],
+            "bot_response": row["bot_response"],
+            "intent": row["intent"],
+            "confidence": row["confidence"],
+            "timestamp": _parse_datetime(row["timestamp"])
+        }
+
+    def iter_labeled_messages(self, min_confidence=0.0, batch_size=1000):
+        """Messages journalisés avec leur intention prédite (hors "unknown" et "error")"""
+        cursor = self.connection().execute(
+            "SELECT user_message, intent FROM conversations "
+            "WHERE confidence >= ? AND intent NOT IN ('unknown', 'error')",
+            (min_confidence,)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for user_message, intent in rows:
+                if user_message and intent:
+                    yield user_message, intent
+
+    def get_recent_conversations(self, limit=10):
+        rows = self.connection().execute(
+            "SELECT * FROM conversations ORDER BY timestamp DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._conversation_document(row) for row in rows]
+
+    def get_conversation_stats(self, days=None, recent_limit=10):
+        """Statistiques du dashboard, lues dans les agrégats journaliers"""
+        since = ConversationRollupModel.summary_since(days)
+        sql = "SELECT * FROM conversation_rollups_daily"
+        params = ()
+        if since is not None:
+            sql += " WHERE bucket >= ?"
+            params = (since.isoformat(),)
+        rollups = [
+            dict(row, bucket=_parse_datetime(row["bucket"]))
+            for row in self.connection().execute(sql + " ORDER BY bucket", params)
+        ]
+        stats = ConversationRollupModel.summarize(rollups)
+        stats["recent_conversations"] = self.get_recent_conversations(recent_limit)
+        return stats
+
+    def close(self):
+        """Ferme les connexions de tous les threads"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
@@ -0,0 +1,203 @@
+"""
+Backends de stockage du chatbot (produits, FAQ, conversations)
+
+`StorageBackend` décrit les accès aux données utilisés par le chatbot, le
+dashboard et les scripts ; `get_storage()` retourne le backend choisi par
+`config.STORAGE_BACKEND` :
+
+- "mongodb" (défaut) : `MongoStorage`, qui délègue aux modèles de
+  `database/models.py` ;
+- "sqlite" : `SQLiteStorage` (`database/sqlite_storage.py`), base embarquée
+  dans un fichier local, sans serveur : recherche plein texte FTS5,
+  journal WAL et insertions par lots. Pour un déploiement local, en
+  conteneur unique ou les benchmarks hors ligne.
+"""
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+import config
+from database.catalog_sync import content_hash
+from database.models import ConversationModel, FAQModel, ProductModel
+from database.mongodb_connection import mongodb
+
+class StorageBackend(ABC):
+    """Interface des backends de stockage
+
+    Un backend incomplet ne peut pas être instancié (TypeError).
+    """
+
+    name = None
+
+    @property
+    @abstractmethod
+    def breaker(self):
+        """Disjoncteur de l'accès aux données (consulté par les caches)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def is_available(self):
+        """État de santé en cache (aucune requête)"""
+        raise NotImplementedError
+
+    # Produits
+    @abstractmethod
+    def upsert_products(self, products):
+        """Insère ou met à jour un lot de produits (clé : product_id)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def search_products(self, query, category=None, gender=None, limit=10):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_all_products(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_all_products(self):
+        """Comme `get_all_products`, mais lève une exception en cas d'échec
+        (l'index produits conserve alors son contenu)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def count_products(self):
+        raise NotImplementedError
+
+    # FAQ
+    @abstractmethod
+    def replace_faq(self, faq_items):
+        """Remplace toutes les entrées FAQ"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_faq_by_intent(self, intent):
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_faq_by_intent(self, intent):
+        """Comme `get_faq_by_intent`, mais lève une exception en cas d'échec
+        (le cache FAQ ne mémorise alors pas d'absence)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_all_faq(self):
+        raise NotImplementedError
+
+    # Conversations
+    def save_conversation(self, user_message, bot_response, intent, confidence):
+        return self.save_conversations([
+            ConversationModel.build_conversation(user_message, bot_response, intent, confidence)
+        ])
+
+    @abstractmethod
+    def save_conversations(self, conversations):
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_labeled_messages(self, min_confidence=0.0, batch_size=1000):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_conversation_stats(self, days=None, recent_limit=10):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class MongoStorage(StorageBackend):
+    """Backend MongoDB (modèles de database/models.py)"""
+
+    name = "mongodb"
+
+    @property
+    def breaker(self):
+        return mongodb.breaker
+
+    def is_available(self):
+        return mongodb.is_available()
+
+    def upsert_products(self, products):
+        return ProductModel.bulk_upsert(products)
+
+    def search_products(self, query, category=None, gender=None, limit=10):
+        return ProductModel.search_products(query, category=category, gender=gender, limit=limit)
+
+    def get_all_products(self):
+        return ProductModel.get_all_products()
+
+    def find_all_products(self):
+        return ProductModel.find_all_products()
+
+    def count_products(self):
+        return ProductModel.get_collection().count_documents({})
+
+    def replace_faq(self, faq_items):
+        collection = FAQModel.get_collection()
+        collection.delete_many({})
+        now = datetime.now()
+        if faq_items:
+            collection.insert_many([
+                dict(
+                    faq, created_at=now, faq_id=FAQModel.faq_id(faq),
+                    content_hash=content_hash(faq, "faq_id")
+                )
+                for faq in faq_items
+            ])
+        FAQModel.bump_version()
+
+    def get_faq_by_intent(self, intent):
+        return FAQModel.get_faq_by_intent(intent)
+
+    def find_faq_by_intent(self, intent):
+        return FAQModel.find_faq_by_intent(intent)
+
+    def get_all_faq(self):
+        return FAQModel.get_all_faq()
+
+    def save_conversation(self, user_message, bot_response, intent, confidence):
+        return ConversationModel.save_conversation(user_message, bot_response, intent, confidence)
+
+    def save_conversations(self, conversations):
+        return ConversationModel.save_conversations(conversations)
+
+    def iter_labeled_messages(self, min_confidence=0.0, batch_size=1000):
+        return ConversationModel.iter_labeled_messages(min_confidence=min_confidence, batch_size=batch_size)
+
+    def get_conversation_stats(self, days=None, recent_limit=10):
+        return ConversationModel.get_conversation_stats(days=days, recent_limit=recent_limit)
+
+    def close(self):
+        mongodb.close()
+
+STORAGE_BACKENDS = ("mongodb", "sqlite")
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def create_storage(backend=None, **options):
+    """Construit un backend ("mongodb" ou "sqlite")"""
+    backend = backend or config.STORAGE_BACKEND
+    if backend == "mongodb":
+        return MongoStorage()
+    if backend == "sqlite":
+        from database.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(**options)
+    raise ValueError(
+        f"Backend de stockage inconnu: {backend} (attendu: {', '.join(STORAGE_BACKENDS)})"
+    )
+
+def get_storage():
+    """Backend de stockage du processus (créé au premier appel)"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+def use_storage(storage):
+    """Remplace le backend du processus (tests, benchmarks hors ligne)"""
+    global _storage
+    with _storage_lock:
+        _storage = storage
+    return storage
@@ -0,0 +1,260 @@
+"""
+Instrumentation du chemin critique : compteurs, histogrammes et chronomètres
+
+Les métriques sont exportables au format texte Prometheus et en instantané
+JSON. Lorsque l'instrumentation est désactivée (METRICS_ENABLED=false), les
+fonctions décorées ne paient qu'un test de booléen.
+"""
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+import config
+
+# Bornes des histogrammes de latence (secondes)
+DEFAULT_BUCKETS = (
+    0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+class Counter:
+    """Compteur monotone"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return {"value": self.value}
+
+    def prometheus_lines(self):
+        return [f"{self.name} {self.value}"]
+
+class Histogram:
+    """Histogramme à bornes fixes"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q):
+        """Estimation d'un quantile (borne supérieure du bucket)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self._counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "count": self.count,
+                "sum": self.sum,
+                "mean": self.sum / self.count if self.count else 0.0,
+                "max": self.max,
+                "p50": self.quantile(0.5),
+                "p95": self.quantile(0.95),
+                "p99": self.quantile(0.99)
+            }
+
+    def prometheus_lines(self):
+        with self._lock:
+            lines = []
+            cumulative = 0
+            for bound, count in zip(self.buckets, self._counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+            lines.append(f"{self.name}_sum {self.sum}")
+            lines.append(f"{self.name}_count {self.count}")
+            return lines
+
+class _Timer:
+    """Chronomètre (gestionnaire de contexte) alimentant un histogramme"""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+class _NullTimer:
+    """Chronomètre inactif (instrumentation désactivée)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class MetricsRegistry:
+    """Registre des métriques du processus"""
+
+    def __init__(self, enabled=True, prefix="chatbot_"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._metrics = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, **kwargs):
+        name = self.prefix + name
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"La métrique {name} existe déjà avec un autre type")
+            return metric
+
+    def counter(self, name, help_text=""):
+        return self._get_or_create(Counter, name, help_text)
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def inc(self, name, amount=1, help_text=""):
+        """Incrémente un compteur (sans effet si désactivé)"""
+        if self.enabled:
+            self.counter(name, help_text).inc(amount)
+
+    def timer(self, name, help_text=""):
+        """Chronomètre une section : `with metrics.timer("etape_seconds"): ...`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(name, help_text))
+
+    def timed(self, name, help_text=""):
+        """Décorateur chronométrant chaque appel dans l'histogramme `name`
+
+        Pour une fonction asynchrone, la durée mesurée est celle de l'attente
+        complète de la coroutine.
+        """
+        def decorator(func):
+            histogram = self.histogram(name, help_text)
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+                    start = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        histogram.observe(time.perf_counter() - start)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def register_collector(self, name, collect):
+        """Enregistre une source de jauges évaluée à l'export
+
+        `collect()` retourne un dictionnaire ; ses valeurs numériques sont
+        exportées sous le nom `<prefix><name>_<clé>`.
+        """
+        with self._lock:
+            self._collectors[self.prefix + name] = collect
+
+    def _collect_gauges(self):
+        gauges = {}
+        with self._lock:
+            collectors = list(self._collectors.items())
+        for name, collect in collectors:
+            try:
+                values = collect() or {}
+            except Exception as e:
+                print(f"⚠️ Collecte des métriques {name} impossible: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauges[f"{name}_{key}"] = value
+        return gauges
+
+    def snapshot(self):
+        """Instantané JSON de toutes les métriques"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            "enabled": self.enabled,
+            "counters": {m.name: m.snapshot()["value"] for m in metrics if m.kind == "counter"},
+            "histograms": {m.name: m.snapshot() for m in metrics if m.kind == "histogram"},
+            "gauges": self._collect_gauges()
+        }
+
+    def to_prometheus(self):
+        """Export au format texte Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.prometheus_lines())
+        for name, value in sorted(self._collect_gauges().items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Supprime les valeurs accumulées (les métriques restent enregistrées)"""
+        with self._lock:
+            for metric in self._metrics.values():
+                if metric.kind == "counter":
+                    metric.__init__(metric.name, metric.help)
+                else:
+                    metric.__init__(metric.name, metric.help, metric.buckets)
+
+# Instance globale
+metrics = MetricsRegistry(enabled=config.METRICS_ENABLED)
@@ -0,0 +1,297 @@
+"""
+Moteur d'inférence NumPy du modèle d'intentions (sans scikit-learn)
+
+Les tableaux du bundle (vocabulaire, IDF, coefficients) sont utilisés
+directement : analyse en n-grammes et recherche dans le vocabulaire (ou
+hachage MurmurHash3 pour les modèles à hachage de features) en Python,
+pondération TF-IDF, produit creux et softmax en NumPy. Les
+résultats sont identiques à ceux de scikit-learn à la précision flottante
+près (voir `scripts/check_inference_parity.py`), sans sa couche de
+validation ni son import au démarrage.
+"""
+import math
+import os
+import re
+import struct
+import unicodedata
+from functools import lru_cache
+import numpy as np
+import config
+from monitoring.metrics import metrics
+from nlp.model_bundle import ModelBundle
+from nlp.preprocessing import preprocessor
+
+def _strip_accents_unicode(text):
+    normalized = unicodedata.normalize("NFKD", text)
+    if normalized == text:
+        return text
+    return "".join(char for char in normalized if not unicodedata.combining(char))
+
+def _strip_accents_ascii(text):
+    return unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("ASCII")
+
+_MASK_32 = 0xFFFFFFFF
+_UINT32_BLOCKS = struct.Struct("<I")
+
+def murmurhash3_32(data, seed=0):
+    """MurmurHash3 x86 32 bits signé (identique à sklearn.utils.murmurhash3_32)"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+    length = len(data)
+    h = seed & _MASK_32
+    rounded_end = length & ~3
+
+    for (k,) in _UINT32_BLOCKS.iter_unpack(data[:rounded_end]):
+        k = (k * c1) & _MASK_32
+        k = ((k << 15) | (k >> 17)) & _MASK_32
+        k = (k * c2) & _MASK_32
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & _MASK_32
+        h = (h * 5 + 0xE6546B64) & _MASK_32
+
+    tail = length & 3
+    if tail:
+        k = 0
+        if tail == 3:
+            k ^= data[rounded_end + 2] << 16
+        if tail >= 2:
+            k ^= data[rounded_end + 1] << 8
+        k ^= data[rounded_end]
+        k = (k * c1) & _MASK_32
+        k = ((k << 15) | (k >> 17)) & _MASK_32
+        k = (k * c2) & _MASK_32
+        h ^= k
+
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & _MASK_32
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & _MASK_32
+    h ^= h >> 16
+    return h - 0x100000000 if h & 0x80000000 else h
+
+_ACCENT_FUNCTIONS = {
+    None: None,
+    "unicode": _strip_accents_unicode,
+    "ascii": _strip_accents_ascii
+}
+
+class FastIntentClassifier:
+    """Classificateur d'intentions en inférence seule, à partir d'un bundle"""
+
+    def __init__(self):
+        self.bundle = None
+        self.is_trained = False
+
+    @property
+    def model_version(self):
+        return self.bundle.version if self.bundle is not None else None
+
+    @property
+    def n_features(self):
+        if not self.is_trained:
+            return 0
+        return self._n_features if self._hashing else len(self.vocabulary)
+
+    def load(self, bundle_path=None, version=None):
+        """Charge le modèle (bundle versionné, sinon conversion de l'ancien format pickle)"""
+        try:
+            bundle = ModelBundle.load(bundle_path or config.MODEL_BUNDLE_PATH, version=version)
+        except FileNotFoundError:
+            bundle = self._convert_legacy() if version is None else None
+            if bundle is None:
+                raise FileNotFoundError("Modèle non trouvé. Veuillez d'abord entraîner le modèle.")
+        self.use_bundle(bundle)
+        print(f"✅ Modèle chargé (inférence NumPy): {bundle.path or config.MODEL_PATH}")
+
+    def _convert_legacy(self):
+        """Bundle en mémoire construit depuis les anciens pickles (nécessite scikit-learn)"""
+        if not os.path.exists(config.MODEL_PATH) or not os.path.exists(config.VECTORIZER_PATH):
+            return None
+        from nlp.intent_classifier import IntentClassifier
+        legacy = IntentClassifier()
+        legacy.load()
+        return ModelBundle.from_sklearn(legacy.vectorizer, legacy.classifier)
+
+    def use_bundle(self, bundle):
+        """Prépare l'inférence pour un bundle"""
+        params = bundle.manifest["vectorizer"]
+        if params.get("analyzer", "word") != "word":
+            raise ValueError(f"Analyseur non supporté par l'inférence NumPy: {params['analyzer']}")
+        if params.get("strip_accents") not in _ACCENT_FUNCTIONS:
+            raise ValueError(f"strip_accents non supporté: {params['strip_accents']}")
+        stop_words = params.get("stop_words")
+        if isinstance(stop_words, str):
+            raise ValueError(f"Liste de mots vides prédéfinie non supportée: {stop_words}")
+
+        token_pattern = re.compile(params["token_pattern"])
+        if token_pattern.groups > 1:
+            raise ValueError("token_pattern ne doit pas contenir plus d'un groupe")
+
+        self.bundle = bundle
+        self._hashing = bundle.vectorizer_type == "hashing"
+        self.vocabulary = None if self._hashing else bundle.vocabulary
+        self.classes = list(bundle.classes)
+        # Vues ndarray des tableaux projetés (pas de copie : les pages restent partagées),
+        # l'indexation d'un np.memmap étant plus coûteuse
+        self.coef = np.asarray(bundle.coef)
+        self.intercept = np.asarray(bundle.intercept, dtype=np.float64)
+        self.idf = np.asarray(bundle.idf) if params.get("use_idf", True) and bundle.idf is not None else None
+
+        self._findall = token_pattern.findall
+        self._lowercase = params.get("lowercase", True)
+        self._strip_accents = _ACCENT_FUNCTIONS[params.get("strip_accents")]
+        self._stop_words = frozenset(stop_words) if stop_words else None
+        self._min_n, self._max_n = params.get("ngram_range", (1, 1))
+        self._binary = params.get("binary", False)
+        self._sublinear_tf = params.get("sublinear_tf", False)
+        self._norm = params.get("norm", "l2")
+        self._probability = bundle.manifest.get("probability", "softmax")
+        if self._hashing:
+            self._n_features = params["n_features"]
+            self._alternate_sign = params.get("alternate_sign", True)
+            self._hash_term = lru_cache(maxsize=config.FEATURE_HASH_CACHE_SIZE)(self._hash_term_uncached)
+        self.is_trained = True
+
+    def _hash_term_uncached(self, term):
+        """(colonne, signe) d'un terme, comme HashingVectorizer"""
+        h = murmurhash3_32(term)
+        if h == -0x80000000:
+            column = (0x7FFFFFFF - (self._n_features - 1)) % self._n_features
+        else:
+            column = abs(h) % self._n_features
+        sign = -1.0 if self._alternate_sign and h < 0 else 1.0
+        return column, sign
+
+    def analyze(self, text):
+        """Termes (n-grammes de mots) d'un texte, comme l'analyseur de TfidfVectorizer"""
+        if self._lowercase:
+            text = text.lower()
+        if self._strip_accents is not None:
+            text = self._strip_accents(text)
+        tokens = self._findall(text)
+        if self._stop_words is not None:
+            tokens = [token for token in tokens if token not in self._stop_words]
+
+        min_n, max_n = self._min_n, self._max_n
+        if max_n == 1:
+            return tokens
+        terms = list(tokens) if min_n == 1 else []
+        n_tokens = len(tokens)
+        for n in range(max(min_n, 2), min(max_n, n_tokens) + 1):
+            for start in range(n_tokens - n + 1):
+                terms.append(" ".join(tokens[start:start + n]))
+        return terms
+
+    def vectorize(self, processed):
+        """Colonnes et poids TF-IDF (ou hachés) normalisés d'un texte prétraité"""
+        counts = {}
+        if self._hashing:
+            hash_term = self._hash_term
+            for term in self.analyze(processed):
+                column, sign = hash_term(term)
+                counts[column] = counts.get(column, 0) + sign
+        else:
+            vocabulary = self.vocabulary
+            for term in self.analyze(processed):
+                column = vocabulary.get(term)
+                if column is not None:
+                    counts[column] = counts.get(column, 0) + 1
+        if not counts:
+            return (), ()
+
+        columns = list(counts)
+        if self._binary:
+            values = [1.0] * len(columns)
+        elif self._sublinear_tf:
+            values = [1.0 + math.log(count) for count in counts.values()]
+        else:
+            values = [float(count) for count in counts.values()]
+
+        if self.idf is not None:
+            idf = self.idf
+            values = [value * float(idf[column]) for value, column in zip(values, columns)]
+
+        if self._norm == "l2":
+            norm = math.sqrt(sum(value * value for value in values))
+        elif self._norm == "l1":
+            norm = sum(abs(value) for value in values)
+        else:
+            norm = 0.0
+        if norm:
+            values = [value / norm for value in values]
+        return columns, values
+
+    def scores(self, rows):
+        """Scores de décision d'une liste de vecteurs creux (colonnes, poids)"""
+        scores = np.tile(self.intercept, (len(rows), 1))
+        for row, (columns, values) in enumerate(rows):
+            if columns:
+                scores[row] += self.coef[:, columns] @ np.asarray(values)
+        return scores
+
+    def probabilities(self, scores):
+        """Probabilités par classe (softmax, sigmoïde binaire ou un contre tous normalisé)"""
+        if self._probability == "sigmoid":
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        if self._probability == "ovr":
+            probabilities = 1.0 / (1.0 + np.exp(-scores))
+            sums = probabilities.sum(axis=1)
+            all_zero = sums == 0
+            if all_zero.any():
+                probabilities[all_zero] = 1.0
+                sums[all_zero] = probabilities.shape[1]
+            probabilities /= sums[:, None]
+            return probabilities
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict_proba(self, texts):
+        """Matrice des probabilités (textes x classes), dans l'ordre de `classes`"""
+        if not self.is_trained:
+            raise ValueError("Le modèle n'a pas été entraîné")
+        rows = [self.vectorize(processed) for processed in preprocessor.preprocess_many(texts)]
+        return self.probabilities(self.scores(rows))
+
+    @metrics.timed("predict_seconds", "Durée de classification d'un message")
+    def predict(self, text):
+        """Prédit l'intention d'un texte"""
+        if not self.is_trained:
+            raise ValueError("Le modèle n'a pas été entraîné")
+        probabilities = self.probabilities(
+            self.scores([self.vectorize(preprocessor.preprocess(text))])
+        )[0]
+        best = int(probabilities.argmax())
+        return self.classes[best], float(probabilities[best])
+
+    def predict_batch(self, texts, batch_size=1000):
+        """Prédit les intentions d'une liste de textes"""
+        return list(self.iter_predict(texts, batch_size=batch_size))
+
+    def iter_predict(self, texts, batch_size=1000):
+        """Prédit les intentions d'un flux de textes, lot par lot (générateur)"""
+        if not self.is_trained:
+            raise ValueError("Le modèle n'a pas été entraîné")
+        if batch_size < 1:
+            raise ValueError("batch_size doit être supérieur ou égal à 1")
+
+        batch = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) >= batch_size:
+                yield from self._predict_chunk(batch)
+                batch = []
+
+        if batch:
+            yield from self._predict_chunk(batch)
+
+    @metrics.timed("predict_batch_chunk_seconds", "Durée de classification d'un lot")
+    def _predict_chunk(self, texts):
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        confidences = probabilities[np.arange(len(best)), best]
+        return zip([self.classes[index] for index in best.tolist()], confidences.tolist())
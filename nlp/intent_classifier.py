@@ -1,47 +1,112 @@
 """
 Module de classification des intentions
 """
+import hashlib
 import os
 import pickle
+from itertools import islice
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.base import clone
+from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
 from sklearn.metrics import accuracy_score, classification_report
 import config
+from monitoring.metrics import metrics
+from nlp.model_bundle import ModelBundle, training_data_hash
 from nlp.preprocessing import preprocessor
+from nlp.preprocessing_cache import PreprocessingCache
+
+# Espace de recherche des hyperparamètres (configuration "tfidf")
+SEARCH_GRID = {
+    "vectorizer__ngram_range": [(1, 1), (1, 2), (1, 3)],
+    "vectorizer__min_df": [1, 2, 3],
+    "classifier__C": [0.1, 1.0, 10.0, 100.0],
+    "classifier__class_weight": [None, "balanced"]
+}
+
+def _search_distributions():
+    from scipy.stats import loguniform
+    return dict(SEARCH_GRID, classifier__C=loguniform(1e-2, 1e3))
+
+def _json_value(value):
+    if isinstance(value, tuple):
+        return list(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
 
 class IntentClassifier:
-    """Classificateur d'intentions"""
-    
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(
-            max_features=5000,
-            ngram_range=(1, 2),
-            min_df=2,
-            max_df=0.95
-        )
-        self.classifier = LogisticRegression(
-            max_iter=1000,
-            random_state=42
-        )
+    """Classificateur d'intentions
+    
+    Deux configurations :
+    - "tfidf" : TfidfVectorizer + LogisticRegression, entraînement en une passe ;
+    - "hashing" : HashingVectorizer + SGDClassifier (perte logistique). Sans
+      vocabulaire à construire, le modèle s'entraîne en flux (`train_stream`)
+      et se met à jour par lots (`partial_fit`) sans réentraînement complet.
+    """
+    
+    def __init__(self, vectorizer_type=None, n_features=None):
+        self.vectorizer_type = vectorizer_type or config.INTENT_VECTORIZER
+        if self.vectorizer_type == "hashing":
+            self.vectorizer = HashingVectorizer(
+                n_features=n_features or config.HASHING_N_FEATURES,
+                ngram_range=(1, 2),
+                alternate_sign=False
+            )
+            self.classifier = SGDClassifier(
+                loss="log_loss",
+                alpha=1e-4,
+                random_state=42
+            )
+        elif self.vectorizer_type == "tfidf":
+            self.vectorizer = TfidfVectorizer(
+                max_features=5000,
+                ngram_range=(1, 2),
+                min_df=2,
+                max_df=0.95
+            )
+            self.classifier = LogisticRegression(
+                max_iter=1000,
+                random_state=42
+            )
+        else:
+            raise ValueError(f"Vectorisation inconnue: {self.vectorizer_type}")
         self.is_trained = False
+        self.data_hash = None
+        self.training_metrics = {}
+        self.bundle = None
     
-    def prepare_data(self, training_data):
-        """Prépare les données d'entraînement"""
-        texts = []
+    @property
+    def model_version(self):
+        """Version du bundle chargé ou sauvegardé (None pour l'ancien format)"""
+        return self.bundle.version if self.bundle is not None else None
+    
+    def prepare_data(self, training_data, use_cache=None, n_jobs=None):
+        """Prépare les données d'entraînement
+        
+        Avec le cache de prétraitement (`config.PREPROCESSING_CACHE_ENABLED`),
+        seuls les exemples nouveaux ou modifiés sont prétraités, sur `n_jobs`
+        processus.
+        """
+        examples = []
         labels = []
         
         for item in training_data:
             intent = item.get('intent')
-            examples = item.get('examples', [])
-            
-            for example in examples:
-                # Prétraitement
-                processed = preprocessor.preprocess(example)
-                texts.append(processed)
+            for example in item.get('examples', []):
+                examples.append(example)
                 labels.append(intent)
         
+        use_cache = config.PREPROCESSING_CACHE_ENABLED if use_cache is None else use_cache
+        if not use_cache:
+            return preprocessor.preprocess_many(examples, n_jobs=n_jobs), labels
+        
+        cache = PreprocessingCache().load()
+        texts = cache.preprocess(examples, n_jobs=n_jobs)
+        cache.save()
+        print(f"💾 Cache de prétraitement : {cache.hits} exemples réutilisés, {cache.misses} prétraités")
         return texts, labels
     
     def train(self, training_data):
@@ -59,7 +124,7 @@ class IntentClassifier:
             texts, labels, test_size=0.2, random_state=42, stratify=labels
         )
         
-        print("🔄 Vectorisation TF-IDF...")
+        print("🔄 Vectorisation TF-IDF..." if self.vectorizer_type == "tfidf" else "🔄 Vectorisation par hachage...")
         X_train_vectorized = self.vectorizer.fit_transform(X_train)
         X_test_vectorized = self.vectorizer.transform(X_test)
         
@@ -74,9 +139,178 @@ class IntentClassifier:
         print("\n📊 Rapport de classification:")
         print(classification_report(y_test, y_pred, zero_division=0))
         
+        report = classification_report(y_test, y_pred, zero_division=0, output_dict=True)
+        self.data_hash = training_data_hash(training_data)
+        self.training_metrics = {
+            "accuracy": accuracy,
+            "macro_f1": report["macro avg"]["f1-score"],
+            "n_examples": len(texts),
+            "n_train": len(X_train),
+            "n_test": len(X_test),
+            "examples_seen": len(X_train)
+        }
+        self.bundle = None
         self.is_trained = True
         return accuracy
     
+    def tune(self, training_data, search="grid", folds=5, n_iter=20, n_jobs=-1,
+             param_grid=None, random_state=42):
+        """Recherche d'hyperparamètres par validation croisée stratifiée
+        
+        Les exemples sont prétraités une seule fois ; chaque configuration
+        est évaluée sur `folds` plis (F1 macro et précision), en parallèle sur
+        `n_jobs` cœurs. La meilleure configuration est réentraînée sur toutes
+        les données et devient le modèle courant. Retourne le classement des
+        configurations, de la meilleure à la moins bonne.
+        """
+        if self.vectorizer_type != "tfidf":
+            raise ValueError("La recherche d'hyperparamètres nécessite la vectorisation \"tfidf\"")
+        
+        print("🔄 Préparation des données (prétraitement unique)...")
+        texts, labels = self.prepare_data(training_data)
+        if len(texts) == 0:
+            raise ValueError("Aucune donnée d'entraînement trouvée")
+        
+        # Le nombre de plis ne peut pas dépasser l'effectif de la plus petite intention
+        min_class_count = min(labels.count(label) for label in set(labels))
+        folds = max(2, min(folds, min_class_count))
+        cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state)
+        
+        pipeline = Pipeline([
+            ("vectorizer", clone(self.vectorizer)),
+            ("classifier", clone(self.classifier))
+        ])
+        scoring = {"f1_macro": "f1_macro", "accuracy": "accuracy"}
+        if search == "grid":
+            searcher = GridSearchCV(
+                pipeline, param_grid or SEARCH_GRID, scoring=scoring, refit="f1_macro",
+                cv=cv, n_jobs=n_jobs
+            )
+        elif search == "random":
+            searcher = RandomizedSearchCV(
+                pipeline, param_grid or _search_distributions(), n_iter=n_iter, scoring=scoring,
+                refit="f1_macro", cv=cv, n_jobs=n_jobs, random_state=random_state
+            )
+        else:
+            raise ValueError(f"Recherche inconnue: {search}")
+        
+        print(f"🔄 Recherche {search} ({folds} plis, n_jobs={n_jobs})...")
+        searcher.fit(texts, labels)
+        
+        results = searcher.cv_results_
+        leaderboard = sorted(
+            (
+                {
+                    "rank": int(results["rank_test_f1_macro"][index]),
+                    "params": {name: _json_value(value) for name, value in results["params"][index].items()},
+                    "f1_macro": float(results["mean_test_f1_macro"][index]),
+                    "f1_macro_std": float(results["std_test_f1_macro"][index]),
+                    "accuracy": float(results["mean_test_accuracy"][index]),
+                    "fit_seconds": float(results["mean_fit_time"][index])
+                }
+                for index in range(len(results["params"]))
+            ),
+            key=lambda entry: (entry["rank"], -entry["accuracy"])
+        )
+        
+        best = searcher.best_estimator_
+        self.vectorizer = best.named_steps["vectorizer"]
+        self.classifier = best.named_steps["classifier"]
+        self.data_hash = training_data_hash(training_data)
+        self.training_metrics = {
+            "cv_f1_macro": leaderboard[0]["f1_macro"],
+            "cv_f1_macro_std": leaderboard[0]["f1_macro_std"],
+            "cv_accuracy": leaderboard[0]["accuracy"],
+            "cv_folds": folds,
+            "search": search,
+            "configurations": len(leaderboard),
+            "best_params": leaderboard[0]["params"],
+            "n_examples": len(texts),
+            "examples_seen": len(texts)
+        }
+        self.bundle = None
+        self.is_trained = True
+        return leaderboard
+    
+    def _require_hashing(self):
+        if self.vectorizer_type != "hashing":
+            raise ValueError("L'entraînement incrémental nécessite la vectorisation \"hashing\"")
+    
+    def _partial_fit_vectors(self, vectorized, labels, classes=None):
+        if hasattr(self.classifier, "classes_"):
+            self.classifier.partial_fit(vectorized, labels)
+        elif classes is None:
+            raise ValueError("La liste des intentions (classes) est requise pour le premier lot")
+        else:
+            self.classifier.partial_fit(vectorized, labels, classes=sorted(classes))
+        self.bundle = None
+        self.is_trained = True
+    
+    def partial_fit(self, texts, labels, classes=None):
+        """Met à jour le modèle avec un lot d'exemples (vectorisation "hashing")"""
+        self._require_hashing()
+        processed = preprocessor.preprocess_many(texts)
+        self._partial_fit_vectors(self.vectorizer.transform(processed), list(labels), classes)
+        self.training_metrics["examples_seen"] = self.training_metrics.get("examples_seen", 0) + len(processed)
+    
+    def train_stream(self, examples, classes=None, batch_size=1000):
+        """Entraîne le modèle sur un flux de paires (texte, intention)
+        
+        Le flux est consommé par lots de `batch_size` : la mémoire ne dépend
+        pas de sa longueur. Un modèle déjà entraîné (chargé depuis un bundle)
+        est mis à jour. Chaque lot est évalué avant d'être appris (validation
+        progressive). Les exemples d'intentions inconnues du modèle sont
+        ignorés. Retourne la précision progressive.
+        """
+        self._require_hashing()
+        if hasattr(self.classifier, "classes_"):
+            known = set(self.classifier.classes_.tolist())
+        elif classes is not None:
+            known = set(classes)
+        else:
+            raise ValueError("La liste des intentions (classes) est requise pour un nouveau modèle")
+        
+        # Empreinte des données, chaînée avec celle du modèle mis à jour
+        digest = hashlib.sha256((self.data_hash or "").encode("utf-8"))
+        seen = skipped = evaluated = correct = 0
+        iterator = iter(examples)
+        while True:
+            chunk = list(islice(iterator, batch_size))
+            if not chunk:
+                break
+            pairs = [(text, intent) for text, intent in chunk if intent in known]
+            skipped += len(chunk) - len(pairs)
+            if not pairs:
+                continue
+            
+            texts = preprocessor.preprocess_many([text for text, _ in pairs])
+            labels = np.array([intent for _, intent in pairs])
+            for text, intent in pairs:
+                digest.update(f"{intent}\t{text}\n".encode("utf-8"))
+            vectorized = self.vectorizer.transform(texts)
+            
+            if hasattr(self.classifier, "classes_"):
+                correct += int((self.classifier.predict(vectorized) == labels).sum())
+                evaluated += len(labels)
+            self._partial_fit_vectors(vectorized, labels, known)
+            seen += len(labels)
+        
+        if skipped:
+            print(f"⚠️ {skipped} exemples ignorés (intentions inconnues du modèle)")
+        if not seen:
+            raise ValueError("Aucun exemple d'entraînement exploitable dans le flux")
+        
+        progressive_accuracy = correct / evaluated if evaluated else None
+        self.data_hash = digest.hexdigest()
+        self.training_metrics = {
+            "progressive_accuracy": progressive_accuracy,
+            "n_examples": seen,
+            "examples_seen": self.training_metrics.get("examples_seen", 0) + seen,
+            "skipped": skipped
+        }
+        return progressive_accuracy
+    
+    @metrics.timed("predict_seconds", "Durée de classification d'un message")
     def predict(self, text):
         """Prédit l'intention d'un texte"""
         if not self.is_trained:
@@ -88,47 +322,110 @@ class IntentClassifier:
         # Vectorisation
         vectorized = self.vectorizer.transform([processed])
         
-        # Prédiction
-        intent = self.classifier.predict(vectorized)[0]
+        # Prédiction (une seule passe : l'intention est l'argmax des probabilités)
         probabilities = self.classifier.predict_proba(vectorized)[0]
+        best = int(np.argmax(probabilities))
         
-        # Confiance
-        confidence = max(probabilities)
+        intent = self.classifier.classes_[best]
+        confidence = probabilities[best]
         
         return intent, confidence
     
-    def save(self, model_path=None, vectorizer_path=None):
-        """Sauvegarde le modèle"""
-        model_path = model_path or config.MODEL_PATH
-        vectorizer_path = vectorizer_path or config.VECTORIZER_PATH
+    def predict_batch(self, texts, batch_size=1000):
+        """Prédit les intentions d'une liste de textes
         
-        # Créer le dossier models s'il n'existe pas
-        os.makedirs(os.path.dirname(model_path), exist_ok=True)
-        os.makedirs(os.path.dirname(vectorizer_path), exist_ok=True)
+        Retourne une liste de tuples (intention, confiance) dans l'ordre des textes.
+        """
+        return list(self.iter_predict(texts, batch_size=batch_size))
+    
+    def iter_predict(self, texts, batch_size=1000):
+        """Prédit les intentions d'un flux de textes (générateur)
         
-        with open(model_path, 'wb') as f:
-            pickle.dump(self.classifier, f)
+        Les textes sont consommés par lots de `batch_size` : chaque lot est
+        prétraité, vectorisé en une seule matrice creuse et classé en une
+        seule passe de `predict_proba`. Convient aux entrées plus grandes
+        que la mémoire (fichiers de logs, curseurs MongoDB...).
+        """
+        if not self.is_trained:
+            raise ValueError("Le modèle n'a pas été entraîné")
+        if batch_size < 1:
+            raise ValueError("batch_size doit être supérieur ou égal à 1")
         
-        with open(vectorizer_path, 'wb') as f:
-            pickle.dump(self.vectorizer, f)
+        batch = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) >= batch_size:
+                yield from self._predict_chunk(batch)
+                batch = []
         
-        print(f"✅ Modèle sauvegardé: {model_path}")
-        print(f"✅ Vectoriseur sauvegardé: {vectorizer_path}")
+        if batch:
+            yield from self._predict_chunk(batch)
     
-    def load(self, model_path=None, vectorizer_path=None):
-        """Charge le modèle"""
-        model_path = model_path or config.MODEL_PATH
-        vectorizer_path = vectorizer_path or config.VECTORIZER_PATH
+    @metrics.timed("predict_batch_chunk_seconds", "Durée de classification d'un lot")
+    def _predict_chunk(self, texts):
+        """Classe un lot de textes en une seule passe"""
+        processed = preprocessor.preprocess_many(texts)
+        vectorized = self.vectorizer.transform(processed)
         
-        if not os.path.exists(model_path) or not os.path.exists(vectorizer_path):
+        probabilities = self.classifier.predict_proba(vectorized)
+        best = probabilities.argmax(axis=1)
+        intents = self.classifier.classes_[best]
+        confidences = probabilities[np.arange(len(best)), best]
+        
+        return zip(intents.tolist(), confidences.tolist())
+    
+    def save(self, bundle_path=None):
+        """Sauvegarde le modèle (nouvelle version du bundle, rendue active)"""
+        if not self.is_trained:
+            raise ValueError("Le modèle n'a pas été entraîné")
+        
+        bundle = ModelBundle.from_sklearn(
+            self.vectorizer,
+            self.classifier,
+            data_hash=self.data_hash,
+            metrics=self.training_metrics,
+            preprocessing_version=preprocessor.config_version()
+        )
+        version_path = bundle.save(bundle_path or config.MODEL_BUNDLE_PATH)
+        self.bundle = bundle
+        
+        print(f"✅ Modèle sauvegardé: {version_path}")
+        return version_path
+    
+    def load(self, bundle_path=None, version=None):
+        """Charge le modèle (bundle versionné, sinon ancien format pickle)"""
+        bundle_path = bundle_path or config.MODEL_BUNDLE_PATH
+        
+        try:
+            bundle = ModelBundle.load(bundle_path, version=version)
+        except FileNotFoundError:
+            if version is None and self._load_legacy():
+                return
             raise FileNotFoundError("Modèle non trouvé. Veuillez d'abord entraîner le modèle.")
         
-        with open(model_path, 'rb') as f:
+        bundle.check_preprocessing(preprocessor.config_version())
+        self.vectorizer, self.classifier = bundle.to_sklearn()
+        self.vectorizer_type = bundle.vectorizer_type
+        self.bundle = bundle
+        self.data_hash = bundle.manifest.get("data_hash")
+        self.training_metrics = bundle.manifest.get("metrics", {})
+        self.is_trained = True
+        print(f"✅ Modèle chargé: {bundle.path}")
+    
+    def _load_legacy(self):
+        """Charge l'ancien format (classificateur et vectoriseur picklés séparément)"""
+        if not os.path.exists(config.MODEL_PATH) or not os.path.exists(config.VECTORIZER_PATH):
+            return False
+        
+        with open(config.MODEL_PATH, 'rb') as f:
             self.classifier = pickle.load(f)
         
-        with open(vectorizer_path, 'rb') as f:
+        with open(config.VECTORIZER_PATH, 'rb') as f:
             self.vectorizer = pickle.load(f)
         
+        self.vectorizer_type = "tfidf"
+        self.bundle = None
         self.is_trained = True
-        print(f"✅ Modèle chargé: {model_path}")
+        print(f"⚠️ Modèle chargé depuis l'ancien format: {config.MODEL_PATH} (réentraînez pour créer un bundle)")
+        return True
 
@@ -0,0 +1,345 @@
+"""
+Format de sauvegarde versionné du modèle d'intentions
+
+Un bundle est un dossier contenant un manifeste (`manifest.json` : version
+du format, paramètres du vectoriseur, classes, empreinte des données,
+métriques) et des tableaux NumPy `.npy` (vocabulaire, poids IDF, matrice
+des coefficients, biais). Les modèles à hachage de features (sans
+vocabulaire ni IDF) ne contiennent que les coefficients et les biais. Les `.npy` sont chargés en `mmap_mode="r"` : les
+processus serveurs partagent les mêmes pages mémoire au lieu de
+désérialiser chacun leur copie (une archive `.npz` ne peut pas être
+projetée en mémoire).
+
+Les versions sont rangées dans un dossier racine ; le fichier `CURRENT`
+désigne la version active et est remplacé atomiquement à chaque sauvegarde,
+le vocabulaire et les coefficients ne peuvent donc pas se désynchroniser.
+
+Ce module n'importe pas scikit-learn : seule `to_sklearn()` en a besoin.
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+import numpy as np
+import config
+
+FORMAT_NAME = "intent-classifier-bundle"
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+
+# Paramètres du vectoriseur nécessaires à l'inférence
+VECTORIZER_PARAMS = (
+    "analyzer", "lowercase", "strip_accents", "token_pattern", "ngram_range",
+    "stop_words", "norm", "use_idf", "smooth_idf", "sublinear_tf", "binary", "dtype"
+)
+HASHING_VECTORIZER_PARAMS = (
+    "analyzer", "lowercase", "strip_accents", "token_pattern", "ngram_range",
+    "stop_words", "n_features", "alternate_sign", "norm", "binary", "dtype"
+)
+
+def training_data_hash(training_data):
+    """Empreinte stable des données d'entraînement"""
+    canonical = json.dumps(training_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _json_params(params):
+    """Paramètres sérialisables en JSON (les autres sont ignorés)"""
+    serializable = {}
+    for name, value in params.items():
+        try:
+            json.dumps(value)
+        except TypeError:
+            continue
+        serializable[name] = value
+    return serializable
+
+def _file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ModelBundle:
+    """Modèle d'intentions : tableaux NumPy + manifeste"""
+
+    def __init__(self, manifest, arrays, path=None):
+        self.manifest = manifest
+        self.arrays = arrays
+        self.path = path
+        self._vocabulary = None
+
+    @property
+    def version(self):
+        return self.manifest.get("model_version")
+
+    @property
+    def classes(self):
+        return self.manifest["classes"]
+
+    @property
+    def vectorizer_type(self):
+        """"tfidf" (vocabulaire) ou "hashing" (hachage de features)"""
+        return self.manifest["vectorizer"].get("type", "tfidf")
+
+    @property
+    def terms(self):
+        """Termes du vocabulaire, dans l'ordre des colonnes (vide pour un modèle à hachage)"""
+        blob = self.arrays.get("vocabulary")
+        return bytes(blob).decode("utf-8").split("\n") if blob is not None and len(blob) else []
+
+    @property
+    def vocabulary(self):
+        """Dictionnaire terme -> colonne"""
+        if self._vocabulary is None:
+            self._vocabulary = {term: index for index, term in enumerate(self.terms)}
+        return self._vocabulary
+
+    @property
+    def idf(self):
+        return self.arrays.get("idf")
+
+    @property
+    def coef(self):
+        return self.arrays["coef"]
+
+    @property
+    def intercept(self):
+        return self.arrays["intercept"]
+
+    @staticmethod
+    def from_sklearn(vectorizer, classifier, data_hash=None, metrics=None,
+                     preprocessing_version=None):
+        """Construit un bundle à partir d'un vectoriseur et d'un classificateur linéaire entraînés
+
+        Vectoriseurs : TfidfVectorizer ou HashingVectorizer ; classificateurs :
+        LogisticRegression ou SGDClassifier (perte logistique).
+        `preprocessing_version` est l'empreinte du prétraitement utilisé à
+        l'entraînement (`TextPreprocessor.config_version()`).
+        """
+        hashing = type(vectorizer).__name__ == "HashingVectorizer"
+        arrays = {
+            "coef": np.ascontiguousarray(classifier.coef_, dtype=np.float64),
+            "intercept": np.ascontiguousarray(classifier.intercept_, dtype=np.float64)
+        }
+        if hashing:
+            n_features = vectorizer.n_features
+        else:
+            terms = vectorizer.get_feature_names_out().tolist()
+            n_features = len(terms)
+            arrays["vocabulary"] = np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8)
+            if getattr(vectorizer, "use_idf", False):
+                arrays["idf"] = np.ascontiguousarray(vectorizer.idf_, dtype=np.float64)
+
+        params = vectorizer.get_params()
+        vectorizer_params = {"type": "hashing" if hashing else "tfidf"}
+        for name in (HASHING_VECTORIZER_PARAMS if hashing else VECTORIZER_PARAMS):
+            value = params.get(name)
+            if name == "dtype":
+                value = np.dtype(value).name
+            elif name == "stop_words" and value is not None and not isinstance(value, str):
+                value = sorted(value)
+            elif isinstance(value, tuple):
+                value = list(value)
+            vectorizer_params[name] = value
+
+        classes = classifier.classes_.tolist()
+        classifier_name = type(classifier).__name__
+        if len(classes) <= 2:
+            probability = "sigmoid"
+        elif classifier_name == "LogisticRegression":
+            probability = "softmax"
+        else:
+            # SGDClassifier : sigmoïdes un contre tous, normalisées
+            probability = "ovr"
+
+        manifest = {
+            "format": FORMAT_NAME,
+            "format_version": FORMAT_VERSION,
+            "model_version": None,
+            "created_at": None,
+            "model_type": f"{vectorizer_params['type']}-{classifier_name}",
+            "classes": classes,
+            "n_features": n_features,
+            "probability": probability,
+            "vectorizer": vectorizer_params,
+            "classifier": {
+                "class": classifier_name,
+                "params": _json_params(classifier.get_params()),
+                # Compteur du pas d'apprentissage (reprise de partial_fit)
+                "t_": getattr(classifier, "t_", None)
+            },
+            "data_hash": data_hash,
+            "preprocessing_version": preprocessing_version,
+            "metrics": metrics or {},
+            "arrays": {}
+        }
+        return ModelBundle(manifest, arrays)
+
+    def check_preprocessing(self, preprocessing_version):
+        """Signale un bundle entraîné avec un autre prétraitement que celui du service
+
+        Retourne False (après un avertissement) si les empreintes diffèrent ;
+        les bundles antérieurs, sans empreinte, ne sont pas vérifiés. Le
+        calcul de l'empreinte importe nltk (et donc scikit-learn) : la
+        vérification est faite par `IntentClassifier.load`, pas par le
+        moteur NumPy.
+        """
+        recorded = self.manifest.get("preprocessing_version")
+        if recorded is None or recorded == preprocessing_version:
+            return True
+        print(
+            f"⚠️ Prétraitement différent de l'entraînement (bundle {self.version}: "
+            f"{recorded}, service: {preprocessing_version}) ; les prédictions "
+            f"peuvent être dégradées, réentraînez le modèle"
+        )
+        return False
+
+    def to_sklearn(self):
+        """Reconstruit (vectoriseur, classificateur) scikit-learn à partir des tableaux"""
+        from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+        params = dict(self.manifest["vectorizer"])
+        params.pop("type", None)
+        params["ngram_range"] = tuple(params["ngram_range"])
+        params["dtype"] = np.dtype(params["dtype"]).type
+        if self.vectorizer_type == "hashing":
+            vectorizer = HashingVectorizer(**params)
+        else:
+            vectorizer = TfidfVectorizer(vocabulary=self.vocabulary, **params)
+            vectorizer._validate_vocabulary()
+            if self.idf is not None:
+                vectorizer.idf_ = self.idf
+
+        classifier_manifest = self.manifest.get("classifier", {})
+        if classifier_manifest.get("class") == "SGDClassifier":
+            classifier = SGDClassifier(**classifier_manifest.get("params", {}))
+            # Copies modifiables : partial_fit met à jour les coefficients en place
+            classifier.coef_ = np.array(self.coef)
+            classifier.intercept_ = np.array(self.intercept)
+            classifier.t_ = classifier_manifest.get("t_") or 1.0
+        else:
+            classifier = LogisticRegression()
+            classifier.coef_ = self.coef
+            classifier.intercept_ = self.intercept
+        classifier.classes_ = np.array(self.classes)
+        classifier.n_features_in_ = self.coef.shape[1]
+        return vectorizer, classifier
+
+    def _content_hash(self):
+        digest = hashlib.sha256()
+        for name in sorted(self.arrays):
+            digest.update(name.encode("utf-8"))
+            digest.update(np.ascontiguousarray(self.arrays[name]).tobytes())
+        digest.update(json.dumps(self.classes).encode("utf-8"))
+        return digest.hexdigest()
+
+    def save(self, root=None, keep=5):
+        """Écrit une nouvelle version du bundle et la rend active
+
+        Retourne le dossier de la version. Les versions les plus anciennes
+        au-delà de `keep` sont supprimées (jamais la version active).
+        """
+        root = root or config.MODEL_BUNDLE_PATH
+        os.makedirs(root, exist_ok=True)
+
+        content_hash = self._content_hash()
+        now = datetime.now()
+        version = f"{now.strftime('%Y%m%d-%H%M%S')}-{content_hash[:8]}"
+        version_path = os.path.join(root, version)
+
+        if not os.path.isdir(version_path):
+            temp_path = os.path.join(root, f".tmp-{version}-{os.getpid()}")
+            os.makedirs(temp_path)
+            manifest = dict(self.manifest, model_version=version, created_at=now.isoformat(), arrays={})
+            for name, array in self.arrays.items():
+                file_name = f"{name}.npy"
+                file_path = os.path.join(temp_path, file_name)
+                np.save(file_path, np.ascontiguousarray(array), allow_pickle=False)
+                manifest["arrays"][name] = {
+                    "file": file_name,
+                    "dtype": np.dtype(array.dtype).str,
+                    "shape": list(array.shape),
+                    "sha256": _file_sha256(file_path)
+                }
+            with open(os.path.join(temp_path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            os.rename(temp_path, version_path)
+            self.manifest = manifest
+        else:
+            with open(os.path.join(version_path, MANIFEST_FILE), encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+        set_current_version(root, version)
+        self.path = version_path
+        prune_versions(root, keep=keep)
+        return version_path
+
+    @staticmethod
+    def load(root=None, version=None, mmap=True, verify=False):
+        """Charge une version du bundle (la version active par défaut)"""
+        root = root or config.MODEL_BUNDLE_PATH
+        version = version or current_version(root)
+        if version is None:
+            raise FileNotFoundError(f"Aucun bundle de modèle dans {root}")
+
+        version_path = os.path.join(root, version)
+        with open(os.path.join(version_path, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest.get("format") != FORMAT_NAME:
+            raise ValueError(f"Format de bundle inconnu: {manifest.get('format')}")
+        if manifest.get("format_version", 0) > FORMAT_VERSION:
+            raise ValueError(
+                f"Bundle au format v{manifest['format_version']}, "
+                f"version supportée: v{FORMAT_VERSION}"
+            )
+
+        arrays = {}
+        for name, description in manifest["arrays"].items():
+            file_path = os.path.join(version_path, description["file"])
+            if verify and _file_sha256(file_path) != description["sha256"]:
+                raise ValueError(f"Tableau corrompu: {file_path}")
+            arrays[name] = np.load(file_path, mmap_mode="r" if mmap else None, allow_pickle=False)
+        return ModelBundle(manifest, arrays, path=version_path)
+
+def current_version(root=None):
+    """Version active (contenu du fichier CURRENT), ou None"""
+    root = root or config.MODEL_BUNDLE_PATH
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def set_current_version(root, version):
+    """Active une version (remplacement atomique du fichier CURRENT)"""
+    if not os.path.isfile(os.path.join(root, version, MANIFEST_FILE)):
+        raise FileNotFoundError(f"Version de modèle inconnue: {version}")
+    temp_file = os.path.join(root, f".{CURRENT_FILE}.{os.getpid()}")
+    with open(temp_file, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(temp_file, os.path.join(root, CURRENT_FILE))
+
+def list_versions(root=None):
+    """Versions disponibles, de la plus ancienne à la plus récente"""
+    root = root or config.MODEL_BUNDLE_PATH
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if not name.startswith(".") and os.path.isfile(os.path.join(root, name, MANIFEST_FILE))
+    )
+
+def prune_versions(root=None, keep=5):
+    """Supprime les versions les plus anciennes (jamais la version active)"""
+    root = root or config.MODEL_BUNDLE_PATH
+    active = current_version(root)
+    versions = [version for version in list_versions(root) if version != active]
+    removable = versions[:max(0, len(versions) - max(keep - 1, 0))]
+    for version in removable:
+        shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+    return removable
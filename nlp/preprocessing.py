@@ -1,41 +1,170 @@
 """
 Module de prétraitement NLP
+
+Les ressources lourdes (NLTK, modèle spaCy) sont chargées paresseusement au
+premier usage : importer ce module est quasi instantané. Les ressources NLTK
+ne sont jamais téléchargées sur le chemin de service ; utilisez
+`download_nltk_resources()` (appelé par scripts/train_model.py).
 """
+import hashlib
+import json
+import multiprocessing
+import os
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import SnowballStemmer
-import spacy
-
-# Téléchargement des ressources NLTK nécessaires
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords', quiet=True)
+from functools import lru_cache
+from monitoring.metrics import metrics
+import config
+
+# À incrémenter à chaque changement du pipeline modifiant sa sortie
+# (invalide le cache de prétraitement des données d'entraînement)
+PIPELINE_VERSION = 1
+
+# Caractères conservés par clean_text (en plus des espaces)
+KEPT_CHARACTERS = "abcdefghijklmnopqrstuvwxyzàâäéèêëïîôöùûüÿç"
+
+# Expressions compilées une seule fois (pipeline de référence)
+_SPECIAL_CHARACTERS_RE = re.compile(r'[^a-zàâäéèêëïîôöùûüÿç\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Découpages appliqués par word_tokenize (Treebank) à un texte ne contenant
+# que des lettres et des espaces : ce sont les seules différences avec split()
+_TREEBANK_CONTRACTIONS = {
+    "cannot": ("can", "not"),
+    "gimme": ("gim", "me"),
+    "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"),
+    "lemme": ("lem", "me"),
+    "wanna": ("wan", "na")
+}
+
+class _CleaningTable(dict):
+    """Table de traduction pour str.translate, complétée à la demande
+    
+    Les lettres conservées sont inchangées, tout caractère d'espacement
+    devient une espace et les autres caractères sont supprimés, ce qui
+    équivaut aux deux substitutions de clean_text.
+    """
+    
+    # Au-delà, les entrées ne sont pas mémorisées pour borner la table
+    MAX_CACHED_CODEPOINT = 0x3000
+    
+    def __init__(self):
+        super().__init__()
+        for codepoint in range(128):
+            self[codepoint] = self._translate(codepoint)
+    
+    @staticmethod
+    def _translate(codepoint):
+        char = chr(codepoint)
+        if char in KEPT_CHARACTERS:
+            return codepoint
+        if char.isspace():
+            return ord(' ')
+        return None
+    
+    def __missing__(self, codepoint):
+        value = self._translate(codepoint)
+        if codepoint < self.MAX_CACHED_CODEPOINT:
+            self[codepoint] = value
+        return value
+
+_CLEANING_TABLE = _CleaningTable()
+
+# Ressources NLTK utilisées (nom -> chemin dans nltk.data)
+NLTK_RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords"
+}
+
+@lru_cache(maxsize=None)
+def has_nltk_resource(name):
+    """Vérifie une seule fois la présence d'une ressource NLTK"""
+    import nltk
+    try:
+        nltk.data.find(NLTK_RESOURCES[name])
+        return True
+    except LookupError:
+        return False
+
+def download_nltk_resources(names=None, quiet=True):
+    """Télécharge les ressources NLTK manquantes"""
+    import nltk
+    for name in names or NLTK_RESOURCES:
+        if not has_nltk_resource(name):
+            nltk.download(name, quiet=quiet)
+    has_nltk_resource.cache_clear()
+
+# Prétraiteur propre à chaque processus de preprocess_many (initialisé une fois)
+_worker_preprocessor = None
+
+def _init_worker(fast, stem_cache_size):
+    global _worker_preprocessor
+    _worker_preprocessor = TextPreprocessor(fast=fast, stem_cache_size=stem_cache_size)
+    _worker_preprocessor.load_resources()
+
+def _preprocess_chunk(task):
+    texts, remove_stopwords, apply_stemming = task
+    preprocess = _worker_preprocessor.preprocess
+    return [preprocess(text, remove_stopwords, apply_stemming) for text in texts]
 
 class TextPreprocessor:
     """Classe pour le prétraitement du texte"""
     
-    def __init__(self):
-        self.stemmer = SnowballStemmer('french')
-        try:
-            self.nlp = spacy.load("fr_core_news_sm")
-        except OSError:
-            # Fallback for environments without the model package.
-            print("spaCy model 'fr_core_news_sm' not found; using blank 'fr' model.")
-            self.nlp = spacy.blank("fr")
-        # Stopwords français
-        try:
-            self.stop_words = set(stopwords.words('french'))
-        except LookupError:
-            nltk.download('stopwords', quiet=True)
-            self.stop_words = set(stopwords.words('french'))
+    def __init__(self, fast=None, stem_cache_size=None):
+        # Pipeline optimisé (sortie identique au pipeline de référence)
+        self.fast = config.PREPROCESSING_FAST_PATH if fast is None else fast
+        self.stem_cache_size = stem_cache_size or config.STEM_CACHE_SIZE
+        self._stemmer = None
+        self._stop_words = None
+        self._nlp = None
+        self._word_tokenize = None
+        self._cached_stem = None
+    
+    @property
+    def stemmer(self):
+        """Stemmer Snowball français (chargé au premier usage)"""
+        if self._stemmer is None:
+            from nltk.stem import SnowballStemmer
+            self._stemmer = SnowballStemmer('french')
+        return self._stemmer
+    
+    @property
+    def cached_stem(self):
+        """Stemming mémoïsé (cache LRU borné)"""
+        if self._cached_stem is None:
+            self._cached_stem = lru_cache(maxsize=self.stem_cache_size)(self.stemmer.stem)
+        return self._cached_stem
+    
+    @property
+    def stop_words(self):
+        """Stopwords français (chargés au premier usage, LookupError si absents)"""
+        if self._stop_words is None:
+            if has_nltk_resource('stopwords'):
+                from nltk.corpus import stopwords
+                self._stop_words = set(stopwords.words('french'))
+            else:
+                # Une liste vide donnerait au service une sortie différente
+                # de celle vue à l'entraînement : on refuse de continuer
+                raise LookupError(
+                    "Stopwords NLTK introuvables ; exécutez "
+                    "`python -c \"from nlp.preprocessing import download_nltk_resources; "
+                    "download_nltk_resources()\"`"
+                )
+        return self._stop_words
+    
+    @property
+    def nlp(self):
+        """Modèle spaCy (chargé à la première extraction d'entités)"""
+        if self._nlp is None:
+            import spacy
+            try:
+                self._nlp = spacy.load(config.SPACY_MODEL)
+            except OSError:
+                # Fallback for environments without the model package.
+                print(f"spaCy model '{config.SPACY_MODEL}' not found; using blank 'fr' model.")
+                self._nlp = spacy.blank("fr")
+        return self._nlp
     
     def clean_text(self, text):
         """Nettoie le texte"""
@@ -45,32 +174,120 @@ class TextPreprocessor:
         # Conversion en minuscules
         text = text.lower()
         
+        if self.fast:
+            # Table de traduction précompilée + normalisation des espaces
+            return ' '.join(text.translate(_CLEANING_TABLE).split())
+        
         # Suppression des caractères spéciaux (garder les accents)
-        text = re.sub(r'[^a-zàâäéèêëïîôöùûüÿç\s]', '', text)
+        text = _SPECIAL_CHARACTERS_RE.sub('', text)
         
         # Suppression des espaces multiples
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         return text.strip()
     
+    def _punkt_available(self):
+        """Détermine une seule fois si le tokeniseur Punkt est utilisable"""
+        if self._word_tokenize is None:
+            try:
+                from nltk.tokenize import word_tokenize
+                word_tokenize("test", language='french')
+                self._word_tokenize = word_tokenize
+            except Exception:
+                self._word_tokenize = False
+        return bool(self._word_tokenize)
+    
+    def tokenize_fast(self, text):
+        """Tokenise un texte déjà nettoyé (lettres et espaces uniquement)
+        
+        Équivalent à `tokenize` sur la sortie de `clean_text`, sans Punkt.
+        """
+        tokens = text.split()
+        if self._punkt_available() and not _TREEBANK_CONTRACTIONS.keys().isdisjoint(tokens):
+            split_tokens = []
+            for token in tokens:
+                split_tokens.extend(_TREEBANK_CONTRACTIONS.get(token, (token,)))
+            return split_tokens
+        return tokens
+    
     def tokenize(self, text):
         """Tokenise le texte"""
+        if not self._punkt_available():
+            return text.split()
         try:
-            tokens = word_tokenize(text, language='french')
+            tokens = self._word_tokenize(text, language='french')
             return tokens
         except:
             return text.split()
     
     def remove_stopwords(self, tokens):
         """Supprime les stopwords"""
-        return [token for token in tokens if token not in self.stop_words]
+        stop_words = self.stop_words
+        return [token for token in tokens if token not in stop_words]
     
     def stem(self, tokens):
         """Applique le stemming"""
-        return [self.stemmer.stem(token) for token in tokens]
+        stem = self.stemmer.stem
+        return [stem(token) for token in tokens]
+    
+    def config_version(self, remove_stopwords=True, apply_stemming=True):
+        """Empreinte de la configuration déterminant la sortie de `preprocess`
+        
+        Les pipelines rapide et de référence donnent la même sortie et
+        partagent donc la même version. La version installée de nltk et la
+        présence de Punkt n'en font pas partie : elles ne changent pas la
+        sortie sur un texte nettoyé.
+        """
+        settings = {
+            "pipeline": PIPELINE_VERSION,
+            "kept_characters": KEPT_CHARACTERS,
+            "stop_words": sorted(self.stop_words) if remove_stopwords else None,
+            "stemmer": ["snowball", "french"] if apply_stemming else None
+        }
+        canonical = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
     
+    def load_resources(self):
+        """Charge stemmer, stopwords et tokeniseur (sinon chargés au premier usage)"""
+        self.stemmer
+        self.stop_words
+        self._punkt_available()
+    
+    def preprocess_many(self, texts, n_jobs=None, remove_stopwords=True, apply_stemming=True,
+                        chunk_size=None):
+        """Prétraite une liste de textes sur plusieurs processus, dans l'ordre
+        
+        Les textes sont découpés en lots répartis entre `n_jobs` processus
+        (tous les cœurs si None ou négatif) ; chaque processus charge son
+        stemmer et ses stopwords une seule fois. En dessous de
+        `config.PREPROCESSING_PARALLEL_MIN_TEXTS` textes, le traitement
+        reste dans le processus courant.
+        """
+        texts = list(texts)
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count() or 1
+        if n_jobs == 1 or len(texts) < config.PREPROCESSING_PARALLEL_MIN_TEXTS:
+            return [self.preprocess(text, remove_stopwords, apply_stemming) for text in texts]
+        
+        # Quelques lots par processus : équilibre la charge sans multiplier les échanges
+        chunk_size = chunk_size or max(1, -(-len(texts) // (n_jobs * 4)))
+        tasks = [
+            (texts[start:start + chunk_size], remove_stopwords, apply_stemming)
+            for start in range(0, len(texts), chunk_size)
+        ]
+        with multiprocessing.Pool(n_jobs, initializer=_init_worker,
+                                  initargs=(self.fast, self.stem_cache_size)) as pool:
+            results = []
+            for processed in pool.imap(_preprocess_chunk, tasks):
+                results.extend(processed)
+        return results
+    
+    @metrics.timed("preprocess_seconds", "Durée du prétraitement d'un texte")
     def preprocess(self, text, remove_stopwords=True, apply_stemming=True):
         """Pipeline complet de prétraitement"""
+        if self.fast:
+            return self._preprocess_fast(text, remove_stopwords, apply_stemming)
+        
         # Nettoyage
         cleaned = self.clean_text(text)
         
@@ -87,6 +304,22 @@ class TextPreprocessor:
         
         return ' '.join(tokens)
     
+    def _preprocess_fast(self, text, remove_stopwords, apply_stemming):
+        """Pipeline optimisé : traduction, split, filtrage et stemming fusionnés"""
+        tokens = self.tokenize_fast(self.clean_text(text))
+        
+        if remove_stopwords:
+            stop_words = self.stop_words
+            if apply_stemming:
+                stem = self.cached_stem
+                return ' '.join([stem(token) for token in tokens if token not in stop_words])
+            return ' '.join([token for token in tokens if token not in stop_words])
+        
+        if apply_stemming:
+            stem = self.cached_stem
+            return ' '.join([stem(token) for token in tokens])
+        return ' '.join(tokens)
+    
     def extract_entities(self, text):
         """Extrait les entités nommées avec spaCy"""
         doc = self.nlp(text)
@@ -97,7 +330,7 @@ class TextPreprocessor:
         
         return entities
 
-# Instance globale
+# Instance globale (aucune ressource n'est chargée avant le premier usage)
 preprocessor = TextPreprocessor()
 
 
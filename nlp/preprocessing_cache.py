@@ -0,0 +1,91 @@
+"""
+Cache persistant du prétraitement des données d'entraînement
+
+Chaque texte est identifié par son empreinte (BLAKE2b 128 bits) ; le cache
+n'est valable que pour une version de la configuration du prétraitement
+(`TextPreprocessor.config_version`) : changer les stopwords, le stemmer ou
+le nettoyage invalide toutes les entrées. Un réentraînement ne prétraite
+donc que les exemples nouveaux ou modifiés, répartis sur plusieurs
+processus.
+
+Format sur disque : JSON Lines compressé en gzip, une ligne d'en-tête
+(format, version) puis une ligne `[empreinte, texte prétraité]` par entrée.
+Le fichier est réécrit atomiquement et ne garde que les entrées utilisées
+lors de la dernière préparation.
+"""
+import gzip
+import hashlib
+import json
+import os
+import config
+from nlp.preprocessing import preprocessor
+
+FORMAT_NAME = "preprocessing-cache"
+FORMAT_VERSION = 1
+
+def text_digest(text):
+    """Empreinte d'un texte brut (clé du cache)"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+class PreprocessingCache:
+    """Textes prétraités indexés par empreinte, pour une version du prétraitement"""
+
+    def __init__(self, path=None, version=None):
+        self.path = path or config.PREPROCESSING_CACHE_PATH
+        self.version = version or preprocessor.config_version()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """Charge les entrées du fichier (ignoré s'il est absent ou d'une autre version)"""
+        self.entries = {}
+        if not os.path.exists(self.path):
+            return self
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("format") != FORMAT_NAME or header.get("version") != self.version:
+                    print("ℹ️ Cache de prétraitement obsolète (configuration modifiée), reconstruction")
+                    return self
+                for line in f:
+                    digest, processed = json.loads(line)
+                    self.entries[digest] = processed
+        except (OSError, EOFError, ValueError) as e:
+            print(f"⚠️ Cache de prétraitement illisible ({e}), reconstruction")
+            self.entries = {}
+        return self
+
+    def save(self):
+        """Réécrit le fichier atomiquement"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, f".tmp-{os.path.basename(self.path)}")
+        header = {"format": FORMAT_NAME, "format_version": FORMAT_VERSION,
+                  "version": self.version, "count": len(self.entries)}
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            for digest, processed in self.entries.items():
+                f.write(json.dumps([digest, processed], ensure_ascii=False) + "\n")
+        os.replace(temp_path, self.path)
+
+    def preprocess(self, texts, n_jobs=None):
+        """Textes prétraités, dans l'ordre ; seuls les textes absents du cache sont calculés
+
+        Les entrées qui ne correspondent à aucun de ces textes sont retirées.
+        """
+        digests = [text_digest(text) for text in texts]
+        missing = {}
+        for digest, text in zip(digests, texts):
+            if digest not in self.entries:
+                missing.setdefault(digest, text)
+
+        self.misses = len(missing)
+        self.hits = len(texts) - sum(1 for digest in digests if digest in missing)
+        if missing:
+            processed = preprocessor.preprocess_many(list(missing.values()), n_jobs=n_jobs)
+            self.entries.update(zip(missing, processed))
+
+        used = dict.fromkeys(digests)
+        self.entries = {digest: self.entries[digest] for digest in used}
+        return [self.entries[digest] for digest in digests]
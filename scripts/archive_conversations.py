@@ -0,0 +1,46 @@
+"""
+Archivage des anciennes conversations en JSON Lines gzip (job périodique)
+
+Chaque jour révolu plus ancien que `CONVERSATION_ARCHIVE_AFTER_DAYS` est
+exporté dans `CONVERSATION_ARCHIVE_DIR/conversations-AAAA-MM-JJ.jsonl.gz` ;
+les jours déjà archivés sont ignorés. La suppression est normalement
+assurée par la rétention TTL (`CONVERSATION_RETENTION_DAYS`).
+
+Usage :
+    python scripts/archive_conversations.py
+    python scripts/archive_conversations.py --after-days 7 --delete
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Ajouter le répertoire parent au path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.schema import archive_conversations, ensure_conversation_indexes
+import config
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Archivage des anciennes conversations")
+    parser.add_argument("--after-days", type=int, default=config.CONVERSATION_ARCHIVE_AFTER_DAYS,
+                        help="Archiver les jours plus anciens que N jours")
+    parser.add_argument("--output-dir", default=config.CONVERSATION_ARCHIVE_DIR,
+                        help="Dossier des archives")
+    parser.add_argument("--delete", action="store_true",
+                        help="Supprimer de MongoDB les conversations archivées")
+    args = parser.parse_args()
+
+    ensure_conversation_indexes(archive_after_days=args.after_days)
+    before = datetime.now() - timedelta(days=args.after_days)
+    archived = archive_conversations(before=before, directory=args.output_dir, delete=args.delete)
+
+    for day, count in archived.items():
+        print(f"📦 {day:%Y-%m-%d} : {count} conversations archivées")
+    total = sum(archived.values())
+    print(f"✅ {total} conversations archivées dans {args.output_dir}"
+          f"{' et supprimées' if args.delete else ''}")
+
+if __name__ == "__main__":
+    main()
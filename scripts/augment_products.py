@@ -1,69 +1,101 @@
-import json
-import random
 import os
+import random
+import sys
+
+# Ajouter le répertoire du projet au path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.generate_catalog import ADJECTIVES, BRANDS, MATERIALS
+from scripts.json_stream import JsonRecordWriter, iter_json_records
 
 # Chemins des fichiers
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
 PRODUCTS_FILE = os.path.join(DATA_DIR, "products.json")
 
-def augment_products(target_count=1000):
-    if not os.path.exists(PRODUCTS_FILE):
-        print(f"Erreur : Le fichier {PRODUCTS_FILE} n'existe pas.")
+# Nombre maximal de produits existants conservés en mémoire comme templates
+MAX_TEMPLATES = 10000
+
+# Tirages successifs sans nouveau nom avant de considérer les combinaisons épuisées
+MAX_CONSECUTIVE_DUPLICATES = 1000
+
+def augment_products(target_count=1000, input_file=PRODUCTS_FILE, output_file=None, seed=None):
+    """Complète le catalogue jusqu'à `target_count` produits
+
+    Les produits existants sont relus et réécrits en flux (tableau JSON ou
+    JSON Lines) : seuls les noms et un échantillon borné de templates sont
+    gardés en mémoire. Pour de très gros catalogues, voir
+    `scripts/generate_catalog.py`.
+    """
+    rng = random.Random(seed)
+    output_file = output_file or input_file
+    if not os.path.exists(input_file):
+        print(f"Erreur : Le fichier {input_file} n'existe pas.")
         return
 
-    with open(PRODUCTS_FILE, 'r', encoding='utf-8') as f:
-        existing_products = json.load(f)
+    names = set()
+    templates = []
+    # Le fichier temporaire garde l'extension (format et compression) de la sortie
+    temp_file = os.path.join(os.path.dirname(output_file), f".tmp-{os.path.basename(output_file)}")
+
+    with JsonRecordWriter(temp_file) as writer:
+        # Recopier les produits existants et échantillonner les templates (reservoir sampling)
+        for index, product in enumerate(iter_json_records(input_file)):
+            writer.write(product)
+            names.add(product['name'])
+            if len(templates) < MAX_TEMPLATES:
+                templates.append(product)
+            else:
+                slot = rng.randint(0, index)
+                if slot < MAX_TEMPLATES:
+                    templates[slot] = product
+
+        print(f"Nombre de produits actuels : {writer.count}")
+        existing_count = writer.count
+
+        consecutive_duplicates = 0
+        while templates and writer.count < target_count:
+            template = rng.choice(templates)
+            adj = rng.choice(ADJECTIVES)
+            mat = rng.choice(MATERIALS)
+            brand = rng.choice(BRANDS)
+
+            # Créer un nouveau nom et une nouvelle description
+            new_name = f"{template['name']} {adj} {brand}"
+            new_description = f"{template['description']}. Ce modèle {adj} {mat} de la marque {brand} est un incontournable."
+
+            # Faire varier légèrement le prix (entre -20% et +40%)
+            price_variation = rng.uniform(0.8, 1.4)
+            new_price = round(template['price'] * price_variation, 2)
+
+            # Vérifier l'unicité du nom pour éviter les doublons exacts
+            if new_name in names:
+                consecutive_duplicates += 1
+                if consecutive_duplicates >= MAX_CONSECUTIVE_DUPLICATES:
+                    print(f"⚠️ Combinaisons épuisées après {writer.count} produits")
+                    break
+                continue
+            consecutive_duplicates = 0
+            names.add(new_name)
+
+            # Créer le nouveau produit
+            writer.write({
+                "name": new_name,
+                "category": template['category'],
+                "gender": template['gender'],
+                "price": new_price,
+                "description": new_description,
+                "size": template['size'],
+                "color": template['color']
+            })
 
-    print(f"Nombre de produits actuels : {len(existing_products)}")
-    
-    if len(existing_products) >= target_count:
+    if existing_count >= target_count:
         print("Le nombre cible est déjà atteint ou dépassé.")
+        os.remove(temp_file)
         return
 
-    # Listes pour la génération synthétique
-    adjectives = ["élégant", "moderne", "vintage", "confortable", "premium", "eco-friendly", "chic", "décontracté", "sportif", "classique", "tendance", "luxueux"]
-    materials = ["en coton", "en lin", "en laine", "en soie", "en cuir synthétique", "en denim", "en velours", "en polyester recyclé"]
-    brands = ["EcoStyle", "UrbanFit", "LuxeWear", "DailyBasic", "TrendSetters", "NordicDesign", "ModaViva", "PureCotton"]
-    
-    new_products = list(existing_products)
-    
-    # Utiliser les produits existants comme templates
-    templates = existing_products
-    
-    while len(new_products) < target_count:
-        template = random.choice(templates)
-        adj = random.choice(adjectives)
-        mat = random.choice(materials)
-        brand = random.choice(brands)
-        
-        # Créer un nouveau nom et une nouvelle description
-        new_name = f"{template['name']} {adj} {brand}"
-        new_description = f"{template['description']}. Ce modèle {adj} {mat} de la marque {brand} est un incontournable."
-        
-        # Faire varier légèrement le prix (entre -20% et +40%)
-        price_variation = random.uniform(0.8, 1.4)
-        new_price = round(template['price'] * price_variation, 2)
-        
-        # Créer le nouveau produit
-        new_product = {
-            "name": new_name,
-            "category": template['category'],
-            "gender": template['gender'],
-            "price": new_price,
-            "description": new_description,
-            "size": template['size'],
-            "color": template['color']
-        }
-        
-        # Vérifier l'unicité du nom pour éviter les doublons exacts
-        if not any(p['name'] == new_name for p in new_products):
-            new_products.append(new_product)
-
-    # Sauvegarder les produits augmentés
-    with open(PRODUCTS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(new_products, f, ensure_ascii=False, indent=2)
-    
-    print(f"Succès : Le fichier contient maintenant {len(new_products)} produits.")
+    # Remplacement atomique du fichier de sortie
+    os.replace(temp_file, output_file)
+    print(f"Succès : Le fichier contient maintenant {writer.count} produits.")
 
 if __name__ == "__main__":
     augment_products(1000)
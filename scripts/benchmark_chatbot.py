@@ -0,0 +1,320 @@
+"""
+Benchmark de charge et de latence du chatbot
+
+Rejoue les exemples de data/training_data.json, les messages de
+scripts/test_chatbot.py et du trafic synthétique à travers
+ChatbotEngine.process_message, avec une concurrence configurable, et mesure
+la latence (p50/p95/p99), le débit et le temps passé par étape :
+prétraitement, vectorisation, classification, génération de la réponse et
+persistance.
+
+Exemples :
+    python scripts/benchmark_chatbot.py --mongomock --requests 5000 --concurrency 8
+    python scripts/benchmark_chatbot.py --mongomock --output bench.json --baseline bench_main.json
+    python scripts/benchmark_chatbot.py --sqlite --requests 5000 --concurrency 8
+
+--mongomock remplace MongoDB par une base en mémoire (pip install mongomock),
+chargée depuis data/products.json et data/faq.json ; --sqlite utilise le
+backend SQLite dans un fichier temporaire, chargé depuis les mêmes fichiers.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajouter le répertoire parent au path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.mongodb_connection import mongodb
+from database.storage import create_storage, use_storage
+from nlp.preprocessing import preprocessor
+from scripts.test_chatbot import TEST_MESSAGES
+import config
+
+STAGES = ("preprocess", "vectorize", "classify", "response", "persistence")
+
+# Vocabulaire du trafic synthétique
+SYNTHETIC_TEMPLATES = [
+    "{greeting}",
+    "{greeting} je cherche {article} {gender}",
+    "avez vous {article} {color} {gender}",
+    "montre moi {article} {gender}",
+    "{question} la livraison",
+    "{question} le paiement par carte",
+    "{question} retourner {article}",
+    "y a t il des soldes sur {article}",
+    "{farewell}"
+]
+SYNTHETIC_WORDS = {
+    "greeting": ["bonjour", "salut", "bonsoir", "hello", "coucou"],
+    "farewell": ["au revoir", "merci au revoir", "bonne journée", "à bientôt"],
+    "article": ["une robe", "des chemises", "un pantalon", "des t-shirts", "une veste",
+                "des chaussures", "une jupe", "un pull", "un manteau"],
+    "gender": ["pour homme", "pour femme", "", "unisexe"],
+    "color": ["noir", "blanc", "bleu", "rouge", "vert"],
+    "question": ["comment fonctionne", "combien coûte", "quels sont les délais pour",
+                 "comment se passe"]
+}
+
+class StageTimer:
+    """Chronométrage par étape, par requête et par thread
+
+    Seule l'étape la plus externe est comptée : le prétraitement appelé par
+    la recherche de produits est compté dans la génération de la réponse.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def start_request(self):
+        self._local.stages = dict.fromkeys(STAGES, 0.0)
+        self._local.active = None
+
+    def stop_request(self):
+        return self._local.stages
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            if getattr(self._local, "active", None) is not None or not hasattr(self._local, "stages"):
+                return func(*args, **kwargs)
+            self._local.active = stage
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.stages[stage] += time.perf_counter() - start
+                self._local.active = None
+        return timed
+
+def instrument(engine, timer):
+    """Enveloppe les étapes du moteur avec le chronométrage"""
+    preprocessor.preprocess = timer.wrap("preprocess", preprocessor.preprocess)
+    classifier = engine.intent_classifier
+    if hasattr(classifier, "vectorizer"):
+        classifier.vectorizer.transform = timer.wrap("vectorize", classifier.vectorizer.transform)
+        classifier.classifier.predict_proba = timer.wrap("classify", classifier.classifier.predict_proba)
+    else:
+        # Moteur NumPy
+        classifier.vectorize = timer.wrap("vectorize", classifier.vectorize)
+        classifier.scores = timer.wrap("classify", classifier.scores)
+    engine.response_generator.generate_response = timer.wrap(
+        "response", engine.response_generator.generate_response
+    )
+    engine.save_conversation = timer.wrap("persistence", engine.save_conversation)
+
+def use_mongomock():
+    """Remplace MongoDB par une base en mémoire chargée depuis data/"""
+    try:
+        import mongomock
+    except ImportError:
+        print("❌ mongomock n'est pas installé (pip install mongomock)")
+        sys.exit(1)
+
+    mongodb.use_client(mongomock.MongoClient())
+    for collection_name, path in (("products", config.PRODUCTS_DATA_PATH), ("faq", config.FAQ_DATA_PATH)):
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        if records:
+            mongodb.get_collection(collection_name).insert_many(records)
+
+def use_sqlite():
+    """Utilise le backend SQLite (fichier temporaire) chargé depuis data/"""
+    directory = tempfile.mkdtemp(prefix="chatbot-bench-")
+    storage = use_storage(create_storage("sqlite", path=os.path.join(directory, "chatbot.sqlite3")))
+    with open(config.PRODUCTS_DATA_PATH, 'r', encoding='utf-8') as f:
+        storage.upsert_products(json.load(f))
+    with open(config.FAQ_DATA_PATH, 'r', encoding='utf-8') as f:
+        storage.replace_faq(json.load(f))
+    return directory
+
+def build_messages(n_requests, synthetic_ratio, seed):
+    """Construit le flux de messages rejoués"""
+    rng = random.Random(seed)
+    with open(config.TRAINING_DATA_PATH, 'r', encoding='utf-8') as f:
+        corpus = [example for item in json.load(f) for example in item.get('examples', [])]
+    corpus.extend(TEST_MESSAGES)
+
+    messages = []
+    for _ in range(n_requests):
+        if rng.random() < synthetic_ratio:
+            template = rng.choice(SYNTHETIC_TEMPLATES)
+            words = {key: rng.choice(values) for key, values in SYNTHETIC_WORDS.items()}
+            messages.append(" ".join(template.format(**words).split()))
+        else:
+            messages.append(rng.choice(corpus))
+    return messages
+
+def percentiles(values):
+    """Statistiques de distribution (en millisecondes)"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))] * 1000
+
+    return {
+        "p50_ms": rank(50),
+        "p95_ms": rank(95),
+        "p99_ms": rank(99),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "max_ms": ordered[-1] * 1000
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def run_benchmark(engine, messages, concurrency, timer):
+    """Rejoue les messages ; retourne (latences, étapes par requête, durée totale)"""
+    latencies = []
+    stage_samples = []
+    lock = threading.Lock()
+
+    def handle(message):
+        timer.start_request()
+        start = time.perf_counter()
+        engine.process_message(message)
+        elapsed = time.perf_counter() - start
+        stages = timer.stop_request()
+        with lock:
+            latencies.append(elapsed)
+            stage_samples.append(stages)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(handle, messages))
+    return latencies, stage_samples, time.perf_counter() - start
+
+def compare_with_baseline(results, baseline_path, threshold):
+    """Compare aux résultats d'un commit précédent ; retourne les régressions"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for metric in ("p50_ms", "p95_ms", "p99_ms"):
+        before = baseline.get("latency", {}).get(metric)
+        after = results["latency"].get(metric)
+        if before and after and after > before * (1 + threshold):
+            regressions.append(f"latence {metric}: {before:.3f} -> {after:.3f} ms")
+    before = baseline.get("throughput_rps")
+    if before and results["throughput_rps"] < before * (1 - threshold):
+        regressions.append(f"débit: {before:.1f} -> {results['throughput_rps']:.1f} req/s")
+    return regressions
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Benchmark de charge du chatbot")
+    parser.add_argument("--requests", type=int, default=2000, help="Nombre de messages rejoués")
+    parser.add_argument("--concurrency", type=int, default=4, help="Nombre de clients simultanés")
+    parser.add_argument("--warmup", type=int, default=50, help="Messages de chauffe (non mesurés)")
+    parser.add_argument("--synthetic-ratio", type=float, default=0.5,
+                        help="Part de trafic synthétique (0 à 1)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongomock", action="store_true", help="MongoDB en mémoire (hors ligne)")
+    parser.add_argument("--sqlite", action="store_true", help="Backend SQLite temporaire (hors ligne)")
+    parser.add_argument("--no-cache", action="store_true", help="Désactive le cache des réponses")
+    parser.add_argument("--sync-logging", action="store_true",
+                        help="Écriture synchrone des conversations (insert_one)")
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    parser.add_argument("--baseline", help="Résultats JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Dégradation tolérée par rapport à la référence (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    sqlite_directory = None
+    if args.mongomock:
+        use_mongomock()
+    elif args.sqlite:
+        sqlite_directory = use_sqlite()
+
+    from chatbot.chatbot_engine import ChatbotEngine
+
+    engine = ChatbotEngine()
+    if not engine.intent_classifier.is_trained:
+        print("❌ Modèle non entraîné (python scripts/train_model.py)")
+        sys.exit(1)
+    if args.no_cache:
+        engine.response_cache = None
+    if args.sync_logging:
+        engine.conversation_logger = None
+
+    timer = StageTimer()
+    instrument(engine, timer)
+
+    messages = build_messages(args.requests, args.synthetic_ratio, args.seed)
+    for message in messages[:args.warmup]:
+        engine.process_message(message)
+    if engine.response_cache is not None:
+        engine.response_cache.clear()
+
+    print(f"🏁 {len(messages)} messages, concurrence {args.concurrency}")
+    latencies, stage_samples, duration = run_benchmark(engine, messages, args.concurrency, timer)
+    engine.close()
+    if sqlite_directory is not None:
+        engine.storage.close()
+        shutil.rmtree(sqlite_directory, ignore_errors=True)
+
+    results = {
+        "commit": git_commit(),
+        "config": {
+            "requests": len(messages),
+            "concurrency": args.concurrency,
+            "synthetic_ratio": args.synthetic_ratio,
+            "seed": args.seed,
+            "mongomock": args.mongomock,
+            "storage": "sqlite" if args.sqlite and not args.mongomock else "mongodb",
+            "response_cache": engine.response_cache is not None,
+            "async_logging": engine.conversation_logger is not None
+        },
+        "duration_s": duration,
+        "throughput_rps": len(messages) / duration if duration else 0.0,
+        "latency": percentiles(latencies),
+        "stages": {
+            stage: percentiles([sample[stage] for sample in stage_samples])
+            for stage in STAGES
+        }
+    }
+    if engine.response_cache is not None:
+        results["response_cache"] = engine.response_cache.stats()
+    if engine.conversation_logger is not None:
+        results["conversation_logger"] = engine.conversation_logger.metrics()
+
+    print("=" * 50)
+    print(f"⏱️ Débit: {results['throughput_rps']:.1f} req/s")
+    latency = results["latency"]
+    print(f"⏱️ Latence: p50 {latency['p50_ms']:.3f} ms | p95 {latency['p95_ms']:.3f} ms | "
+          f"p99 {latency['p99_ms']:.3f} ms")
+    for stage, stats in results["stages"].items():
+        print(f"   {stage:<12} p50 {stats['p50_ms']:.3f} ms | p95 {stats['p95_ms']:.3f} ms | "
+              f"moyenne {stats['mean_ms']:.3f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"💾 Résultats enregistrés dans {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.threshold)
+        if regressions:
+            print("❌ Régressions par rapport à la référence :")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print("✅ Pas de régression par rapport à la référence")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark du temps de démarrage (import à froid) des modules du projet
+
+Chaque mesure est faite dans un interpréteur neuf pour refléter un
+démarrage à froid. Exemple :
+
+    python scripts/benchmark_imports.py --repeat 5 --output bench_imports.json
+
+Pour mesurer une amélioration, exécutez le script sur deux commits et
+comparez les fichiers JSON produits.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cibles mesurées : nom -> code exécuté dans un interpréteur neuf
+TARGETS = {
+    "nlp.preprocessing": "import nlp.preprocessing",
+    "nlp.intent_classifier": "import nlp.intent_classifier",
+    "chatbot.chatbot_engine": "import chatbot.chatbot_engine",
+    "scripts.train_model": "import scripts.train_model",
+    "scripts.init_database": "import scripts.init_database",
+    "scripts.test_chatbot": "import scripts.test_chatbot",
+    "app": "import app",
+    "premier prétraitement": (
+        "from nlp.preprocessing import preprocessor; "
+        "preprocessor.preprocess('Bonjour, avez-vous des robes ?')"
+    )
+}
+
+MEASURE_TEMPLATE = """
+import time
+_start = time.perf_counter()
+{code}
+print("__ELAPSED__", time.perf_counter() - _start)
+"""
+
+def measure(code, repeat):
+    """Mesure `code` dans `repeat` interpréteurs neufs ; retourne les durées (s)"""
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", MEASURE_TEMPLATE.format(code=code)],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True
+        )
+        elapsed = [line for line in result.stdout.splitlines() if line.startswith("__ELAPSED__")]
+        if result.returncode != 0 or not elapsed:
+            error = (result.stderr.strip().splitlines() or ["erreur inconnue"])[-1]
+            raise RuntimeError(error)
+        timings.append(float(elapsed[-1].split()[1]))
+    return timings
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Benchmark des temps d'import à froid")
+    parser.add_argument("--repeat", type=int, default=3, help="Nombre de mesures par cible")
+    parser.add_argument("--targets", nargs="*", choices=list(TARGETS), help="Cibles à mesurer")
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    print("⏱️ Benchmark des imports à froid")
+    print("=" * 50)
+
+    results = {}
+    for name in args.targets or TARGETS:
+        try:
+            timings = measure(TARGETS[name], args.repeat)
+        except RuntimeError as e:
+            print(f"⚠️ {name}: {e}")
+            results[name] = {"error": str(e)}
+            continue
+
+        results[name] = {
+            "median_s": statistics.median(timings),
+            "min_s": min(timings),
+            "max_s": max(timings),
+            "runs": timings
+        }
+        print(f"{name:<28} médiane {statistics.median(timings) * 1000:8.1f} ms "
+              f"(min {min(timings) * 1000:.1f} ms)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"\n💾 Résultats enregistrés dans {args.output}")
+
+if __name__ == "__main__":
+    main()
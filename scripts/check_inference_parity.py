@@ -0,0 +1,144 @@
+"""
+Vérifie que le moteur d'inférence NumPy donne les mêmes probabilités que
+scikit-learn pour le modèle entraîné, et qu'il n'importe pas scikit-learn
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import numpy as np
+
+# Ajouter le répertoire parent au path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from nlp.fast_inference import FastIntentClassifier
+from nlp.intent_classifier import IntentClassifier
+from nlp.preprocessing import KEPT_CHARACTERS, preprocessor
+from scripts.test_chatbot import TEST_MESSAGES
+import config
+
+TOLERANCE = 1e-9
+
+# Exécuté dans un interpréteur neuf : le moteur d'inférence ne doit pas charger sklearn.
+# Le prétraitement n'est pas appelé : le paquet nltk importe lui-même sklearn
+# lorsqu'il est installé (nltk.classify.scikitlearn), ce qui est signalé à part.
+IMPORT_CHECK = """
+import sys
+from nlp.fast_inference import FastIntentClassifier
+classifier = FastIntentClassifier()
+classifier.load({bundle_path!r})
+classifier.probabilities(classifier.scores([classifier.vectorize("bonjour avez vous des robes")]))
+print("__SKLEARN__", any(name.split(".")[0] == "sklearn" for name in sys.modules))
+import nltk
+print("__NLTK_SKLEARN__", any(name.split(".")[0] == "sklearn" for name in sys.modules))
+"""
+
+def load_texts():
+    """Textes de contrôle : exemples d'entraînement, messages de test, produits, FAQ et textes aléatoires"""
+    texts = list(TEST_MESSAGES)
+    with open(config.TRAINING_DATA_PATH, 'r', encoding='utf-8') as f:
+        for item in json.load(f):
+            texts.extend(item.get('examples', []))
+
+    for path, fields in ((config.PRODUCTS_DATA_PATH, ("name", "description")),
+                         (config.FAQ_DATA_PATH, ("question", "answer"))):
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for record in json.load(f):
+                    texts.extend(record[field] for field in fields if record.get(field))
+
+    texts.extend(["", "   ", "!!!", "robe robe robe robe", "ÉTÉ Œuvre naïve"])
+    rng = random.Random(42)
+    words = " ".join(texts).split()
+    texts.extend(" ".join(rng.choice(words) for _ in range(rng.randint(1, 12))) for _ in range(2000))
+    alphabet = KEPT_CHARACTERS + " .,'!?0123456789"
+    texts.extend(
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        for _ in range(500)
+    )
+    return texts
+
+def check_sklearn_imports(bundle_path):
+    """Dans un processus neuf : (sklearn importé par le moteur NumPy, sklearn importé par nltk)"""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_CHECK.format(bundle_path=bundle_path)],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    flags = dict(line.split() for line in result.stdout.splitlines() if line.startswith("__"))
+    if "__SKLEARN__" not in flags:
+        print(result.stderr)
+        return True, None
+    return flags["__SKLEARN__"] == "True", flags.get("__NLTK_SKLEARN__") == "True"
+
+def time_per_message(classifier, texts, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            classifier.predict(text)
+    return (time.perf_counter() - start) / (repeat * len(texts))
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Parité de l'inférence NumPy avec scikit-learn")
+    parser.add_argument("--bundle", default=config.MODEL_BUNDLE_PATH, help="Dossier des bundles du modèle")
+    args = parser.parse_args()
+
+    print("🔍 Parité du moteur d'inférence NumPy")
+    print("=" * 50)
+
+    reference = IntentClassifier()
+    reference.load(args.bundle)
+    fast = FastIntentClassifier()
+    fast.load(args.bundle)
+    if list(reference.classifier.classes_) != fast.classes:
+        print("❌ Classes différentes")
+        sys.exit(1)
+
+    texts = load_texts()
+    expected = reference.classifier.predict_proba(
+        reference.vectorizer.transform(preprocessor.preprocess_many(texts))
+    )
+    actual = fast.predict_proba(texts)
+
+    mismatches = 0
+    max_error = float(np.abs(expected - actual).max()) if len(texts) else 0.0
+    for text, expected_row, actual_row in zip(texts, expected, actual):
+        if not np.allclose(expected_row, actual_row, rtol=0, atol=TOLERANCE):
+            mismatches += 1
+            print(f"❌ {text!r}: écart {np.abs(expected_row - actual_row).max():.2e}")
+        elif expected_row.argmax() != actual_row.argmax():
+            # Admis seulement si les deux meilleures classes sont à égalité
+            top = np.sort(expected_row)[-2:]
+            if top[1] - top[0] > TOLERANCE:
+                mismatches += 1
+                print(f"❌ {text!r}: intention différente")
+
+    print(f"📏 Écart maximal des probabilités : {max_error:.2e}")
+
+    sample = texts[:1000]
+    for name, classifier in (("scikit-learn", reference), ("NumPy", fast)):
+        print(f"⏱️ {name:<12}: {time_per_message(classifier, sample) * 1e6:.1f} µs/message")
+
+    engine_imports_sklearn, nltk_imports_sklearn = check_sklearn_imports(args.bundle)
+    if engine_imports_sklearn:
+        mismatches += 1
+        print("❌ scikit-learn est importé par le moteur NumPy")
+    else:
+        print("✅ Le moteur NumPy n'importe pas scikit-learn")
+    if nltk_imports_sklearn:
+        print("ℹ️ nltk importe scikit-learn lorsqu'il est installé (prétraitement) ; "
+              "une image de service sans scikit-learn l'évite")
+
+    print("=" * 50)
+    if mismatches:
+        print(f"❌ {mismatches} différence(s) sur {len(texts)} textes")
+        sys.exit(1)
+    print(f"✅ Probabilités identiques (±{TOLERANCE:g}) sur {len(texts)} textes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Vérifie que le pipeline de prétraitement optimisé produit exactement la
+même sortie que le pipeline de référence (NLTK)
+"""
+import json
+import os
+import random
+import sys
+import time
+
+# Ajouter le répertoire parent au path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlp.preprocessing import TextPreprocessor, KEPT_CHARACTERS
+import config
+
+def load_texts():
+    """Textes de contrôle : exemples d'entraînement, produits et FAQ"""
+    texts = []
+    with open(config.TRAINING_DATA_PATH, 'r', encoding='utf-8') as f:
+        for item in json.load(f):
+            texts.extend(item.get('examples', []))
+
+    for path, fields in ((config.PRODUCTS_DATA_PATH, ("name", "description")),
+                         (config.FAQ_DATA_PATH, ("question", "answer"))):
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for record in json.load(f):
+                    texts.extend(record[field] for field in fields if record.get(field))
+
+    # Cas limites : ponctuation, espaces Unicode, contractions Treebank, majuscules
+    texts.extend([
+        "", "   ", "!!!", "Bonjour, je cherche\tune ROBE\n", "l'été ÇA VA ?",
+        "cannot gonna wanna gotta lemme gimme", "Œuvre naïve ñandú ß İstanbul"
+    ])
+    rng = random.Random(42)
+    alphabet = KEPT_CHARACTERS + KEPT_CHARACTERS.upper() + " \t\n.,;:!?'\"()-0123456789€ñœ"
+    texts.extend(
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        for _ in range(2000)
+    )
+    return texts
+
+def check_tokenizer_parity(reference, fast, texts):
+    """Compare tokenize_fast à word_tokenize (Treebank), même sans les données Punkt"""
+    try:
+        from nltk.tokenize import NLTKWordTokenizer
+    except ImportError:
+        return 0
+    fast._word_tokenize = True  # force la prise en compte des contractions
+    treebank = NLTKWordTokenizer()
+    mismatches = 0
+    for text in texts:
+        cleaned = reference.clean_text(text)
+        if treebank.tokenize(cleaned) != fast.tokenize_fast(cleaned):
+            mismatches += 1
+            print(f"❌ Tokenisation différente: {cleaned!r}")
+    fast._word_tokenize = None
+    return mismatches
+
+def main():
+    """Fonction principale"""
+    print("🔍 Parité du pipeline de prétraitement optimisé")
+    print("=" * 50)
+
+    texts = load_texts()
+    reference = TextPreprocessor(fast=False)
+    fast = TextPreprocessor(fast=True)
+
+    mismatches = check_tokenizer_parity(reference, fast, texts)
+
+    for remove_stopwords in (True, False):
+        for apply_stemming in (True, False):
+            for text in texts:
+                expected = reference.preprocess(text, remove_stopwords, apply_stemming)
+                actual = fast.preprocess(text, remove_stopwords, apply_stemming)
+                if expected != actual:
+                    mismatches += 1
+                    print(f"❌ {text!r}: {expected!r} != {actual!r}")
+
+    # Temps par message sur les exemples d'entraînement
+    for name, preprocessor in (("référence", reference), ("optimisé", fast)):
+        start = time.perf_counter()
+        for _ in range(5):
+            for text in texts:
+                preprocessor.preprocess(text)
+        elapsed = (time.perf_counter() - start) / (5 * len(texts))
+        print(f"⏱️ {name:<10}: {elapsed * 1e6:.1f} µs/message")
+
+    print("=" * 50)
+    if mismatches:
+        print(f"❌ {mismatches} différence(s) sur {len(texts)} textes")
+        sys.exit(1)
+    print(f"✅ Sorties identiques sur {len(texts)} textes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Génération d'un catalogue synthétique de grande taille (tests de charge)
+
+Chaque produit combine un produit existant (template) avec un adjectif, une
+matière, une marque et une collection. L'espace des combinaisons est
+parcouru selon une permutation déterminée par la graine : le résultat ne
+dépend ni du nombre de processus ni du découpage, et deux positions
+distinctes donnent toujours deux combinaisons distinctes. La génération est
+répartie entre plusieurs processus, puis les morceaux sont fusionnés en
+JSON Lines avec un contrôle d'unicité des noms.
+
+Usage :
+    python scripts/generate_catalog.py --count 1000000 --output data/products_1m.jsonl
+"""
+import argparse
+import hashlib
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import time
+from array import array
+
+# Ajouter le répertoire du projet au path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.json_stream import JsonRecordWriter, is_json_lines, iter_json_records
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+PRODUCTS_FILE = os.path.join(DATA_DIR, "products.json")
+DEFAULT_OUTPUT = os.path.join(DATA_DIR, "products_synthetic.jsonl")
+
+# Dimensions de la génération synthétique
+ADJECTIVES = ["élégant", "moderne", "vintage", "confortable", "premium", "eco-friendly", "chic", "décontracté", "sportif", "classique", "tendance", "luxueux"]
+MATERIALS = ["en coton", "en lin", "en laine", "en soie", "en cuir synthétique", "en denim", "en velours", "en polyester recyclé"]
+BRANDS = ["EcoStyle", "UrbanFit", "LuxeWear", "DailyBasic", "TrendSetters", "NordicDesign", "ModaViva", "PureCotton"]
+COLLECTIONS = ["Printemps", "Été", "Automne", "Hiver", "Essentiel", "Édition limitée"]
+
+DIMENSIONS = (ADJECTIVES, MATERIALS, BRANDS, COLLECTIONS)
+
+def load_templates(file_path):
+    """Charge les produits servant de templates (un par nom)"""
+    templates = {}
+    for product in iter_json_records(file_path):
+        templates.setdefault(product["name"], product)
+    return list(templates.values())
+
+def combination_space(templates):
+    """Nombre de produits distincts que l'on peut générer"""
+    return len(templates) * math.prod(len(values) for values in DIMENSIONS)
+
+def permutation(seed, size):
+    """Paramètres (a, c) d'une bijection position -> combinaison : (a * p + c) mod size"""
+    rng = random.Random(seed)
+    if size <= 1:
+        return 1, 0
+    multiplier = rng.randrange(1, size)
+    while math.gcd(multiplier, size) != 1:
+        multiplier = rng.randrange(1, size)
+    return multiplier, rng.randrange(size)
+
+def build_product(templates, combination, seed):
+    """Construit le produit correspondant à un indice de combinaison"""
+    index = combination
+    combination, collection = divmod(combination, len(COLLECTIONS))
+    combination, brand = divmod(combination, len(BRANDS))
+    combination, material = divmod(combination, len(MATERIALS))
+    template_index, adjective = divmod(combination, len(ADJECTIVES))
+
+    template = templates[template_index]
+    adj = ADJECTIVES[adjective]
+    mat = MATERIALS[material]
+    brand_name = BRANDS[brand]
+    collection_name = COLLECTIONS[collection]
+
+    # Variation de prix (entre -20% et +40%) propre à la combinaison
+    price_variation = random.Random(seed * 1_000_003 + index).uniform(0.8, 1.4)
+
+    return {
+        "name": f"{template['name']} {adj} {mat} {brand_name} - {collection_name}",
+        "category": template['category'],
+        "gender": template['gender'],
+        "price": round(template['price'] * price_variation, 2),
+        "description": (
+            f"{template['description']}. Ce modèle {adj} {mat} de la marque {brand_name}, "
+            f"collection {collection_name}, est un incontournable."
+        ),
+        "size": template['size'],
+        "color": template['color']
+    }
+
+# État des processus de génération (initialisé une fois par processus)
+_worker_state = {}
+
+def _init_worker(templates, seed):
+    size = combination_space(templates)
+    _worker_state.update(
+        templates=templates, seed=seed, size=size, permutation=permutation(seed, size)
+    )
+
+def _name_digest(name):
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little")
+
+def _generate_shard(shard):
+    """Écrit les produits des positions [start, end) dans un fichier JSON Lines
+
+    Retourne les empreintes des noms générés (contrôle d'unicité global).
+    """
+    start, end, part_file = shard
+    templates = _worker_state["templates"]
+    seed = _worker_state["seed"]
+    size = _worker_state["size"]
+    multiplier, offset = _worker_state["permutation"]
+
+    digests = array("Q")
+    with JsonRecordWriter(part_file) as writer:
+        for position in range(start, end):
+            product = build_product(templates, (multiplier * position + offset) % size, seed)
+            digests.append(_name_digest(product["name"]))
+            writer.write(product)
+    return digests
+
+def _merge_records(sources, output_file):
+    """Fusionne les sources en écartant les noms déjà vus"""
+    names = set()
+    duplicates = 0
+    with JsonRecordWriter(output_file) as writer:
+        for source in sources:
+            for product in source:
+                digest = _name_digest(product["name"])
+                if digest in names:
+                    duplicates += 1
+                    continue
+                names.add(digest)
+                writer.write(product)
+    return writer.count, duplicates
+
+def _concatenate(templates, part_files, output_file):
+    """Concatène les morceaux sans les redécoder (sortie JSON Lines non compressée)"""
+    with JsonRecordWriter(output_file) as writer:
+        for product in templates:
+            writer.write(product)
+    with open(output_file, "ab") as output:
+        for part_file in part_files:
+            with open(part_file, "rb") as part:
+                shutil.copyfileobj(part, output, 1 << 20)
+    return writer.count
+
+def generate_catalog(count, output_file=DEFAULT_OUTPUT, templates_file=PRODUCTS_FILE,
+                     seed=42, workers=None, include_templates=False):
+    """Génère `count` produits synthétiques dans `output_file` (JSON Lines recommandé)
+
+    Retourne le nombre de produits écrits.
+    """
+    templates = load_templates(templates_file)
+    if not templates:
+        print(f"❌ Aucun template dans {templates_file}")
+        return 0
+
+    size = combination_space(templates)
+    if count > size:
+        print(
+            f"⚠️ Espace des combinaisons épuisé : {size} produits distincts possibles "
+            f"avec {len(templates)} templates (demandé : {count})"
+        )
+        count = size
+
+    workers = max(1, min(workers or os.cpu_count() or 1, count or 1))
+    bounds = [count * i // workers for i in range(workers + 1)]
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    shards = [
+        (bounds[i], bounds[i + 1], os.path.join(output_dir, f".tmp-part-{i}-{os.getpid()}.jsonl"))
+        for i in range(workers)
+        if bounds[i + 1] > bounds[i]
+    ]
+
+    print(f"🏭 Génération de {count} produits (graine {seed}, {len(shards)} processus)...")
+    started = time.perf_counter()
+    try:
+        if len(shards) > 1:
+            with multiprocessing.Pool(len(shards), initializer=_init_worker, initargs=(templates, seed)) as pool:
+                shard_digests = pool.map(_generate_shard, shards)
+        else:
+            _init_worker(templates, seed)
+            shard_digests = [_generate_shard(shard) for shard in shards]
+
+        # Contrôle d'unicité des noms sur l'ensemble des morceaux
+        kept_templates = templates if include_templates else []
+        names = {_name_digest(product["name"]) for product in kept_templates}
+        expected = len(names)
+        for digests in shard_digests:
+            names.update(digests)
+            expected += len(digests)
+        duplicates = expected - len(names)
+        del names, shard_digests
+
+        part_files = [part_file for _, _, part_file in shards]
+        temp_file = os.path.join(output_dir, f".tmp-{os.path.basename(output_file)}")
+        if not duplicates and is_json_lines(output_file) and not output_file.endswith(".gz"):
+            written = _concatenate(kept_templates, part_files, temp_file) + count
+        else:
+            written, duplicates = _merge_records(
+                [kept_templates] + [iter_json_records(part_file) for part_file in part_files],
+                temp_file
+            )
+        os.replace(temp_file, output_file)
+    finally:
+        for _, _, part_file in shards:
+            if os.path.exists(part_file):
+                os.remove(part_file)
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {written} produits écrits dans {output_file} en {elapsed:.1f}s")
+    if duplicates:
+        print(f"⚠️ {duplicates} doublons de nom ignorés")
+    return written
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Génération d'un catalogue synthétique")
+    parser.add_argument("--count", type=int, default=100000, help="Nombre de produits à générer")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Fichier de sortie (.jsonl, .jsonl.gz)")
+    parser.add_argument("--templates", default=PRODUCTS_FILE, help="Produits servant de templates")
+    parser.add_argument("--seed", type=int, default=42, help="Graine (génération déterministe)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Nombre de processus")
+    parser.add_argument("--include-templates", action="store_true",
+                        help="Recopier aussi les produits templates dans la sortie")
+    args = parser.parse_args()
+
+    generate_catalog(
+        args.count,
+        output_file=args.output,
+        templates_file=args.templates,
+        seed=args.seed,
+        workers=args.workers,
+        include_templates=args.include_templates
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,213 @@
 """
 Script d'initialisation de la base de données MongoDB
+
+Les produits sont chargés par lots (insert_many / bulk_write) avec trois modes :
+- swap (défaut) : chargement dans une collection de staging indexée, puis
+  renommage atomique sur la collection live ; le chat ne voit jamais un
+  catalogue vide ou partiel.
+- upsert : mise à jour en place, clé product_id.
+- sync : synchronisation delta des produits et de la FAQ ; seuls les
+  enregistrements ajoutés, modifiés ou supprimés sont écrits.
+
+Avec STORAGE_BACKEND=sqlite, produits et FAQ sont chargés dans la base
+embarquée (upsert par lots des produits, remplacement de la FAQ) ; les modes
+ci-dessus sont propres à MongoDB.
+
+Le fichier produits (tableau JSON ou JSON Lines, éventuellement .gz) est lu
+en flux : la mémoire reste constante et le décodage du lot suivant se fait
+pendant l'écriture du lot courant.
 """
-import json
+import argparse
 import os
 import sys
+from datetime import datetime
 
 # Ajouter le répertoire parent au path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from pymongo.errors import BulkWriteError
+from database.catalog_sync import content_hash, format_summary, sync_collection
 from database.models import ProductModel, FAQModel
+from database.schema import ensure_schema
+from database.mongodb_connection import mongodb
+from database.storage import get_storage
+from scripts.json_stream import iter_json_records, prefetch_chunks
 import config
 
+DEFAULT_CHUNK_SIZE = 1000
+DUPLICATE_KEY_ERROR = 11000
+
 def load_json_data(file_path):
-    """Charge les données depuis un fichier JSON"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Charge les données depuis un fichier JSON ou JSON Lines"""
+    return list(iter_json_records(file_path))
+
+def iter_products(file_path):
+    """Parcourt les produits du fichier en flux"""
+    return iter_json_records(file_path)
+
+def _prepare_product(product, now):
+    document = dict(product)
+    document["product_id"] = ProductModel.product_id(product)
+    document["content_hash"] = content_hash(document, "product_id")
+    document.setdefault("created_at", now)
+    return document
+
+def _insert_chunk(collection, documents):
+    """insert_many non ordonné ; retourne (insérés, doublons ignorés)"""
+    try:
+        result = collection.insert_many(documents, ordered=False)
+        return len(result.inserted_ids), 0
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        duplicates = sum(1 for error in errors if error.get("code") == DUPLICATE_KEY_ERROR)
+        if duplicates != len(errors):
+            raise
+        return e.details.get("nInserted", 0), duplicates
+
+def load_products_swap(products, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Charge le catalogue dans une collection de staging puis la renomme sur la live"""
+    staging_name = f"{ProductModel.COLLECTION_NAME}_staging"
+    staging = mongodb.get_collection(staging_name)
+    staging.drop()
+
+    # Index créés avant le chargement : l'index unique écarte les doublons
+    ProductModel.ensure_indexes(staging)
 
-def init_products():
+    now = datetime.now()
+    inserted = duplicates = 0
+    for chunk in prefetch_chunks(products, chunk_size):
+        chunk_inserted, chunk_duplicates = _insert_chunk(
+            staging, [_prepare_product(product, now) for product in chunk]
+        )
+        inserted += chunk_inserted
+        duplicates += chunk_duplicates
+
+    if inserted == 0:
+        staging.drop()
+        raise ValueError("Aucun produit chargé : la collection live est conservée")
+
+    # Renommage atomique : remplace la collection live en une seule opération
+    staging.rename(ProductModel.COLLECTION_NAME, dropTarget=True)
+    ProductModel.bump_version()
+    return inserted, duplicates
+
+def load_products_upsert(products, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Met à jour le catalogue en place (bulk_write d'upserts non ordonnés)"""
+    ProductModel.ensure_indexes()
+    upserted = modified = 0
+    for chunk in prefetch_chunks(products, chunk_size):
+        result = ProductModel.bulk_upsert(chunk)
+        upserted += result.upserted_count
+        modified += result.modified_count
+    return upserted, modified
+
+def sync_products(products, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """Synchronise le catalogue par différence (empreintes de contenu)"""
+    ProductModel.ensure_indexes()
+    # Décodage en arrière-plan pendant les écritures
+    pipelined = (product for chunk in prefetch_chunks(products, chunk_size) for product in chunk)
+    summary = sync_collection(
+        ProductModel.get_collection(), pipelined, "product_id", ProductModel.product_id,
+        chunk_size=chunk_size, dry_run=dry_run
+    )
+    if not dry_run and (summary["inserted"] or summary["updated"] or summary["deleted"]):
+        ProductModel.bump_version()
+    return summary
+
+def sync_faq(faq_items, dry_run=False):
+    """Synchronise la FAQ par différence (empreintes de contenu)"""
+    FAQModel.ensure_indexes()
+    summary = sync_collection(
+        FAQModel.get_collection(), faq_items, "faq_id", FAQModel.faq_id, dry_run=dry_run
+    )
+    if not dry_run and (summary["inserted"] or summary["updated"] or summary["deleted"]):
+        FAQModel.bump_version()
+    return summary
+
+def init_products(mode="swap", chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, file_path=None):
     """Initialise les produits dans MongoDB"""
-    print("📦 Initialisation des produits...")
-    products = load_json_data(config.PRODUCTS_DATA_PATH)
-    collection = ProductModel.get_collection()
-    
-    # Vider la collection si elle existe
-    collection.delete_many({})
-    
-    # Insérer les produits
-    for product in products:
-        ProductModel.insert_product(product)
-    
-    print(f"✅ {len(products)} produits insérés")
+    file_path = file_path or config.PRODUCTS_DATA_PATH
+    print(f"📦 Initialisation des produits depuis {file_path} (mode {mode}, lots de {chunk_size})...")
+    products = iter_products(file_path)
 
-def init_faq():
+    if mode == "sync":
+        summary = sync_products(products, chunk_size, dry_run=dry_run)
+        print(f"✅ Produits {'(simulation) ' if dry_run else ''}: {format_summary(summary)}")
+    elif mode == "swap":
+        inserted, duplicates = load_products_swap(products, chunk_size)
+        print(f"✅ {inserted} produits chargés" +
+              (f" ({duplicates} doublons ignorés)" if duplicates else ""))
+    else:
+        upserted, modified = load_products_upsert(products, chunk_size)
+        print(f"✅ {upserted} produits insérés, {modified} mis à jour")
+
+def init_faq(mode="swap", dry_run=False):
     """Initialise la FAQ dans MongoDB"""
     print("❓ Initialisation de la FAQ...")
     faq_items = load_json_data(config.FAQ_DATA_PATH)
-    collection = FAQModel.get_collection()
-    
-    # Vider la collection si elle existe
-    collection.delete_many({})
-    
-    # Insérer les FAQ
-    for faq in faq_items:
-        FAQModel.insert_faq(faq)
+
+    if mode == "sync":
+        summary = sync_faq(faq_items, dry_run=dry_run)
+        print(f"✅ FAQ {'(simulation) ' if dry_run else ''}: {format_summary(summary)}")
+        return
+
+    # Vider la collection et insérer les FAQ en une seule requête
+    get_storage().replace_faq(faq_items)
     
     print(f"✅ {len(faq_items)} entrées FAQ insérées")
 
+def init_storage(chunk_size=DEFAULT_CHUNK_SIZE, file_path=None):
+    """Initialise produits et FAQ dans la base embarquée (STORAGE_BACKEND=sqlite)"""
+    storage = get_storage()
+    file_path = file_path or config.PRODUCTS_DATA_PATH
+    print(f"📦 Initialisation des produits depuis {file_path} ({storage.name}, lots de {chunk_size})...")
+    written = 0
+    for chunk in prefetch_chunks(iter_products(file_path), chunk_size):
+        written += storage.upsert_products(chunk)
+    print(f"✅ {written} produits chargés")
+
+    print("❓ Initialisation de la FAQ...")
+    faq_items = load_json_data(config.FAQ_DATA_PATH)
+    storage.replace_faq(faq_items)
+    print(f"✅ {len(faq_items)} entrées FAQ insérées")
+
 def main():
     """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Initialisation de la base MongoDB")
+    parser.add_argument("--mode", choices=["swap", "upsert", "sync"], default="swap",
+                        help="swap : staging + renommage atomique ; upsert : mise à jour en place ; "
+                             "sync : écrit uniquement les différences")
+    parser.add_argument("--products-file", default=config.PRODUCTS_DATA_PATH,
+                        help="Catalogue produits (.json, .jsonl, éventuellement .gz)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Mode sync : affiche le diff sans rien écrire")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Nombre de produits par requête")
+    args = parser.parse_args()
+
+    if config.STORAGE_BACKEND != "mongodb":
+        print(f"🚀 Initialisation de la base de données {config.STORAGE_BACKEND} ({config.SQLITE_PATH})...")
+        print("=" * 50)
+        init_storage(chunk_size=args.chunk_size, file_path=args.products_file)
+        print("\n" + "=" * 50)
+        print("✅ Base de données initialisée avec succès !")
+        print("=" * 50)
+        return
+
     print("🚀 Initialisation de la base de données MongoDB...")
     print("=" * 50)
     
     try:
-        init_products()
-        init_faq()
+        init_products(
+            mode=args.mode,
+            chunk_size=args.chunk_size,
+            dry_run=args.dry_run,
+            file_path=args.products_file
+        )
+        init_faq(mode=args.mode, dry_run=args.dry_run)
+        if not args.dry_run:
+            print("🗂️ Index et rétention des conversations...")
+            ensure_schema()
         
         print("\n" + "=" * 50)
         print("✅ Base de données initialisée avec succès !")
@@ -64,5 +218,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-
@@ -0,0 +1,197 @@
+"""
+Lecture et écriture en flux de fichiers JSON / JSON Lines
+
+La mémoire utilisée ne dépend pas de la taille du fichier : les
+enregistrements d'un tableau JSON sont décodés un par un, et les fichiers
+JSON Lines (.jsonl, .ndjson) ligne par ligne. Les fichiers .gz sont
+(dé)compressés à la volée.
+"""
+import gzip
+import json
+import queue
+import threading
+from itertools import islice
+
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+READ_CHUNK_SIZE = 1 << 16
+_NUMBER_CHARACTERS = frozenset("0123456789+-.eE")
+
+def _open_text(file_path, mode):
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, mode + "t", encoding="utf-8")
+    return open(file_path, mode, encoding="utf-8")
+
+def is_json_lines(file_path):
+    """Vrai si le fichier est au format JSON Lines (d'après son extension)"""
+    path = file_path[:-3] if file_path.endswith(".gz") else file_path
+    return path.endswith(JSON_LINES_EXTENSIONS)
+
+def _iter_json_lines(f):
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Ligne {line_number} invalide: {e}") from e
+
+def _iter_json_array(f, read_size):
+    """Décode les éléments d'un tableau JSON de premier niveau, un par un"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        data = f.read(read_size)
+        if not data:
+            eof = True
+        buffer = buffer[position:] + data
+        position = 0
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if position >= len(buffer) or buffer[position] != "[":
+        raise ValueError("Tableau JSON attendu (ou fichier JSON Lines .jsonl)")
+    position += 1
+
+    expect_separator = False
+    while True:
+        skip_whitespace()
+        if position >= len(buffer):
+            raise ValueError("Fin de fichier inattendue dans le tableau JSON")
+
+        char = buffer[position]
+        if char == "]":
+            return
+        if expect_separator:
+            if char != ",":
+                raise ValueError(f"',' attendue à la position {position}")
+            position += 1
+            skip_whitespace()
+
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # Un nombre coupé par la fin du tampon se décode en un préfixe valide
+            # ("2.5" pour "2.5e3") : on attend le caractère qui le termine
+            if not eof and (end == len(buffer) or buffer[end] in _NUMBER_CHARACTERS):
+                fill()
+                continue
+            break
+
+        position = end
+        expect_separator = True
+        yield record
+
+def iter_json_records(file_path, read_size=READ_CHUNK_SIZE):
+    """Parcourt les enregistrements d'un fichier JSON (tableau) ou JSON Lines"""
+    with _open_text(file_path, "r") as f:
+        if is_json_lines(file_path):
+            yield from _iter_json_lines(f)
+        else:
+            yield from _iter_json_array(f, read_size)
+
+class JsonRecordWriter:
+    """Écrit des enregistrements en flux, en tableau JSON ou en JSON Lines"""
+
+    def __init__(self, file_path, indent=2):
+        self.file_path = file_path
+        self.json_lines = is_json_lines(file_path)
+        self.indent = None if self.json_lines else indent
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        self._file = _open_text(self.file_path, "w")
+        if not self.json_lines:
+            self._file.write("[")
+        return self
+
+    def write(self, record):
+        if self.json_lines:
+            self._file.write(json.dumps(record, ensure_ascii=False))
+            self._file.write("\n")
+        else:
+            text = json.dumps(record, ensure_ascii=False, indent=self.indent)
+            if self.indent:
+                text = "\n".join(" " * self.indent + line for line in text.splitlines())
+            self._file.write(("," if self.count else "") + "\n" + text)
+        self.count += 1
+
+    def __exit__(self, *exc_info):
+        if not self.json_lines:
+            self._file.write("\n]\n" if self.count else "]\n")
+        self._file.close()
+        return False
+
+def iter_chunks(records, chunk_size):
+    """Découpe un flux d'enregistrements en lots"""
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+_END = object()
+
+def prefetch_chunks(records, chunk_size, depth=2):
+    """Découpe le flux en lots dans un thread dédié (pipeline lecture / écriture)
+
+    Le décodage du lot suivant se fait pendant l'écriture du lot courant ;
+    au plus `depth` lots sont en attente, la mémoire reste donc bornée.
+    """
+    chunks = queue.Queue(maxsize=depth)
+    errors = []
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for chunk in iter_chunks(records, chunk_size):
+                while not stop.is_set():
+                    try:
+                        chunks.put(chunk, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            chunks.put(_END)
+
+    producer = threading.Thread(target=produce, name="json-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is _END:
+                break
+            yield chunk
+    finally:
+        stop.set()
+        # Débloque le producteur s'il attend une place dans la file
+        while producer.is_alive():
+            try:
+                chunks.get_nowait()
+            except queue.Empty:
+                producer.join(timeout=0.1)
+    if errors:
+        raise errors[0]
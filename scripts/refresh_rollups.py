@@ -0,0 +1,61 @@
+"""
+Recalcul des agrégats de conversations du dashboard (job périodique)
+
+Les agrégats sont mis à jour à chaque écriture de conversations ; ce script
+les recalcule côté serveur (agrégation + $merge) pour rattraper les
+écritures manquées ou initialiser les agrégats d'un historique existant.
+Seules les périodes closes sont recalculées (heures terminées depuis
+ROLLUP_REFRESH_DELAY_SECONDS, jours terminés) : l'heure et le jour en cours
+restent tenus par les écritures.
+
+Usage :
+    python scripts/refresh_rollups.py --full                 # tout l'historique
+    python scripts/refresh_rollups.py --days 2 --interval 3600   # toutes les heures
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Ajouter le répertoire parent au path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import ConversationRollupModel
+
+def refresh(days=None):
+    """Recalcule les agrégats des `days` derniers jours (tout l'historique si None)"""
+    since = datetime.now() - timedelta(days=days - 1) if days else None
+    started = time.perf_counter()
+    until = ConversationRollupModel.refresh_watermark()
+    ConversationRollupModel.ensure_indexes()
+    ConversationRollupModel.refresh(since=since, until=until)
+    scope = f"depuis le {since:%Y-%m-%d}" if since else "sur tout l'historique"
+    print(f"✅ Agrégats recalculés {scope} jusqu'à {until:%Y-%m-%d %H:%M} "
+          f"en {time.perf_counter() - started:.2f}s")
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Recalcul des agrégats du dashboard")
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument("--days", type=int, default=2,
+                       help="Nombre de jours recalculés (aujourd'hui compris, heures closes uniquement)")
+    scope.add_argument("--full", action="store_true", help="Recalculer tout l'historique")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Répéter toutes les N secondes (0 : une seule fois)")
+    args = parser.parse_args()
+
+    days = None if args.full else args.days
+    while True:
+        try:
+            refresh(days)
+        except Exception as e:
+            print(f"❌ Erreur lors du recalcul des agrégats: {e}")
+            if not args.interval:
+                raise
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
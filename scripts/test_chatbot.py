@@ -9,6 +9,17 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from chatbot.chatbot_engine import ChatbotEngine
 
+# Messages de test (une intention par message)
+TEST_MESSAGES = [
+    "bonjour",
+    "montre moi les robes",
+    "combien de temps prend la livraison",
+    "quels modes de paiement acceptez vous",
+    "comment retourner un article",
+    "y a t il des soldes",
+    "au revoir"
+]
+
 def test_chatbot():
     """Test basique du chatbot"""
     print("🧪 Test du Chatbot")
@@ -17,20 +28,9 @@ def test_chatbot():
     try:
         chatbot = ChatbotEngine()
         
-        # Tests avec différentes intentions
-        test_messages = [
-            "bonjour",
-            "montre moi les robes",
-            "combien de temps prend la livraison",
-            "quels modes de paiement acceptez vous",
-            "comment retourner un article",
-            "y a t il des soldes",
-            "au revoir"
-        ]
-        
         print("\n📝 Tests de classification d'intentions:\n")
         
-        for message in test_messages:
+        for message in TEST_MESSAGES:
             try:
                 response = chatbot.process_message(message)
                 print(f"💬 Message: {message}")
@@ -1,14 +1,29 @@
 """
 Script d'entraînement du modèle de classification d'intentions
+
+Modes :
+- par défaut : entraînement complet sur data/training_data.json ;
+- --stream / --from-conversations : entraînement en flux (vectorisation
+  "hashing"), depuis un fichier JSON / JSON Lines d'exemples ou depuis les
+  conversations journalisées dans MongoDB ;
+- --incremental : mise à jour du modèle actif (hashing) avec ces flux, sans
+  réentraînement complet ;
+- --search grid|random : recherche d'hyperparamètres par validation croisée
+  stratifiée, parallélisée sur tous les cœurs ; le classement est écrit
+  dans le dossier du bundle (leaderboard.json).
 """
+import argparse
 import json
 import os
 import sys
+from itertools import chain
 
 # Ajouter le répertoire parent au path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from nlp.intent_classifier import IntentClassifier
+from nlp.preprocessing import download_nltk_resources
+from scripts.json_stream import iter_json_records
 import config
 
 def load_training_data():
@@ -16,28 +31,155 @@ def load_training_data():
     with open(config.TRAINING_DATA_PATH, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def main():
-    """Fonction principale"""
-    print("🚀 Démarrage de l'entraînement du modèle...")
-    print("=" * 50)
-    
-    # Charger les données
+def iter_training_examples(records):
+    """Paires (texte, intention) d'enregistrements au format d'entraînement ou de journal
+
+    Formats acceptés : {"intent", "examples": [...]}, {"intent", "text"} ou
+    {"intent", "user_message"}.
+    """
+    for record in records:
+        intent = record.get('intent')
+        if not intent:
+            continue
+        if 'examples' in record:
+            for example in record['examples']:
+                yield example, intent
+        else:
+            text = record.get('text') or record.get('user_message')
+            if text:
+                yield text, intent
+
+def train_full(vectorizer_type):
+    """Entraînement complet sur les données d'entraînement"""
     print(f"📂 Chargement des données depuis {config.TRAINING_DATA_PATH}")
     training_data = load_training_data()
     
     # Créer et entraîner le classificateur
-    classifier = IntentClassifier()
+    classifier = IntentClassifier(vectorizer_type=vectorizer_type)
     accuracy = classifier.train(training_data)
     
     # Sauvegarder le modèle
     print("\n💾 Sauvegarde du modèle...")
     classifier.save()
+    return accuracy
+
+def print_leaderboard(leaderboard, top=10):
+    """Affiche les meilleures configurations"""
+    print(f"\n🏆 Classement ({len(leaderboard)} configurations)")
+    print(f"{'rang':>4}  {'F1 macro':>15}  {'précision':>9}  paramètres")
+    for entry in leaderboard[:top]:
+        params = ", ".join(f"{name.split('__')[-1]}={value}" for name, value in entry["params"].items())
+        print(
+            f"{entry['rank']:>4}  {entry['f1_macro']:>7.2%} ± {entry['f1_macro_std']:<5.1%}  "
+            f"{entry['accuracy']:>9.2%}  {params}"
+        )
+
+def train_search(args):
+    """Recherche d'hyperparamètres, puis sauvegarde du meilleur modèle"""
+    print(f"📂 Chargement des données depuis {config.TRAINING_DATA_PATH}")
+    training_data = load_training_data()
+    
+    classifier = IntentClassifier(vectorizer_type="tfidf")
+    leaderboard = classifier.tune(
+        training_data,
+        search=args.search,
+        folds=args.folds,
+        n_iter=args.n_iter,
+        n_jobs=args.n_jobs
+    )
+    print_leaderboard(leaderboard)
+    
+    print("\n💾 Sauvegarde du meilleur modèle...")
+    version_path = classifier.save()
+    for path in filter(None, (os.path.join(version_path, "leaderboard.json"), args.leaderboard)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(leaderboard, f, ensure_ascii=False, indent=2)
+    print(f"✅ Classement écrit dans {args.leaderboard or os.path.join(version_path, 'leaderboard.json')}")
+    return classifier.training_metrics["cv_accuracy"]
+
+def train_streaming(args):
+    """Entraînement en flux, ou mise à jour incrémentale du modèle actif"""
+    classifier = IntentClassifier(vectorizer_type="hashing", n_features=args.n_features)
+    sources = []
+    
+    if args.incremental:
+        classifier.load()
+        if classifier.vectorizer_type != "hashing":
+            print("❌ Le modèle actif n'utilise pas la vectorisation \"hashing\" ; entraînez-le d'abord avec --vectorizer hashing")
+            sys.exit(1)
+        classes = None
+    else:
+        # Nouveau modèle : intentions et exemples de référence
+        training_data = load_training_data()
+        classes = sorted({item['intent'] for item in training_data})
+        sources.append(iter_training_examples(training_data))
+    
+    if args.stream:
+        print(f"📂 Flux d'exemples : {args.stream}")
+        sources.append(iter_training_examples(iter_json_records(args.stream)))
+    if args.from_conversations:
+        from database.storage import get_storage
+        print(f"📂 Conversations journalisées (confiance ≥ {args.min_confidence})")
+        sources.append(get_storage().iter_labeled_messages(
+            min_confidence=args.min_confidence, batch_size=args.batch_size
+        ))
+    
+    print("🔄 Entraînement en flux (hachage de features + SGD)...")
+    progressive_accuracy = classifier.train_stream(
+        chain.from_iterable(sources), classes=classes, batch_size=args.batch_size
+    )
+    print(f"📊 {classifier.training_metrics['n_examples']} exemples appris "
+          f"({classifier.training_metrics['examples_seen']} au total)")
+    
+    print("\n💾 Sauvegarde du modèle...")
+    classifier.save()
+    return progressive_accuracy
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Entraînement du modèle d'intentions")
+    parser.add_argument("--vectorizer", choices=("tfidf", "hashing"), default=config.INTENT_VECTORIZER,
+                        help="Vectorisation de l'entraînement complet")
+    parser.add_argument("--stream", help="Fichier d'exemples JSON / JSON Lines (entraînement en flux)")
+    parser.add_argument("--from-conversations", action="store_true",
+                        help="Apprendre des conversations journalisées dans MongoDB")
+    parser.add_argument("--min-confidence", type=float, default=0.8,
+                        help="Confiance minimale des conversations retenues")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Mettre à jour le modèle actif au lieu d'en créer un nouveau")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--n-features", type=int, default=config.HASHING_N_FEATURES,
+                        help="Dimension de l'espace haché")
+    parser.add_argument("--search", choices=("grid", "random"),
+                        help="Recherche d'hyperparamètres par validation croisée")
+    parser.add_argument("--folds", type=int, default=5, help="Nombre de plis de la validation croisée")
+    parser.add_argument("--n-iter", type=int, default=20, help="Configurations tirées (recherche random)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Processus parallèles (-1 : tous les cœurs)")
+    parser.add_argument("--leaderboard", help="Copie du classement (JSON)")
+    args = parser.parse_args()
+    
+    print("🚀 Démarrage de l'entraînement du modèle...")
+    print("=" * 50)
+    
+    # Ressources NLTK (jamais téléchargées sur le chemin de service)
+    download_nltk_resources()
+    
+    if args.search:
+        accuracy = train_search(args)
+        label = "une précision en validation croisée de"
+    elif args.stream or args.from_conversations or args.incremental:
+        accuracy = train_streaming(args)
+        label = "une précision progressive de"
+    else:
+        accuracy = train_full(args.vectorizer)
+        label = "une précision de"
     
     print("\n" + "=" * 50)
-    print(f"✅ Entraînement terminé avec une précision de {accuracy:.2%}")
+    if accuracy is None:
+        print("✅ Entraînement terminé")
+    else:
+        print(f"✅ Entraînement terminé avec {label} {accuracy:.2%}")
     print("=" * 50)
 
 if __name__ == "__main__":
     main()
-
-
@@ -0,0 +1,36 @@
+"""
+Fixtures communes des tests
+"""
+import os
+import sys
+import pytest
+
+# Ajouter le répertoire du projet au path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import storage as storage_module
+from database.mongodb_connection import CircuitBreaker, mongodb
+import config
+
+def _accept_sort_keyword(method):
+    """pymongo 4.9+ transmet `sort` aux opérations d'un bulk_write, inconnu de mongomock"""
+    def wrapper(self, *args, sort=None, **kwargs):
+        return method(self, *args, **kwargs)
+    return wrapper
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Base MongoDB en mémoire (mongomock) à la place du serveur"""
+    mongomock = pytest.importorskip("mongomock")
+    builder = mongomock.collection.BulkOperationBuilder
+    for name in ("add_update", "add_replace"):
+        monkeypatch.setattr(builder, name, _accept_sort_keyword(getattr(builder, name)))
+
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(mongodb, "client", client)
+    monkeypatch.setattr(mongodb, "db", client[config.DATABASE_NAME])
+    monkeypatch.setattr(mongodb, "_connected", True)
+    monkeypatch.setattr(mongodb, "breaker", CircuitBreaker())
+    previous = storage_module.use_storage(storage_module.MongoStorage())
+    yield mongodb.db
+    storage_module.use_storage(previous)
@@ -0,0 +1,132 @@
+"""
+Tests des caches (réponses et FAQ) : TTL, éviction LRU, invalidation
+"""
+import time
+import pytest
+from chatbot.response_cache import ResponseCache
+from database.models import FAQCache, FAQModel
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(time, "monotonic", fake.monotonic)
+    return fake
+
+def text_result(response):
+    return {"response": response, "type": "text"}
+
+# Cache des réponses
+
+def test_response_cache_ttl(clock):
+    cache = ResponseCache(max_entries=10, ttl=60, product_ttl=5)
+    cache.put("bonjour", text_result("Bonjour !"))
+    clock.now += 59
+    assert cache.get("bonjour") == text_result("Bonjour !")
+    clock.now += 1
+    assert cache.get("bonjour") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_response_cache_lru_eviction(clock):
+    cache = ResponseCache(max_entries=2, ttl=60, product_ttl=5)
+    cache.put("a", text_result("a"))
+    cache.put("b", text_result("b"))
+    assert cache.get("a") is not None
+    cache.put("c", text_result("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_response_cache_max_bytes(clock):
+    size = ResponseCache._estimate_size(text_result("x" * 100))
+    cache = ResponseCache(max_entries=10, ttl=60, product_ttl=5, max_bytes=size * 2)
+    for key in ("a", "b", "c"):
+        cache.put(key, text_result("x" * 100))
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["size_bytes"] <= size * 2
+    assert cache.get("a") is None
+
+def test_response_cache_products_follow_catalog_version(clock):
+    cache = ResponseCache(max_entries=10, ttl=60, product_ttl=5)
+    result = {"response": "Voici", "type": "products", "products": []}
+    cache.put("robe", result, catalog_version=1)
+    assert cache.get("robe", catalog_version=1) == result
+    assert cache.get("robe", catalog_version=2) is None
+    cache.put("robe", result, catalog_version=2)
+    clock.now += 5
+    assert cache.get("robe", catalog_version=2) is None
+
+# Cache FAQ
+
+@pytest.fixture
+def faq_collection(mongo):
+    collection = FAQModel.get_collection()
+    collection.insert_many([
+        {"intent": "livraison", "question": "Délai ?", "answer": "3 jours"},
+        {"intent": "paiement", "question": "Moyens ?", "answer": "Carte"},
+        {"intent": "retour", "question": "Retour ?", "answer": "30 jours"}
+    ])
+    return collection
+
+def test_faq_cache_hits_and_negative_entries(clock, faq_collection):
+    cache = FAQCache(max_entries=10, ttl=60)
+    assert cache.get("livraison")["answer"] == "3 jours"
+    assert cache.get("livraison")["answer"] == "3 jours"
+    assert cache.get("inconnue") is None
+    assert cache.get("inconnue") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+
+def test_faq_cache_ttl(clock, faq_collection):
+    cache = FAQCache(max_entries=10, ttl=60)
+    cache.get("livraison")
+    faq_collection.update_one({"intent": "livraison"}, {"$set": {"answer": "2 jours"}})
+    clock.now += 59
+    assert cache.get("livraison")["answer"] == "3 jours"
+    clock.now += 1
+    assert cache.get("livraison")["answer"] == "2 jours"
+
+def test_faq_cache_lru_eviction(clock, faq_collection):
+    cache = FAQCache(max_entries=2, ttl=60)
+    assert cache.preload() == 3
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+def test_faq_cache_invalidated_by_version(clock, faq_collection):
+    cache = FAQCache(max_entries=10, ttl=60)
+    cache.get("paiement")
+    faq_collection.update_one({"intent": "paiement"}, {"$set": {"answer": "Virement"}})
+    FAQModel.bump_version()
+    assert cache.get("paiement")["answer"] == "Virement"
+    assert cache.stats()["invalidations"] == 1
+
+def test_faq_cache_serves_stale_entry_on_error(clock, faq_collection, monkeypatch):
+    cache = FAQCache(max_entries=10, ttl=60)
+    cache.get("retour")
+    clock.now += 60
+
+    available = False
+    find_faq_by_intent = FAQModel.find_faq_by_intent
+
+    def flaky(intent):
+        if not available:
+            raise ConnectionError("MongoDB indisponible")
+        return find_faq_by_intent(intent)
+
+    monkeypatch.setattr(FAQModel, "find_faq_by_intent", staticmethod(flaky))
+    assert cache.get("retour")["answer"] == "30 jours"
+    assert cache.get("livraison") is None
+    assert cache.stats()["stale_hits"] == 1
+
+    # Aucune absence mémorisée pendant la panne
+    available = True
+    assert cache.get("livraison")["answer"] == "3 jours"
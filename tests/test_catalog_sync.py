@@ -0,0 +1,66 @@
+"""
+Tests de la synchronisation incrémentale (mongomock)
+"""
+from database.catalog_sync import content_hash, sync_collection
+from database.models import ProductModel
+
+PRODUCTS = [
+    {"name": "Robe d'été", "category": "robe", "gender": "femme", "price": 49.99},
+    {"name": "Chemise", "category": "chemise", "gender": "homme", "price": 39.99},
+    {"name": "Jean slim", "category": "pantalon", "gender": "homme", "price": 59.99}
+]
+
+def sync(collection, records, **options):
+    return sync_collection(collection, records, "product_id", ProductModel.product_id, **options)
+
+def counts(summary):
+    return (summary["inserted"], summary["updated"], summary["deleted"], summary["unchanged"])
+
+def test_insert_then_unchanged(mongo):
+    collection = ProductModel.get_collection()
+    assert counts(sync(collection, PRODUCTS)) == (3, 0, 0, 0)
+    assert collection.count_documents({}) == 3
+    assert counts(sync(collection, PRODUCTS)) == (0, 0, 0, 3)
+
+def test_update_delete_and_duplicates(mongo):
+    collection = ProductModel.get_collection()
+    sync(collection, PRODUCTS, chunk_size=2)
+    created_at = collection.find_one({"name": "Chemise"})["created_at"]
+
+    changed = [dict(PRODUCTS[1], price=29.99), PRODUCTS[2], PRODUCTS[2]]
+    summary = sync(collection, changed, chunk_size=2)
+    assert counts(summary) == (0, 1, 1, 1)
+    assert summary["duplicates"] == 1
+
+    shirt = collection.find_one({"name": "Chemise"})
+    assert shirt["price"] == 29.99
+    assert shirt["created_at"] == created_at
+    assert "updated_at" in shirt
+    assert collection.count_documents({}) == 2
+
+def test_dry_run_writes_nothing(mongo):
+    collection = ProductModel.get_collection()
+    summary = sync(collection, PRODUCTS, dry_run=True)
+    assert counts(summary) == (3, 0, 0, 0)
+    assert collection.count_documents({}) == 0
+
+def test_documents_without_hash_are_compared_by_content(mongo):
+    collection = ProductModel.get_collection()
+    collection.insert_many([
+        dict(product, product_id=ProductModel.product_id(product)) for product in PRODUCTS
+    ])
+    changed = [PRODUCTS[0], PRODUCTS[1], dict(PRODUCTS[2], price=1.0)]
+    assert counts(sync(collection, changed)) == (0, 1, 0, 2)
+
+def test_unkeyed_documents_are_deleted(mongo):
+    collection = ProductModel.get_collection()
+    sync(collection, PRODUCTS)
+    collection.insert_one(dict(PRODUCTS[0]))
+    assert counts(sync(collection, PRODUCTS)) == (0, 0, 1, 3)
+    assert collection.count_documents({}) == 3
+
+def test_content_hash_ignores_metadata():
+    record = dict(PRODUCTS[0])
+    stored = dict(record, _id=1, product_id="x", created_at="hier", content_hash="abc")
+    assert content_hash(stored, "product_id") == content_hash(record, "product_id")
+    assert content_hash(dict(record, price=1.0)) != content_hash(record)
@@ -0,0 +1,94 @@
+"""
+Tests de la journalisation asynchrone (write-behind) des conversations
+"""
+import asyncio
+import threading
+from database.conversation_logger import AsyncConversationLogger, ConversationLogger
+
+class RecordingWriter:
+    """Écrivain de test : échoue `failures` fois, puis enregistre les lots"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+
+    def __call__(self, batch):
+        if self.failures:
+            self.failures -= 1
+            return None
+        self.batches.append(list(batch))
+        return True
+
+def log_many(logger, count):
+    for i in range(count):
+        logger.log(f"message {i}", "réponse", "livraison", 0.9)
+
+def test_writes_in_batches():
+    writer = RecordingWriter()
+    logger = ConversationLogger(batch_size=10, flush_interval=60, writer=writer)
+    log_many(logger, 25)
+    logger.close()
+    assert sum(len(batch) for batch in writer.batches) == 25
+    assert max(len(batch) for batch in writer.batches) <= 10
+    metrics = logger.metrics()
+    assert (metrics["enqueued"], metrics["written"], metrics["failed"]) == (25, 25, 0)
+
+def test_failed_batch_is_retried():
+    writer = RecordingWriter(failures=2)
+    logger = ConversationLogger(batch_size=5, flush_interval=0.01, writer=writer, retry_delay=0.001)
+    log_many(logger, 5)
+    logger.flush()
+    metrics = logger.metrics()
+    assert (metrics["written"], metrics["failed"], metrics["retries"]) == (5, 0, 2)
+    logger.close()
+
+def test_batch_dropped_after_retries():
+    writer = RecordingWriter(failures=10)
+    logger = ConversationLogger(batch_size=5, flush_interval=0.01, writer=writer,
+                                retry_delay=0.001, max_retries=2)
+    log_many(logger, 5)
+    logger.flush()
+    metrics = logger.metrics()
+    assert (metrics["written"], metrics["failed"], metrics["retries"]) == (0, 5, 2)
+    logger.close()
+
+def test_drop_policy_when_queue_is_full():
+    release = threading.Event()
+
+    def blocked_writer(batch):
+        release.wait(5)
+        return True
+
+    logger = ConversationLogger(max_queue_size=2, batch_size=1, flush_interval=0.01,
+                                overflow_policy="drop", writer=blocked_writer)
+    results = [logger.log("m", "r", "livraison", 0.9) for _ in range(10)]
+    release.set()
+    logger.close()
+    assert not all(results)
+    metrics = logger.metrics()
+    assert metrics["dropped"] == results.count(False)
+    assert metrics["written"] == results.count(True)
+
+def test_async_logger_retries_and_flushes():
+    writer = RecordingWriter(failures=1)
+
+    async def async_writer(batch):
+        return writer(batch)
+
+    async def scenario():
+        logger = AsyncConversationLogger(batch_size=4, flush_interval=60,
+                                         writer=async_writer, retry_delay=0.001)
+        for i in range(10):
+            await logger.log(f"message {i}", "réponse", "livraison", 0.9)
+        await logger.flush()
+        flushed = logger.metrics()
+        # Pas de nouvel essai pendant la fermeture
+        writer.failures = 1
+        await logger.log("dernier", "réponse", "livraison", 0.9)
+        await logger.close()
+        return flushed, logger.metrics()
+
+    flushed, closed = asyncio.run(scenario())
+    assert (flushed["written"], flushed["failed"], flushed["retries"]) == (10, 0, 1)
+    assert (closed["written"], closed["failed"], closed["retries"]) == (10, 1, 1)
+    assert all(len(batch) <= 4 for batch in writer.batches)
@@ -0,0 +1,66 @@
+"""
+Tests du moteur d'inférence NumPy : mêmes probabilités que scikit-learn
+"""
+import json
+import numpy as np
+import pytest
+import config
+from nlp.preprocessing import has_nltk_resource, preprocessor
+
+pytest.importorskip("sklearn")
+if not has_nltk_resource("stopwords"):
+    pytest.skip("stopwords NLTK absents (download_nltk_resources())", allow_module_level=True)
+
+from nlp.fast_inference import FastIntentClassifier
+from nlp.intent_classifier import IntentClassifier
+from nlp.model_bundle import ModelBundle
+
+MESSAGES = [
+    "bonjour",
+    "Je cherche une robe d'été pour femme",
+    "Quels sont les délais de livraison ?",
+    "Puis-je payer par carte bancaire ?",
+    "COMMENT RETOURNER UN ARTICLE ???",
+    "au revoir et merci",
+    "xyzzy",
+    "",
+    "😀 promo -50% sur les chaussures"
+]
+
+@pytest.fixture(scope="module")
+def training_data():
+    with open(config.TRAINING_DATA_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture(params=["tfidf", "hashing"])
+def trained(request, training_data, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PREPROCESSING_CACHE_ENABLED", False)
+    classifier = IntentClassifier(vectorizer_type=request.param, n_features=2 ** 12)
+    classifier.train(training_data)
+    classifier.save(str(tmp_path))
+    return classifier, str(tmp_path)
+
+def test_probabilities_match_sklearn(trained):
+    classifier, bundle_path = trained
+    fast = FastIntentClassifier()
+    fast.load(bundle_path)
+
+    processed = [preprocessor.preprocess(message) for message in MESSAGES]
+    expected = classifier.classifier.predict_proba(classifier.vectorizer.transform(processed))
+    assert fast.classes == classifier.classifier.classes_.tolist()
+    np.testing.assert_allclose(fast.predict_proba(MESSAGES), expected, rtol=0, atol=1e-9)
+
+    for message, row in zip(MESSAGES, expected):
+        intent, confidence = fast.predict(message)
+        assert intent == classifier.classifier.classes_[row.argmax()]
+        assert confidence == pytest.approx(row.max(), abs=1e-9)
+
+def test_bundle_round_trip(trained):
+    classifier, bundle_path = trained
+    bundle = ModelBundle.load(bundle_path, verify=True)
+    assert bundle.manifest["preprocessing_version"] == preprocessor.config_version()
+    assert bundle.check_preprocessing(preprocessor.config_version())
+
+    reloaded = IntentClassifier()
+    reloaded.load(bundle_path)
+    assert reloaded.predict_batch(MESSAGES) == classifier.predict_batch(MESSAGES)
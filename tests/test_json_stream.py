@@ -0,0 +1,60 @@
+"""
+Tests de la lecture en flux JSON / JSON Lines
+"""
+import gzip
+import json
+import pytest
+import config
+from scripts.json_stream import JsonRecordWriter, iter_json_records
+
+RECORDS = [
+    {"name": "Robe d'été \"fleurie\"", "price": 49.99, "size": ["XS", "S"], "stock": None},
+    {"name": "Chemise [classique], homme", "price": -1e-3, "tags": {"a": [1, 2, {"b": True}]}},
+    {"name": "Échappements \\ é 😀", "price": 0, "empty": [], "nested": {}},
+    [1, 2.5, "x", False],
+    "texte seul",
+    42
+]
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7, 64])
+def test_array_matches_json_load(tmp_path, read_size):
+    path = tmp_path / "records.json"
+    path.write_text(json.dumps(RECORDS, indent=2, ensure_ascii=False), encoding="utf-8")
+    assert list(iter_json_records(str(path), read_size=read_size)) == RECORDS
+
+@pytest.mark.parametrize("read_size", [1, 5, 4096])
+def test_products_file_matches_json_load(read_size):
+    with open(config.PRODUCTS_DATA_PATH, encoding="utf-8") as f:
+        expected = json.load(f)
+    assert list(iter_json_records(config.PRODUCTS_DATA_PATH, read_size=read_size)) == expected
+
+def test_compact_and_empty_arrays(tmp_path):
+    compact = tmp_path / "compact.json"
+    compact.write_text(json.dumps(RECORDS, separators=(",", ":")), encoding="utf-8")
+    assert list(iter_json_records(str(compact), read_size=1)) == RECORDS
+
+    empty = tmp_path / "empty.json"
+    empty.write_text(" [ \n ] ", encoding="utf-8")
+    assert list(iter_json_records(str(empty), read_size=1)) == []
+
+def test_json_lines_and_gzip(tmp_path):
+    path = tmp_path / "records.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for record in RECORDS:
+            f.write(json.dumps(record) + "\n\n")
+    assert list(iter_json_records(str(path))) == RECORDS
+
+def test_writer_round_trip(tmp_path):
+    for name in ("out.json", "out.jsonl"):
+        path = str(tmp_path / name)
+        with JsonRecordWriter(path) as writer:
+            for record in RECORDS:
+                writer.write(record)
+        assert list(iter_json_records(path, read_size=3)) == RECORDS
+
+@pytest.mark.parametrize("content", ["{\"a\": 1}", "[1, 2", "[1 2]", "[1,, 2]"])
+def test_invalid_array(tmp_path, content):
+    path = tmp_path / "invalid.json"
+    path.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_json_records(str(path), read_size=2))
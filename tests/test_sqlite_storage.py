@@ -0,0 +1,93 @@
+"""
+Tests du backend SQLite (aller-retour produits, FAQ, conversations)
+"""
+import threading
+import pytest
+from database.models import ConversationModel, ProductModel
+from database.sqlite_storage import SQLiteStorage
+
+PRODUCTS = [
+    {"name": "Robe d'été fleurie", "category": "robe", "gender": "femme", "price": 49.99,
+     "description": "Robe légère, imprimé floral élégant", "size": ["S", "M"]},
+    {"name": "Chemise classique homme", "category": "chemise", "gender": "homme", "price": 39.99,
+     "description": "Chemise en coton"},
+    {"name": "Jean slim", "category": "pantalon", "gender": "femme", "price": 59.99,
+     "description": "Jean stretch"}
+]
+
+FAQ = [
+    {"intent": "livraison", "question": "Délai de livraison ?", "answer": "3 jours"},
+    {"intent": "paiement", "question": "Moyens de paiement ?", "answer": "Carte"}
+]
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorage(path=str(tmp_path / "chatbot.sqlite3"), batch_size=2)
+    yield storage
+    storage.close()
+
+def test_products_round_trip(storage):
+    assert storage.upsert_products(PRODUCTS) == 3
+    assert storage.count_products() == 3
+
+    products = storage.get_all_products()
+    assert [product["name"] for product in products] == [product["name"] for product in PRODUCTS]
+    assert products[0]["size"] == ["S", "M"]
+    assert products[0]["product_id"] == ProductModel.product_id(PRODUCTS[0])
+
+    # Mise à jour sur la clé, sans doublon
+    storage.upsert_products([dict(PRODUCTS[1], price=29.99)])
+    assert storage.count_products() == 3
+    shirt = [product for product in storage.get_all_products() if product["category"] == "chemise"]
+    assert shirt[0]["price"] == 29.99
+
+def test_full_text_search(storage):
+    storage.upsert_products(PRODUCTS)
+    # Accents ignorés ; mots reliés par OR
+    assert [product["name"] for product in storage.search_products("ete")] == ["Robe d'été fleurie"]
+    assert {product["name"] for product in storage.search_products("jean chemise")} == {
+        "Chemise classique homme", "Jean slim"
+    }
+    assert {product["name"] for product in storage.search_products("", gender="femme")} == {
+        "Robe d'été fleurie", "Jean slim"
+    }
+    assert storage.search_products("chemise", gender="femme") == []
+    assert storage.search_products("?!") == []
+
+def test_faq_round_trip(storage):
+    storage.replace_faq(FAQ)
+    assert storage.find_faq_by_intent("livraison")["answer"] == "3 jours"
+    assert storage.get_faq_by_intent("retour") is None
+    storage.replace_faq(FAQ[1:])
+    assert storage.get_faq_by_intent("livraison") is None
+    assert len(storage.get_all_faq()) == 1
+
+def test_conversations_and_rollups(storage):
+    conversations = [
+        ConversationModel.build_conversation("bonjour", "Bonjour !", "salutation", 0.9),
+        ConversationModel.build_conversation("livraison ?", "3 jours", "livraison", 0.3),
+        ConversationModel.build_conversation("???", "Pardon ?", "unknown", 0.1)
+    ]
+    assert storage.save_conversations(conversations) is not None
+    storage.save_conversation("merci", "Au revoir", "au_revoir", 0.8)
+
+    assert sorted(storage.iter_labeled_messages(min_confidence=0.5)) == [
+        ("bonjour", "salutation"), ("merci", "au_revoir")
+    ]
+    stats = storage.get_conversation_stats(recent_limit=2)
+    assert stats["total_conversations"] == 4
+    assert stats["today_conversations"] == 4
+    assert stats["low_confidence_conversations"] == 2
+    assert len(stats["recent_conversations"]) == 2
+
+def test_concurrent_writes(storage):
+    def write(thread_index):
+        for i in range(20):
+            storage.save_conversation(f"message {thread_index}-{i}", "réponse", "livraison", 0.9)
+
+    threads = [threading.Thread(target=write, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert storage.get_conversation_stats()["total_conversations"] == 80